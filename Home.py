@@ -13,6 +13,7 @@ if "settings" not in st.session_state:
     st.session_state["settings"] = {
         "default_organism": ("Homo sapiens", 9606),
         "timeout_seconds": 20,
+        "http_cache": False,
         "show_debug": False,
         "trend_years": 10,
         "contact_email": "",
@@ -0,0 +1,78 @@
+"""
+Microbenchmark: JSON decode time per backend on recorded API payloads.
+
+Record fixtures once (needs network), then benchmark offline:
+
+    python benchmarks/bench_json.py --record
+    python benchmarks/bench_json.py [--repeat 20]
+
+Fixtures are stored gzipped under benchmarks/fixtures/.
+"""
+
+from __future__ import annotations
+import argparse
+import gzip
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from curio import json_backend  # noqa: E402
+from curio.net_utils import HttpConfig, get_json, request  # noqa: E402
+
+FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures"
+EUTILS = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
+
+
+def _sources(cfg: HttpConfig):
+    """Yield (fixture name, url, params) for one representative payload per source."""
+    yield ("uniprot_search_tp53", "https://rest.uniprot.org/uniprotkb/search",
+           {"query": 'gene_exact:"TP53"', "format": "json", "size": 50})
+    pmids = get_json(f"{EUTILS}/esearch.fcgi", cfg=cfg, params={
+        "db": "pubmed", "term": "TP53 AND cancer", "retmax": 200, "retmode": "json"})["esearchresult"]["idlist"]
+    yield ("pubmed_esummary_200", f"{EUTILS}/esummary.fcgi",
+           {"db": "pubmed", "id": ",".join(pmids), "retmode": "json"})
+    yield ("ncbi_gene_esummary", f"{EUTILS}/esummary.fcgi",
+           {"db": "gene", "id": "7157,351,4609,672,675", "retmode": "json"})
+    yield ("rcsb_entry_4v6x", "https://data.rcsb.org/rest/v1/core/entry/4V6X", None)
+    yield ("string_network_tp53", "https://string-db.org/api/json/network",
+           {"identifiers": "TP53", "species": 9606, "limit": 50})
+
+
+def record() -> None:
+    cfg = HttpConfig()
+    FIXTURE_DIR.mkdir(parents=True, exist_ok=True)
+    for name, url, params in _sources(cfg):
+        resp = request("GET", url, params=params, cfg=cfg)
+        resp.raise_for_status()
+        wire = resp.headers.get("Content-Length", "?")
+        (FIXTURE_DIR / f"{name}.json.gz").write_bytes(gzip.compress(resp.content))
+        print(f"recorded {name}: {len(resp.content):,} bytes decoded, {wire} bytes on the wire "
+              f"(Content-Encoding: {resp.headers.get('Content-Encoding', 'identity')})")
+
+
+def bench(repeat: int) -> None:
+    fixtures = sorted(FIXTURE_DIR.glob("*.json.gz"))
+    if not fixtures:
+        sys.exit("No fixtures found; run with --record first.")
+    backends = json_backend.available_backends()
+    print(f"{'fixture':<26}{'size':>12}" + "".join(f"{b + ' ms':>14}" for b in backends) + f"{'speedup':>10}")
+    for path in fixtures:
+        payload = gzip.decompress(path.read_bytes())
+        times = {}
+        for name in backends:
+            json_backend.set_backend(name)
+            best = min(timeit.repeat(lambda: json_backend.loads(payload), number=1, repeat=repeat))
+            times[name] = best * 1000
+        speedup = times["stdlib"] / min(times.values())
+        print(f"{path.name[:-8]:<26}{len(payload):>12,}" + "".join(f"{times[b]:>14.3f}" for b in backends)
+              + f"{speedup:>9.1f}x")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--record", action="store_true", help="fetch fresh fixtures from the live APIs")
+    ap.add_argument("--repeat", type=int, default=20, help="timing repetitions per backend (best is reported)")
+    args = ap.parse_args()
+    record() if args.record else bench(args.repeat)
@@ -0,0 +1,247 @@
+# curio/aio.py
+"""
+Asyncio API for CURIO's HTTP helpers and source clients.
+
+Coroutines here run the synchronous ``net_utils`` stack on a shared worker
+pool, so every call still uses the pooled per-host sessions, the response
+cache, retries and rate limits. Identical calls awaited at the same time are
+coalesced onto one worker (see ``AsyncSingleFlight``). Fan-out helpers bound
+concurrency with a semaphore and cancel outstanding work when one call fails
+or the caller is cancelled. ``run_sync`` drives a coroutine on a background event loop so
+Streamlit pages can call the batch helpers from synchronous code.
+"""
+
+from __future__ import annotations
+import asyncio
+import concurrent.futures
+import functools
+import threading
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar, Union
+
+import requests
+
+from . import get_logger, ncbi_gene_api, net_utils, pubmed_api, structure_api, uniprot_api
+from .net_utils import HttpConfig
+
+log = get_logger("aio")
+
+T = TypeVar("T")
+
+MAX_WORKERS = 32
+
+_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_lock = threading.Lock()
+
+
+def _get_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=MAX_WORKERS, thread_name_prefix="curio-aio"
+            )
+        return _executor
+
+
+class AsyncSingleFlight:
+    """Coalesce identical in-flight coroutine calls on one event loop.
+
+    Followers await the leader's task through ``asyncio.shield`` so a
+    cancelled follower never cancels work other callers are waiting on.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: Dict[Tuple[int, str], asyncio.Future] = {}
+        self.coalesced = 0
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[T]]) -> T:
+        loop = asyncio.get_running_loop()
+        slot = (id(loop), key)
+        task = self._tasks.get(slot)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._tasks[slot] = task
+            task.add_done_callback(lambda _t: self._tasks.pop(slot, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+
+_inflight = AsyncSingleFlight()
+
+
+def _call_key(fn: Callable[..., Any], args: tuple, kwargs: dict) -> str:
+    name = getattr(fn, "__qualname__", None) or repr(fn)
+    return repr((getattr(fn, "__module__", ""), name, args, sorted(kwargs.items())))
+
+
+async def _in_worker(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    loop = asyncio.get_running_loop()
+
+    def _run() -> Awaitable[T]:
+        return loop.run_in_executor(_get_executor(), functools.partial(fn, *args, **kwargs))
+
+    return await _inflight.do(_call_key(fn, args, kwargs), _run)
+
+
+async def gather_bounded(aws: Iterable[Awaitable[T]],
+                         limit: int = 8,
+                         return_exceptions: bool = False) -> List[Union[T, BaseException]]:
+    """Await ``aws`` with at most ``limit`` running at once, preserving order.
+
+    If one awaitable raises (and ``return_exceptions`` is False) or the caller
+    is cancelled, every task still pending is cancelled before re-raising.
+    """
+    sem = asyncio.Semaphore(limit)
+
+    async def _bounded(aw: Awaitable[T]) -> T:
+        async with sem:
+            return await aw
+
+    tasks = [asyncio.ensure_future(_bounded(aw)) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks, return_exceptions=return_exceptions)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="curio-aio-loop", daemon=True).start()
+        return _loop
+
+
+def run_sync(aw: Awaitable[T], timeout: Optional[float] = None) -> T:
+    """Run a coroutine on CURIO's background event loop and wait for its result.
+
+    Safe to call from Streamlit scripts (which may already run inside a
+    loop). On timeout the coroutine is cancelled and ``TimeoutError`` raised.
+    """
+    fut = asyncio.run_coroutine_threadsafe(aw, _background_loop())
+    try:
+        return fut.result(timeout)
+    except concurrent.futures.TimeoutError:
+        fut.cancel()
+        raise
+
+
+# net_utils mirrors
+
+async def request(method: str, url: str, **kwargs: Any) -> requests.Response:
+    """Async ``net_utils.request``."""
+    return await _in_worker(net_utils.request, method, url, **kwargs)
+
+
+async def get_json(url: str,
+                   params: Optional[dict] = None,
+                   cfg: Optional[HttpConfig] = None,
+                   method: str = "GET",
+                   json: Optional[dict] = None) -> dict:
+    """Async ``net_utils.get_json``."""
+    return await _in_worker(net_utils.get_json, url, params=params, cfg=cfg, method=method, json=json)
+
+
+async def get_text(url: str,
+                   params: Optional[dict] = None,
+                   cfg: Optional[HttpConfig] = None,
+                   method: str = "GET",
+                   data: Optional[dict] = None) -> str:
+    """Async ``net_utils.get_text``."""
+    return await _in_worker(net_utils.get_text, url, params=params, cfg=cfg, method=method, data=data)
+
+
+async def post_json(url: str,
+                    json: dict,
+                    params: Optional[dict] = None,
+                    cfg: Optional[HttpConfig] = None) -> dict:
+    """Async ``net_utils.post_json``."""
+    return await _in_worker(net_utils.post_json, url, json=json, params=params, cfg=cfg)
+
+
+async def get_bytes(url: str, cfg: Optional[HttpConfig] = None) -> bytes:
+    """Async ``net_utils.get_bytes``."""
+    return await _in_worker(net_utils.get_bytes, url, cfg=cfg)
+
+
+# Source clients
+
+async def fetch_uniprot_entry(identifier: str,
+                              organism: str = "Homo sapiens",
+                              output: str = "json",
+                              cfg: Optional[HttpConfig] = None,
+                              columns: Optional[List[str]] = None) -> Optional[Union[Dict, str]]:
+    """Async ``uniprot_api.fetch_uniprot_entry``."""
+    return await _in_worker(uniprot_api.fetch_uniprot_entry, identifier, organism, output,
+                            cfg=cfg, columns=columns)
+
+
+async def fetch_uniprot_batch(identifiers: List[str],
+                              organism: str = "Homo sapiens",
+                              output: str = "json",
+                              cfg: Optional[HttpConfig] = None,
+                              columns: Optional[List[str]] = None) -> Dict[str, Optional[Union[Dict, str]]]:
+    """Async ``uniprot_api.fetch_uniprot_batch`` (already batched into OR-queries, so one worker)."""
+    return await _in_worker(uniprot_api.fetch_uniprot_batch, identifiers, organism, output,
+                            cfg=cfg, columns=columns)
+
+
+async def fetch_ncbi_entry(identifier: str,
+                           db: str = "gene",
+                           organism: str = "Homo sapiens",
+                           output: str = "json",
+                           cfg: Optional[HttpConfig] = None):
+    """Async ``ncbi_gene_api.fetch_ncbi_entry``."""
+    return await _in_worker(ncbi_gene_api.fetch_ncbi_entry, identifier, db=db,
+                            organism=organism, output=output, cfg=cfg)
+
+
+async def fetch_ncbi_batch(identifiers: List[str],
+                           db: str = "gene",
+                           organism: str = "Homo sapiens",
+                           output: str = "json",
+                           cfg: Optional[HttpConfig] = None,
+                           limit: int = 8) -> Dict[str, Optional[Dict]]:
+    """
+    Fetch NCBI entries; failures map to None like the sync batch. JSON and
+    protein/nucleotide sequences go through the history-server batches (one
+    worker); gene FASTA/text entries run concurrently.
+    """
+    if output == "json" or db in ("protein", "nucleotide"):
+        return await _in_worker(ncbi_gene_api.fetch_ncbi_batch, identifiers, db=db,
+                                organism=organism, output=output, cfg=cfg)
+    idents = [i.strip() for i in identifiers if i.strip()]
+    results = await gather_bounded(
+        (fetch_ncbi_entry(i, db=db, organism=organism, output=output, cfg=cfg) for i in idents),
+        limit=limit, return_exceptions=True,
+    )
+    return {i: (None if isinstance(r, Exception) else r) for i, r in zip(idents, results)}
+
+
+async def fetch_entry_summary(pdb_id: str, cfg: Optional[HttpConfig] = None) -> Optional[Dict]:
+    """Async ``structure_api.fetch_entry_summary``."""
+    return await _in_worker(structure_api.fetch_entry_summary, pdb_id, cfg=cfg)
+
+
+async def fetch_entry_summaries(pdb_ids: List[str],
+                                cfg: Optional[HttpConfig] = None,
+                                limit: int = 8) -> Dict[str, Optional[Dict]]:
+    """Fetch RCSB entry summaries concurrently, keyed by PDB ID."""
+    results = await gather_bounded((fetch_entry_summary(p, cfg=cfg) for p in pdb_ids), limit=limit)
+    return dict(zip(pdb_ids, results))
+
+
+async def fetch_pubmed_abstract(pmid: str, cfg: Optional[HttpConfig] = None) -> str:
+    """Async ``pubmed_api.fetch_pubmed_abstract``."""
+    return await _in_worker(pubmed_api.fetch_pubmed_abstract, pmid, cfg=cfg)
+
+
+async def fetch_pubmed_abstracts(pmids: List[str],
+                                 cfg: Optional[HttpConfig] = None) -> Dict[str, str]:
+    """Async ``pubmed_api.fetch_pubmed_abstracts`` (batched efetch, so one worker); missing PMIDs map to ""."""
+    return await _in_worker(pubmed_api.fetch_pubmed_abstracts, pmids, cfg=cfg)
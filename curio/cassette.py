@@ -0,0 +1,122 @@
+# curio/cassette.py
+"""
+Record/replay cassettes for hermetic CURIO runs.
+
+In record mode every HTTP exchange made through ``net_utils`` is appended to
+a gzip-compressed JSON-lines file. In replay mode the same exchanges are
+served from that file without touching the network, optionally with
+injected latency and failures so retries, timeouts and telemetry can be
+exercised deterministically (e.g. in CI or offline benchmarks).
+"""
+
+from __future__ import annotations
+import base64
+import gzip
+import json
+import random
+import threading
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import requests
+
+from . import get_logger
+
+log = get_logger("cassette")
+
+DEFAULT_CASSETTE_PATH = Path(__file__).resolve().parent / "cache" / "cassette.jsonl.gz"
+
+# Response headers describing the transfer rather than the (already decoded) body.
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+
+
+class CassetteMiss(requests.exceptions.RequestException):
+    """Raised in replay mode when no recorded exchange matches a request."""
+
+
+@dataclass
+class Interaction:
+    """One recorded request/response exchange."""
+    key: str
+    method: str
+    url: str
+    status: int
+    headers: Dict[str, str]
+    body: str  # base64
+
+    @property
+    def content(self) -> bytes:
+        return base64.b64decode(self.body)
+
+
+class Cassette:
+    """A set of recorded interactions backed by a ``.jsonl.gz`` file.
+
+    Repeated identical requests are replayed in the order they were recorded,
+    cycling once exhausted.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._interactions: Dict[str, List[Interaction]] = defaultdict(list)
+        self._cursor: Dict[str, int] = defaultdict(int)
+        if self.path.exists():
+            with gzip.open(self.path, "rt", encoding="utf-8") as fh:
+                for line in fh:
+                    if line.strip():
+                        item = Interaction(**json.loads(line))
+                        self._interactions[item.key].append(item)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(v) for v in self._interactions.values())
+
+    def record(self, key: str, method: str, resp: requests.Response) -> None:
+        """Append a live response (its body is read into memory) to the cassette."""
+        headers = {k: v for k, v in resp.headers.items() if k.lower() not in _DROP_HEADERS}
+        item = Interaction(key=key, method=method.upper(), url=resp.url, status=resp.status_code,
+                           headers=headers, body=base64.b64encode(resp.content).decode("ascii"))
+        line = json.dumps(asdict(item), separators=(",", ":")) + "\n"
+        with self._lock:
+            self._interactions[key].append(item)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with gzip.open(self.path, "at", encoding="utf-8") as fh:
+                fh.write(line)
+
+    def play(self, key: str, method: str, url: str) -> Interaction:
+        """Return the next recorded interaction for ``key``."""
+        with self._lock:
+            items = self._interactions.get(key)
+            if not items:
+                raise CassetteMiss(f"No recorded interaction for {method} {url} in {self.path}")
+            idx = self._cursor[key] % len(items)
+            self._cursor[key] += 1
+            return items[idx]
+
+
+class FaultInjector:
+    """Seeded latency/error injection for replayed responses."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, seed: Optional[int] = None) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self) -> float:
+        """Seconds to wait before serving a replayed response."""
+        if not self.latency:
+            return 0.0
+        with self._lock:
+            return max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+
+    def should_fail(self) -> bool:
+        if not self.error_rate:
+            return False
+        with self._lock:
+            return self._rng.random() < self.error_rate
@@ -0,0 +1,120 @@
+# curio/circuit.py
+"""
+Per-host circuit breakers for CURIO API calls.
+
+A breaker opens after ``failure_threshold`` consecutive failures (connection
+errors, timeouts, 5xx responses) and then fails calls immediately instead of
+letting every user wait out the timeout. After ``recovery_seconds`` it goes
+half-open and lets a limited number of probe requests through: a success
+closes it again, a failure re-opens it for another recovery period.
+"""
+
+from __future__ import annotations
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+
+from . import get_logger
+
+log = get_logger("circuit")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of sending a request while the host's breaker is open."""
+
+
+class CircuitBreaker:
+    """Thread-safe closed/open/half-open breaker for one upstream host."""
+
+    def __init__(self, name: str, failure_threshold: int = 5,
+                 recovery_seconds: float = 30.0, half_open_probes: int = 1) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.half_open_probes = half_open_probes
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self.total_failures = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self) -> None:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.recovery_seconds:
+            self._state = HALF_OPEN
+            self._probes = 0
+            log.info("Circuit for %s half-open; probing", self.name)
+
+    def allow(self) -> bool:
+        """Return True if a request may be sent now (reserving a probe slot when half-open)."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != CLOSED:
+                log.info("Circuit for %s closed", self.name)
+            self._state = CLOSED
+            self._failures = 0
+            self._probes = 0
+
+    def record_failure(self, error: Optional[str] = None) -> None:
+        with self._lock:
+            self._failures += 1
+            self.total_failures += 1
+            self.last_error = error
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    log.warning("Circuit for %s opened after %d failure(s): %s",
+                                self.name, self._failures, error)
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._probes = 0
+
+    def release(self) -> None:
+        """Give back a half-open probe slot for a call that ended without a verdict."""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes:
+                self._probes -= 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probes = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._maybe_half_open()
+            retry_in = max(0.0, self.recovery_seconds - (time.monotonic() - self._opened_at)) \
+                if self._state == OPEN else 0.0
+            return {
+                "host": self.name,
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "total_failures": self.total_failures,
+                "rejected": self.rejected,
+                "retry_in_seconds": round(retry_in, 1),
+                "last_error": self.last_error,
+            }
@@ -0,0 +1,296 @@
+# curio/gene_info.py
+"""
+Offline NCBI Gene resolver built from ``gene_info.gz``.
+
+``build_gene_info`` streams NCBI's tab-separated ``gene_info`` dump (the
+full file or a per-organism one such as
+``Mammalia/Homo_sapiens.gene_info.gz``), optionally keeping only some
+taxa, into a compact SQLite table: GeneID, symbol, synonyms, chromosome,
+map location, description and other designations. ``fetch_ncbi_entry``
+(db="gene", output="json") and the NCBI batch then answer from the table
+without a request; symbols and GeneIDs it does not know still go to
+E-utilities. When no index file exists every helper returns None.
+
+Build one with::
+
+    python -m curio.gene_info --download Mammalia/Homo_sapiens.gene_info.gz --organism "Homo sapiens"
+"""
+
+from __future__ import annotations
+import argparse
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from . import get_logger
+from .id_index import KNOWN_TAXA, open_text
+from .net_utils import HttpConfig, download_to_file
+
+log = get_logger("gene_info")
+
+DEFAULT_GENE_INFO_PATH = Path(os.environ.get("CURIO_GENE_INFO") or
+                              Path(__file__).resolve().parent / "cache" / "gene_info.sqlite")
+
+GENE_INFO_URL = "https://ftp.ncbi.nlm.nih.gov/gene/DATA"
+
+# 0-based gene_info columns
+TAXON, GENE_ID, SYMBOL, SYNONYMS, CHROMOSOME, MAP_LOCATION, DESCRIPTION, GENE_TYPE, OTHER_DESIGNATIONS = \
+    0, 1, 2, 4, 6, 7, 8, 9, 13
+
+# name.kind: official symbols rank before synonyms
+_SYMBOL, _SYNONYM = 0, 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS gene (
+    gene_id            INTEGER PRIMARY KEY,
+    taxon              INTEGER NOT NULL,
+    symbol             TEXT    NOT NULL,
+    chromosome         TEXT,
+    map_location       TEXT,
+    description        TEXT,
+    gene_type          TEXT,
+    other_designations TEXT
+);
+CREATE TABLE IF NOT EXISTS name (
+    key     TEXT    NOT NULL,
+    kind    INTEGER NOT NULL,
+    taxon   INTEGER NOT NULL,
+    gene_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS organism (
+    taxon INTEGER PRIMARY KEY,
+    name  TEXT    NOT NULL
+);
+"""
+
+_INDEXES = "CREATE INDEX IF NOT EXISTS name_key ON name (key, taxon);"
+
+BATCH_ROWS = 50_000
+
+
+def _value(col: str) -> Optional[str]:
+    return None if col in ("-", "") else col
+
+
+def _gene_rows(lines: Iterable[str], taxa: Optional[set]) -> Iterable[List[str]]:
+    for line in lines:
+        if line.startswith("#"):
+            continue
+        cols = line.rstrip("\n").split("\t")
+        if len(cols) <= OTHER_DESIGNATIONS or (taxa and int(cols[TAXON]) not in taxa):
+            continue
+        yield cols
+
+
+def build_gene_info(source: Union[str, Path],
+                    path: Union[str, Path] = DEFAULT_GENE_INFO_PATH,
+                    taxon: Optional[int] = None,
+                    organism: Optional[str] = None) -> int:
+    """
+    Load a ``gene_info`` file (plain or gzip) into the index at ``path`` and
+    return the genes written. ``taxon`` (or a known ``organism`` name) keeps
+    only that taxon and replaces its earlier rows; without either the whole
+    index is replaced. ``organism`` names the taxon for lookups and records.
+    """
+    if taxon is None and organism:
+        taxon = KNOWN_TAXA.get(organism.strip().lower())
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path))
+    written = 0
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.executescript(_SCHEMA)
+        conn.execute("DROP INDEX IF EXISTS name_key")
+        if taxon is not None:
+            conn.execute("DELETE FROM gene WHERE taxon = ?", (taxon,))
+            conn.execute("DELETE FROM name WHERE taxon = ?", (taxon,))
+        else:
+            conn.executescript("DELETE FROM gene; DELETE FROM name;")
+        if organism and taxon is not None:
+            conn.execute("INSERT OR REPLACE INTO organism VALUES (?, ?)", (taxon, organism.strip()))
+
+        genes: List[Tuple] = []
+        names: List[Tuple[str, int, int, int]] = []
+        with open_text(source) as fh:
+            for cols in _gene_rows(fh, {taxon} if taxon is not None else None):
+                gene_id, row_taxon, symbol = int(cols[GENE_ID]), int(cols[TAXON]), cols[SYMBOL]
+                genes.append((gene_id, row_taxon, symbol, _value(cols[CHROMOSOME]), _value(cols[MAP_LOCATION]),
+                               _value(cols[DESCRIPTION]), _value(cols[GENE_TYPE]),
+                               _value(cols[OTHER_DESIGNATIONS])))
+                names.append((symbol.upper(), _SYMBOL, row_taxon, gene_id))
+                names.extend((syn.upper(), _SYNONYM, row_taxon, gene_id)
+                             for syn in (_value(cols[SYNONYMS]) or "").split("|") if syn)
+                if len(genes) >= BATCH_ROWS:
+                    written += _flush(conn, genes, names)
+        written += _flush(conn, genes, names)
+        conn.execute(_INDEXES)
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+    log.info("Indexed %d genes from %s into %s", written, Path(source).name, path)
+    return written
+
+
+def _flush(conn: sqlite3.Connection, genes: List, names: List) -> int:
+    n = len(genes)
+    conn.executemany("INSERT OR REPLACE INTO gene VALUES (?, ?, ?, ?, ?, ?, ?, ?)", genes)
+    conn.executemany("INSERT INTO name VALUES (?, ?, ?, ?)", names)
+    genes.clear()
+    names.clear()
+    return n
+
+
+class GeneInfoIndex:
+    """Read-only lookups against an index built by ``build_gene_info``. Thread-safe."""
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_GENE_INFO_PATH) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path.resolve().as_uri() + "?mode=ro", uri=True,
+                                     check_same_thread=False)
+        with self._lock:
+            self._organisms = dict(self._conn.execute("SELECT taxon, name FROM organism").fetchall())
+
+    def taxon_for(self, organism: Union[str, int, None]) -> Optional[int]:
+        """Taxon ID for an organism name (or pass-through for an int / numeric string)."""
+        if organism is None or isinstance(organism, int):
+            return organism
+        name = organism.strip().lower()
+        if name.isdigit():
+            return int(name)
+        for taxon, known in self._organisms.items():
+            if known.lower() == name:
+                return taxon
+        return KNOWN_TAXA.get(name)
+
+    def organism_name(self, taxon: int) -> Optional[str]:
+        if taxon in self._organisms:
+            return self._organisms[taxon]
+        names = [n for n, t in KNOWN_TAXA.items() if t == taxon]
+        return names[0].capitalize() if names else None
+
+    def gene_id(self, identifier: str, organism: Union[str, int, None] = None) -> Optional[int]:
+        """
+        GeneID for a GeneID/symbol/synonym. Official symbols win; a synonym shared
+        by several genes is ambiguous and returns None (left to the network search),
+        as does an organism the index cannot map to a taxon. GeneIDs of another
+        taxon than ``organism`` are not returned either.
+        """
+        key = identifier.strip().upper()
+        taxon = self.taxon_for(organism)
+        if taxon is None and organism is not None:
+            return None
+        if key.isdigit():
+            with self._lock:
+                row = self._conn.execute("SELECT gene_id, taxon FROM gene WHERE gene_id = ?",
+                                         (int(key),)).fetchone()
+            return row[0] if row and taxon in (None, row[1]) else None
+        sql = "SELECT kind, gene_id FROM name WHERE key = ?"
+        args: List = [key]
+        if taxon is not None:
+            sql += " AND taxon = ?"
+            args.append(taxon)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY kind, gene_id", args).fetchall()
+        if not rows:
+            return None
+        best = {gene_id for kind, gene_id in rows if kind == rows[0][0]}
+        return rows[0][1] if len(best) == 1 else None
+
+    def record(self, gene_id: int) -> Optional[Dict]:
+        """``fetch_ncbi_entry(db="gene", output="json")``-shaped record for a GeneID."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT gene_id, taxon, symbol, chromosome, map_location, description, other_designations "
+                "FROM gene WHERE gene_id = ?", (gene_id,)).fetchone()
+        if row is None:
+            return None
+        gid, taxon, symbol, chromosome, map_location, description, designations = row
+        return {
+            "Gene ID": str(gid),
+            "Symbol": symbol,
+            "Description": description,
+            "Organism": self.organism_name(taxon),
+            "Chromosome": chromosome,
+            "Map Location": map_location,
+            "Other Designations": designations or "",  # "|"-joined, as esummary returns it
+        }
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            genes, taxa = self._conn.execute("SELECT COUNT(*), COUNT(DISTINCT taxon) FROM gene").fetchone()
+            names = self._conn.execute("SELECT COUNT(*) FROM name").fetchone()[0]
+        return {"genes": genes, "taxa": taxa, "names": names}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_OPEN: Dict[str, GeneInfoIndex] = {}
+_OPEN_LOCK = threading.Lock()
+
+
+def get_gene_info(path: Union[str, Path, None] = None) -> Optional[GeneInfoIndex]:
+    """Shared ``GeneInfoIndex`` for ``path`` (default ``DEFAULT_GENE_INFO_PATH``), or None if not built."""
+    path = Path(path or DEFAULT_GENE_INFO_PATH)
+    with _OPEN_LOCK:
+        index = _OPEN.get(str(path))
+        if index is None:
+            if not path.exists():
+                return None
+            index = _OPEN[str(path)] = GeneInfoIndex(path)
+        return index
+
+
+def close_gene_info() -> None:
+    with _OPEN_LOCK:
+        for index in _OPEN.values():
+            index.close()
+        _OPEN.clear()
+
+
+def local_gene_record(identifier: str, organism: Union[str, int, None] = None) -> Optional[Dict]:
+    """NCBI Gene record for a symbol/synonym/GeneID from the local gene_info index, if any."""
+    index = get_gene_info()
+    if index is None:
+        return None
+    gene_id = index.gene_id(identifier, organism)
+    return index.record(gene_id) if gene_id is not None else None
+
+
+def local_gene_info_id(identifier: str, organism: Union[str, int, None] = None) -> Optional[str]:
+    """GeneID for a symbol/synonym from the local gene_info index, if any."""
+    index = get_gene_info()
+    gene_id = index.gene_id(identifier, organism) if index is not None else None
+    return str(gene_id) if gene_id is not None else None
+
+
+def download_gene_info(name: str, dest_dir: Union[str, Path], cfg: Optional[HttpConfig] = None) -> Path:
+    """
+    Download ``gene_info.gz`` or a per-organism file (``Mammalia/Homo_sapiens.gene_info.gz``)
+    from the NCBI FTP, resuming partial files; it stays compressed.
+    """
+    url = f"{GENE_INFO_URL}/gene_info.gz" if name == "gene_info.gz" else f"{GENE_INFO_URL}/GENE_INFO/{name}"
+    return download_to_file(url, Path(dest_dir) / Path(name).name, cfg=cfg).path
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build CURIO's offline NCBI gene_info index.")
+    parser.add_argument("source", help="gene_info(.gz) file")
+    parser.add_argument("--index", default=str(DEFAULT_GENE_INFO_PATH), help="SQLite index path")
+    parser.add_argument("--organism", help="organism name for the taxon (e.g. 'Homo sapiens')")
+    parser.add_argument("--taxon", type=int, help="keep only this taxon ID")
+    parser.add_argument("--download", action="store_true",
+                        help="treat source as an NCBI file name and download it next to the index first")
+    args = parser.parse_args(argv)
+    source = download_gene_info(args.source, Path(args.index).parent) if args.download else args.source
+    build_gene_info(source, args.index, taxon=args.taxon, organism=args.organism)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+# curio/http_cache.py
+"""
+Persistent SQLite-backed HTTP response cache for CURIO.
+
+Entries are keyed on method + URL + params + body, expire after a per-upstream
+TTL and keep their ETag/Last-Modified validators so stale entries can be
+revalidated with a conditional request instead of re-downloaded. The file is
+capped in size and trimmed least-recently-used first.
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from . import get_logger
+
+log = get_logger("http_cache")
+
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parent / "cache" / "http_cache.sqlite"
+
+# TTLs (seconds) matched on the longest "host/path" prefix of the request URL.
+DEFAULT_TTLS: Dict[str, int] = {
+    "": 3600,
+    "rest.kegg.jp": 7 * 86400,
+    "data.rcsb.org": 7 * 86400,
+    "files.rcsb.org": 30 * 86400,
+    "search.rcsb.org": 86400,
+    "rest.uniprot.org": 86400,
+    "string-db.org": 7 * 86400,
+    "eutils.ncbi.nlm.nih.gov": 7 * 86400,
+    "eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi": 6 * 3600,
+}
+
+# Requests that create or read E-utilities history-server state: the WebEnv
+# they return or reference expires upstream after a few hours, so a cached copy
+# would hand back a dead session. These are never cached.
+UNCACHEABLE_PATHS = ("eutils.ncbi.nlm.nih.gov/entrez/eutils/epost.fcgi",)
+SESSION_PARAMS = frozenset({"usehistory", "webenv", "query_key"})
+
+# Response headers that describe the transfer rather than the content.
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    method TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    content BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_responses_accessed ON responses(accessed_at);
+"""
+
+
+def make_cache_key(method: str,
+                   url: str,
+                   params: Optional[Union[dict, list]] = None,
+                   data: Any = None,
+                   json_body: Any = None) -> str:
+    """Return a stable hash for a request (method, URL, sorted params, body)."""
+    parts = [method.upper(), url]
+    if params:
+        items = params.items() if isinstance(params, dict) else params
+        parts.append(urlencode(sorted((str(k), str(v)) for k, v in items)))
+    if data is not None:
+        if isinstance(data, dict):
+            parts.append(urlencode(sorted((str(k), str(v)) for k, v in data.items())))
+        else:
+            parts.append(data.decode("utf-8", "replace") if isinstance(data, bytes) else str(data))
+    if json_body is not None:
+        parts.append(json.dumps(json_body, sort_keys=True, separators=(",", ":")))
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def ttl_for_url(url: str, ttls: Optional[Dict[str, int]] = None) -> int:
+    """Return the TTL for ``url`` using the longest matching host/path prefix."""
+    ttls = DEFAULT_TTLS if ttls is None else ttls
+    parts = urlsplit(url)
+    target = f"{parts.netloc.lower()}{parts.path}"
+    best = ""
+    for prefix in ttls:
+        if target.startswith(prefix) and len(prefix) >= len(best):
+            best = prefix
+    return ttls.get(best, DEFAULT_TTLS[""])
+
+
+def _keys(fields: Any) -> set:
+    if isinstance(fields, dict):
+        return {str(k).lower() for k in fields}
+    if isinstance(fields, (list, tuple)):
+        return {str(k).lower() for k, _ in fields}
+    if isinstance(fields, (str, bytes)):
+        text = fields.decode("utf-8", "replace") if isinstance(fields, bytes) else fields
+        return {k.lower() for k, _ in parse_qsl(text)}
+    return set()
+
+
+def is_cacheable(url: str, params: Any = None, data: Any = None) -> bool:
+    """False for epost and for requests carrying history-server parameters (``SESSION_PARAMS``)."""
+    parts = urlsplit(url)
+    if f"{parts.netloc.lower()}{parts.path}".startswith(UNCACHEABLE_PATHS):
+        return False
+    return not (SESSION_PARAMS & (_keys(params) | _keys(data) | _keys(parts.query)))
+
+
+@dataclass
+class CachedResponse:
+    """A stored response body with its metadata."""
+    key: str
+    method: str
+    url: str
+    status: int
+    headers: Dict[str, str]
+    content: bytes
+    stored_at: float
+    expires_at: float
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    @property
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers derived from ETag/Last-Modified."""
+        out: Dict[str, str] = {}
+        lowered = {k.lower(): v for k, v in self.headers.items()}
+        if "etag" in lowered:
+            out["If-None-Match"] = lowered["etag"]
+        if "last-modified" in lowered:
+            out["If-Modified-Since"] = lowered["last-modified"]
+        return out
+
+
+class ResponseCache:
+    """SQLite response store with TTL expiry, LRU size cap and hit/miss counters.
+
+    Safe to share between threads; separate processes may open the same file.
+    """
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_CACHE_PATH,
+                 max_bytes: int = 256 * 1024 * 1024) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.stale = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Return the entry for ``key`` (fresh or stale) and mark it recently used."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT key, method, url, status, headers, content, stored_at, expires_at "
+                "FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return CachedResponse(
+            key=row[0], method=row[1], url=row[2], status=row[3],
+            headers=json.loads(row[4]), content=bytes(row[5]),
+            stored_at=row[6], expires_at=row[7],
+        )
+
+    def put(self, key: str, method: str, url: str, status: int,
+            headers: Dict[str, str], content: bytes, ttl: float) -> None:
+        """Store a response, then evict least-recently-used entries over the cap."""
+        now = time.time()
+        kept = {k: v for k, v in headers.items() if k.lower() not in _DROP_HEADERS}
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, method, url, status, headers, content, size, stored_at, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, method.upper(), url, status, json.dumps(kept), sqlite3.Binary(content),
+                 len(content), now, now + ttl, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def refresh(self, key: str, ttl: float, headers: Optional[Dict[str, str]] = None) -> None:
+        """Extend an entry after a 304 Not Modified, merging any new validators."""
+        now = time.time()
+        with self._lock:
+            if headers:
+                row = self._conn.execute("SELECT headers FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    merged = json.loads(row[0])
+                    merged.update({k: v for k, v in headers.items()
+                                   if k.lower() in ("etag", "last-modified", "cache-control", "expires")})
+                    self._conn.execute("UPDATE responses SET headers = ? WHERE key = ?",
+                                       (json.dumps(merged), key))
+            self._conn.execute(
+                "UPDATE responses SET expires_at = ?, accessed_at = ? WHERE key = ?",
+                (now + ttl, now, key),
+            )
+            self._conn.commit()
+
+    def note(self, outcome: str) -> None:
+        """Count a lookup outcome: "hit", "miss", "revalidated" (a 304 served from cache)
+        or "stale" (an expired entry served while the host's circuit is open)."""
+        with self._lock:
+            if outcome == "miss":
+                self.misses += 1
+            else:
+                self.hits += 1
+                if outcome == "revalidated":
+                    self.revalidated += 1
+                elif outcome == "stale":
+                    self.stale += 1
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at ASC").fetchall():
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+        log.debug("HTTP cache trimmed to %d bytes", total)
+
+    def clear(self) -> None:
+        """Delete every entry and reset the counters."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self.hits = self.misses = self.revalidated = self.stale = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters plus entry count and stored bytes."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "path": str(self.path),
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "stale": self.stale,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,394 @@
+# curio/id_index.py
+"""
+Offline identifier index built from UniProt ID-mapping files.
+
+``build_index`` streams ``<ORG>_<taxon>_idmapping.dat.gz`` (symbols,
+synonyms, GeneID, RefSeq, PDB, STRING, Ensembl) or
+``idmapping_selected.tab.gz`` (no symbols) through gzip into a compact
+SQLite table, per organism. Lookups then resolve gene symbols and foreign
+IDs to UniProt accessions, and accessions to GeneIDs or PDB IDs, locally, so
+the source modules only go to the network for the entry itself. When no
+index file exists every helper returns None and callers fall back to the
+network as before.
+
+Build one with::
+
+    python -m curio.id_index --download HUMAN_9606_idmapping.dat.gz --organism "Homo sapiens"
+"""
+
+from __future__ import annotations
+import argparse
+import gzip
+import io
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from . import get_logger
+from .net_utils import HttpConfig, download_to_file
+
+log = get_logger("id_index")
+
+DEFAULT_INDEX_PATH = Path(os.environ.get("CURIO_ID_INDEX") or
+                          Path(__file__).resolve().parent / "cache" / "id_index.sqlite")
+
+IDMAPPING_URL = "https://ftp.uniprot.org/pub/databases/uniprot/current_release/knowledgebase/idmapping"
+
+# ID types kept from *_idmapping.dat(.gz), mapped to index kinds
+DAT_KINDS: Dict[str, str] = {
+    "Gene_Name": "symbol",
+    "Gene_Synonym": "synonym",
+    "GeneID": "geneid",
+    "RefSeq": "refseq",
+    "PDB": "pdb",
+    "STRING": "string",
+    "Ensembl": "ensembl",
+    "UniProtKB-ID": "uniprot_id",
+}
+
+# 0-based columns of idmapping_selected.tab(.gz) kept in the index
+SELECTED_COLUMNS: Dict[int, str] = {1: "uniprot_id", 2: "geneid", 3: "refseq", 5: "pdb", 18: "ensembl"}
+SELECTED_TAXON_COLUMN = 12
+
+# Lookup preference when an identifier matches several kinds
+_KIND_RANK = {"symbol": 0, "uniprot_id": 0, "geneid": 1, "refseq": 1, "pdb": 1, "string": 1,
+              "ensembl": 1, "synonym": 2}
+
+# Organism names used by the dashboard, for index files that carry no names
+KNOWN_TAXA: Dict[str, int] = {
+    "homo sapiens": 9606,
+    "mus musculus": 10090,
+    "rattus norvegicus": 10116,
+    "danio rerio": 7955,
+    "drosophila melanogaster": 7227,
+    "caenorhabditis elegans": 6239,
+    "saccharomyces cerevisiae": 559292,
+    "arabidopsis thaliana": 3702,
+    "escherichia coli": 83333,
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS xref (
+    key       TEXT    NOT NULL,
+    kind      TEXT    NOT NULL,
+    taxon     INTEGER NOT NULL,
+    accession TEXT    NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entry (
+    accession TEXT PRIMARY KEY,
+    taxon     INTEGER NOT NULL,
+    reviewed  INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS organism (
+    name  TEXT PRIMARY KEY,
+    taxon INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS xref_key ON xref (key, taxon);
+CREATE INDEX IF NOT EXISTS xref_accession ON xref (accession, kind);
+"""
+
+_ISOFORM = re.compile(r"-\d+$")
+_VERSION = re.compile(r"\.\d+$")
+_TAXON_IN_NAME = re.compile(r"_(\d+)_idmapping")
+
+BATCH_ROWS = 50_000
+
+
+def _normalise(kind: str, value: str) -> str:
+    value = value.strip().upper()
+    return _VERSION.sub("", value) if kind == "refseq" else value
+
+
+def open_text(path: Union[str, Path]) -> io.TextIOBase:
+    """
+    Open a plain or gzip-compressed text file for streaming reads. Multi-member
+    gzip files, and so bgzip (BGZF) ones, read through to the end.
+    """
+    with open(path, "rb") as fh:
+        gzipped = fh.read(2) == b"\x1f\x8b"
+    return gzip.open(path, "rt", encoding="utf-8") if gzipped else open(path, encoding="utf-8")
+
+
+def _dat_rows(fh: io.TextIOBase) -> Iterator[Tuple[str, str, str]]:
+    for line in fh:
+        acc, id_type, value = line.rstrip("\n").split("\t", 2)
+        kind = DAT_KINDS.get(id_type)
+        if kind:
+            yield _ISOFORM.sub("", acc), kind, value
+
+
+def _selected_rows(fh: io.TextIOBase) -> Iterator[Tuple[str, str, str, int]]:
+    for line in fh:
+        cols = line.rstrip("\n").split("\t")
+        taxon = int(cols[SELECTED_TAXON_COLUMN]) if len(cols) > SELECTED_TAXON_COLUMN and \
+            cols[SELECTED_TAXON_COLUMN].isdigit() else 0
+        for col, kind in SELECTED_COLUMNS.items():
+            if col < len(cols) and cols[col]:
+                for value in cols[col].split(";"):
+                    yield cols[0], kind, value, taxon
+
+
+def build_index(source: Union[str, Path],
+                path: Union[str, Path] = DEFAULT_INDEX_PATH,
+                organism: Optional[str] = None,
+                taxon: Optional[int] = None) -> int:
+    """
+    Add one ID-mapping file to the index at ``path`` and return the rows written.
+
+    ``.dat`` files cover a single organism: ``taxon`` defaults to the one in
+    the file name (``HUMAN_9606_idmapping.dat.gz``). ``idmapping_selected``
+    files carry the taxon per row. Re-building from a ``.dat`` file replaces
+    that organism's rows; an ``idmapping_selected`` file replaces the
+    cross-references it carries for every accession it lists, so loading the
+    same file twice does not duplicate them. ``organism`` registers a name for
+    ``taxon`` lookups.
+
+    The index is built in a copy next to ``path`` that atomically replaces it
+    when done; readers keep using the old file meanwhile and a failed build
+    leaves it untouched.
+    """
+    source = Path(source)
+    path = Path(path)
+    selected = "selected" in source.name
+    if not selected and taxon is None:
+        match = _TAXON_IN_NAME.search(source.name)
+        if not match:
+            raise ValueError(f"Cannot infer the taxon from {source.name}; pass taxon=")
+        taxon = int(match.group(1))
+    if taxon is None and organism:
+        taxon = KNOWN_TAXA.get(organism.strip().lower())
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, name = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".building")
+    os.close(fd)
+    building = Path(name)
+    try:
+        if path.exists():
+            _copy_index(path, building)
+        written = _load(source, building, selected, organism, taxon)
+        os.replace(building, path)
+    except BaseException:
+        building.unlink(missing_ok=True)
+        raise
+    # Later get_index() calls open the new file; handles already given out keep reading the old one
+    with _OPEN_LOCK:
+        _INDEXES_OPEN.pop(str(path), None)
+    log.info("Indexed %d identifiers from %s into %s", written, source.name, path)
+    return written
+
+
+def _copy_index(path: Path, dest: Path) -> None:
+    src = sqlite3.connect(path.resolve().as_uri() + "?mode=ro", uri=True)
+    dst = sqlite3.connect(str(dest))
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+
+def _load(source: Path, path: Path, selected: bool, organism: Optional[str], taxon: Optional[int]) -> int:
+    conn = sqlite3.connect(str(path))
+    written = 0
+    try:
+        # Private copy: no journal needed, a failed build is simply discarded
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.executescript(_SCHEMA)
+        # Indexes are rebuilt after the bulk load, which is much faster than maintaining them
+        conn.executescript("DROP INDEX IF EXISTS xref_key; DROP INDEX IF EXISTS xref_accession;")
+        if taxon is not None and not selected:
+            conn.execute("DELETE FROM xref WHERE taxon = ?", (taxon,))
+            conn.execute("DELETE FROM entry WHERE taxon = ?", (taxon,))
+        if organism and taxon is not None:
+            conn.execute("INSERT OR REPLACE INTO organism VALUES (?, ?)", (organism.strip().lower(), taxon))
+        # idmapping_selected rows are staged first so earlier rows for the same accessions can be dropped
+        table = "staged" if selected else "xref"
+        if selected:
+            conn.execute("CREATE TEMP TABLE staged (key TEXT, kind TEXT, taxon INTEGER, accession TEXT)")
+
+        xrefs: List[Tuple[str, str, int, str]] = []
+        entries: List[Tuple[str, int, int]] = []
+        with open_text(source) as fh:
+            rows = _selected_rows(fh) if selected else ((a, k, v, taxon) for a, k, v in _dat_rows(fh))
+            for acc, kind, value, row_taxon in rows:
+                if kind == "uniprot_id":
+                    # TrEMBL mnemonics are "<accession>_<SPECIES>"; Swiss-Prot ones are not
+                    entries.append((acc, row_taxon, int(not value.startswith(acc + "_"))))
+                xrefs.append((_normalise(kind, value), kind, row_taxon, acc))
+                if len(xrefs) >= BATCH_ROWS:
+                    written += _flush(conn, xrefs, entries, table)
+        written += _flush(conn, xrefs, entries, table)
+        if selected:
+            kinds = sorted(set(SELECTED_COLUMNS.values()))
+            conn.executescript("CREATE TEMP TABLE staged_accession (accession TEXT PRIMARY KEY) WITHOUT ROWID;"
+                               "INSERT OR IGNORE INTO staged_accession SELECT accession FROM staged;")
+            conn.execute(f"DELETE FROM xref WHERE kind IN ({', '.join('?' * len(kinds))}) "
+                         "AND accession IN (SELECT accession FROM staged_accession)", kinds)
+            conn.execute("INSERT INTO xref SELECT * FROM staged")
+        conn.executescript(_INDEXES)
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+    return written
+
+
+def _flush(conn: sqlite3.Connection, xrefs: List, entries: List, table: str = "xref") -> int:
+    n = len(xrefs)
+    conn.executemany(f"INSERT INTO {table} VALUES (?, ?, ?, ?)", xrefs)
+    conn.executemany("INSERT OR REPLACE INTO entry VALUES (?, ?, ?)", entries)
+    xrefs.clear()
+    entries.clear()
+    return n
+
+
+class IdIndex:
+    """Read-only lookups against an index built by ``build_index``. Thread-safe."""
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_INDEX_PATH) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path.resolve().as_uri() + "?mode=ro", uri=True,
+                                     check_same_thread=False)
+        self._taxa: Dict[str, Optional[int]] = {}
+
+    def taxon_for(self, organism: Union[str, int, None]) -> Optional[int]:
+        """Taxon ID for an organism name (or pass-through for an int / numeric string)."""
+        if organism is None or isinstance(organism, int):
+            return organism
+        name = organism.strip().lower()
+        if name.isdigit():
+            return int(name)
+        if name not in self._taxa:
+            with self._lock:
+                row = self._conn.execute("SELECT taxon FROM organism WHERE name = ?", (name,)).fetchone()
+            self._taxa[name] = row[0] if row else KNOWN_TAXA.get(name)
+        return self._taxa[name]
+
+    def accessions(self, identifier: str, organism: Union[str, int, None] = None,
+                   kinds: Optional[Sequence[str]] = None) -> List[str]:
+        """
+        Accessions for a symbol/synonym/foreign ID, best first: symbol matches
+        before synonyms, Swiss-Prot before TrEMBL. An organism the index cannot
+        map to a taxon matches nothing, so the caller falls back to the API.
+        """
+        key = identifier.strip().upper()
+        taxon = self.taxon_for(organism)
+        if taxon is None and organism is not None:
+            return []
+        sql = ("SELECT x.accession, x.kind, COALESCE(e.reviewed, 0) FROM xref x "
+               "LEFT JOIN entry e ON e.accession = x.accession WHERE x.key IN (?, ?)")
+        args: List = [key, _VERSION.sub("", key)]
+        if taxon is not None:
+            sql += " AND x.taxon = ?"
+            args.append(taxon)
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        if kinds:
+            rows = [r for r in rows if r[1] in kinds]
+        rows.sort(key=lambda r: (_KIND_RANK.get(r[1], 1), -r[2], r[0]))
+        return list(dict.fromkeys(r[0] for r in rows))
+
+    def accession(self, identifier: str, organism: Union[str, int, None] = None) -> Optional[str]:
+        """Best accession for ``identifier`` or None."""
+        found = self.accessions(identifier, organism)
+        return found[0] if found else None
+
+    def xrefs(self, accession: str, kind: str) -> List[str]:
+        """Identifiers of ``kind`` ("geneid", "pdb", "refseq", ...) linked to ``accession``."""
+        with self._lock:
+            rows = self._conn.execute("SELECT key FROM xref WHERE accession = ? AND kind = ?",
+                                      (accession.upper(), kind)).fetchall()
+        return list(dict.fromkeys(r[0] for r in rows))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT kind, COUNT(*) FROM xref GROUP BY kind").fetchall()
+        return dict(rows)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_INDEXES_OPEN: Dict[str, IdIndex] = {}
+_OPEN_LOCK = threading.Lock()
+
+
+def get_index(path: Union[str, Path, None] = None) -> Optional[IdIndex]:
+    """Shared ``IdIndex`` for ``path`` (default ``DEFAULT_INDEX_PATH``), or None if not built."""
+    path = Path(path or DEFAULT_INDEX_PATH)
+    with _OPEN_LOCK:
+        index = _INDEXES_OPEN.get(str(path))
+        if index is None:
+            if not path.exists():
+                return None
+            index = _INDEXES_OPEN[str(path)] = IdIndex(path)
+        return index
+
+
+def close_indexes() -> None:
+    with _OPEN_LOCK:
+        for index in _INDEXES_OPEN.values():
+            index.close()
+        _INDEXES_OPEN.clear()
+
+
+def local_accession(identifier: str, organism: Union[str, int, None] = None) -> Optional[str]:
+    """Best UniProt accession for a gene symbol or foreign ID from the local index, if any."""
+    index = get_index()
+    return index.accession(identifier, organism) if index is not None else None
+
+
+def local_gene_id(identifier: str, organism: Union[str, int, None] = None) -> Optional[str]:
+    """NCBI GeneID for a gene symbol/accession from the local index, if any."""
+    index = get_index()
+    if index is None:
+        return None
+    accession = index.accession(identifier, organism)
+    gene_ids = index.xrefs(accession, "geneid") if accession else []
+    return gene_ids[0] if gene_ids else None
+
+
+def local_pdb_ids(accession: str) -> List[str]:
+    """PDB IDs cross-referenced from ``accession`` in the local index (empty if unknown)."""
+    index = get_index()
+    return index.xrefs(accession, "pdb") if index is not None else []
+
+
+def download_idmapping(name: str, dest_dir: Union[str, Path],
+                       cfg: Optional[HttpConfig] = None) -> Path:
+    """
+    Download an ID-mapping file (e.g. ``HUMAN_9606_idmapping.dat.gz`` or
+    ``idmapping_selected.tab.gz``) from the UniProt FTP, resuming partial files.
+    The file is kept compressed; ``build_index`` decompresses it as it reads.
+    """
+    url = f"{IDMAPPING_URL}/{name}" if "selected" in name else f"{IDMAPPING_URL}/by_organism/{name}"
+    return download_to_file(url, Path(dest_dir) / name, cfg=cfg).path
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build CURIO's offline identifier index.")
+    parser.add_argument("sources", nargs="+", help="*_idmapping.dat.gz or idmapping_selected.tab.gz files")
+    parser.add_argument("--index", default=str(DEFAULT_INDEX_PATH), help="SQLite index path")
+    parser.add_argument("--organism", help="organism name for the taxon (e.g. 'Homo sapiens')")
+    parser.add_argument("--taxon", type=int, help="taxon ID when it is not in the file name")
+    parser.add_argument("--download", action="store_true",
+                        help="treat sources as UniProt file names and download them next to the index first")
+    args = parser.parse_args(argv)
+    for source in args.sources:
+        if args.download:
+            source = download_idmapping(source, Path(args.index).parent)
+        build_index(source, args.index, organism=args.organism, taxon=args.taxon)
+
+
+if __name__ == "__main__":
+    main()
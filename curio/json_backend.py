@@ -0,0 +1,65 @@
+# curio/json_backend.py
+"""
+Pluggable JSON decoding for CURIO HTTP responses.
+
+``orjson`` is used when it is installed (it parses the large UniProt,
+E-utilities and RCSB payloads several times faster than the standard
+library); otherwise decoding falls back to ``json``. Backends can be
+switched at runtime with ``set_backend``.
+"""
+
+from __future__ import annotations
+import json
+from typing import Any, Callable, Dict, List, Union
+
+from . import get_logger
+
+log = get_logger("json_backend")
+
+
+def _stdlib_loads(data: Union[bytes, str]) -> Any:
+    return json.loads(data)
+
+
+_BACKENDS: Dict[str, Callable[[Union[bytes, str]], Any]] = {"stdlib": _stdlib_loads}
+
+try:
+    import orjson
+
+    _BACKENDS["orjson"] = orjson.loads
+except ImportError:  # optional dependency
+    pass
+
+try:
+    import ujson
+
+    _BACKENDS["ujson"] = ujson.loads
+except ImportError:  # optional dependency
+    pass
+
+_PREFERENCE = ("orjson", "ujson", "stdlib")
+_active = next(name for name in _PREFERENCE if name in _BACKENDS)
+
+
+def available_backends() -> List[str]:
+    """Names of the JSON backends importable in this environment, fastest first."""
+    return [name for name in _PREFERENCE if name in _BACKENDS]
+
+
+def get_backend() -> str:
+    """Name of the backend currently used by ``loads``."""
+    return _active
+
+
+def set_backend(name: str) -> None:
+    """Select the backend used by ``loads`` ("orjson", "ujson" or "stdlib")."""
+    global _active
+    if name not in _BACKENDS:
+        raise ValueError(f"JSON backend '{name}' is not available (have: {', '.join(available_backends())})")
+    _active = name
+    log.debug("JSON backend set to %s", name)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode a JSON document (bytes are assumed to be UTF-8) with the active backend."""
+    return _BACKENDS[_active](data)
@@ -1,83 +1,481 @@
 # curio/ncbi_api.py
+import logging
+import re
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
 import requests
-from typing import Dict, List, Optional
+
+from .gene_info import local_gene_info_id, local_gene_record
+from .id_index import local_gene_id
+from .net_utils import HttpConfig, decode_json, download_to_file, iter_lines, request
+from .seq_store import get_store, record_name
+
+log = logging.getLogger(__name__)
 
 NCBI_BASE = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
 
 HEADERS = {"User-Agent": "CURIO_Dashboard/1.0"}
 
-def _esearch(identifier: str, db: str, organism: str = "Homo sapiens") -> Optional[str]:
-    """Search NCBI and return the first UID (ID)."""
+# Identifiers OR-ed into one esearch term (sent as POST, so no URL length limit)
+ESEARCH_CHUNK_SIZE = 200
+# UIDs per esummary call / history-server page (E-utilities recommend <= 500)
+ESUMMARY_CHUNK_SIZE = 500
+# Records per efetch request (POSTed; E-utilities suggest <= 200 for sequences)
+EFETCH_CHUNK_SIZE = 200
+# Search field that matches an identifier exactly, per database
+BATCH_FIELDS = {"gene": "sym", "protein": "accn", "nucleotide": "accn"}
+# efetch rettype per sequence output
+RETTYPES = {"fasta": "fasta", "txt": "gb"}
+
+# Identifier kinds (see classify_identifier)
+PROTEIN = "protein"
+NUCLEOTIDE = "nucleotide"
+UID = "uid"  # GeneID in db=gene, PMID in db=pubmed, GI in the sequence databases
+TEXT = "text"
+
+REFSEQ_RE = re.compile(r"^(?P<prefix>[A-Z]{2})_\d+(?:\.\d+)?$")
+REFSEQ_PROTEIN_PREFIXES = {"AP", "NP", "WP", "XP", "YP"}
+REFSEQ_NUCLEOTIDE_PREFIXES = {"AC", "NC", "NG", "NM", "NR", "NT", "NW", "NZ", "XM", "XR"}
+GENBANK_PROTEIN_RE = re.compile(r"^[A-Z]{3}\d{5}(?:\d{2})?(?:\.\d+)?$")
+GENBANK_NUCLEOTIDE_RE = re.compile(
+    r"^(?:[A-Z]\d{5}|[A-Z]{2}\d{6}(?:\d{2})?|[A-Z]{4}\d{8,10}|[A-Z]{6}\d{9,11})(?:\.\d+)?$")
+UID_RE = re.compile(r"^\d+$")
+
+# Free-text (symbol) -> UID resolutions kept per process
+SEARCH_CACHE_SIZE = 4096
+_SEARCHES: "OrderedDict[Tuple[str, str, str], str]" = OrderedDict()
+_SEARCHES_LOCK = threading.Lock()
+
+
+def classify_identifier(identifier: str) -> str:
+    """
+    Kind of an NCBI identifier: PROTEIN or NUCLEOTIDE (RefSeq/GenBank accession,
+    optionally versioned), UID (all digits: GeneID, PMID, GI) or TEXT (symbol, free text).
+    """
+    ident = identifier.strip().upper()
+    m = REFSEQ_RE.match(ident)
+    if m and m.group("prefix") in REFSEQ_PROTEIN_PREFIXES:
+        return PROTEIN
+    if m and m.group("prefix") in REFSEQ_NUCLEOTIDE_PREFIXES:
+        return NUCLEOTIDE
+    if GENBANK_PROTEIN_RE.match(ident):
+        return PROTEIN
+    if GENBANK_NUCLEOTIDE_RE.match(ident):
+        return NUCLEOTIDE
+    if UID_RE.match(ident):
+        return UID
+    return TEXT
+
+
+def direct_id(identifier: str, db: str) -> Optional[str]:
+    """``identifier`` as an ``id=`` value for ``db`` when it needs no esearch, else None."""
+    kind = classify_identifier(identifier)
+    if kind == UID or kind == db:
+        return identifier.strip().upper()
+    return None
+
+
+def clear_search_cache() -> None:
+    with _SEARCHES_LOCK:
+        _SEARCHES.clear()
+
+
+def eutils_params(cfg: Optional[HttpConfig] = None, **params) -> Dict[str, str]:
+    """E-utilities query parameters plus the ``tool``/``email``/``api_key`` from ``cfg``."""
+    cfg = cfg or HttpConfig()
+    out = {"tool": cfg.ncbi_tool, **params}
+    if cfg.ncbi_email:
+        out["email"] = cfg.ncbi_email
+    if cfg.ncbi_api_key:
+        out["api_key"] = cfg.ncbi_api_key
+    return out
+
+
+def _eutil(name: str, params: Dict, cfg: Optional[HttpConfig] = None, post: bool = False) -> requests.Response:
+    """Call ``<name>.fcgi``; ``post`` sends the parameters as a form body (long ID lists/terms)."""
+    url = f"{NCBI_BASE}{name}.fcgi"
+    params = eutils_params(cfg, **params)
+    if post:
+        resp = request("POST", url, data=params, headers=HEADERS, cfg=cfg)
+    else:
+        resp = request("GET", url, params=params, headers=HEADERS, cfg=cfg)
+    resp.raise_for_status()
+    return resp
+
+
+def _esearch(identifier: str, db: str, organism: str = "Homo sapiens",
+             cfg: Optional[HttpConfig] = None) -> Optional[str]:
+    """Search NCBI and return the first UID (ID).
+    Accessions and numeric UIDs (see ``direct_id``) are returned as-is, gene symbols in the
+    local gene_info (curio.gene_info) or ID-mapping (curio.id_index) index resolve to a GeneID,
+    and free-text hits are cached."""
+    direct = direct_id(identifier, db)
+    if direct:
+        return direct
+    if db == "gene":
+        gene_id = local_gene_info_id(identifier, organism) or local_gene_id(identifier, organism)
+        if gene_id:
+            return gene_id
+    key = (identifier.strip().upper(), db, organism)
+    with _SEARCHES_LOCK:
+        if key in _SEARCHES:
+            _SEARCHES.move_to_end(key)
+            return _SEARCHES[key]
     query = f"{identifier}[All Fields] AND {organism}[Organism]"
-    url = f"{NCBI_BASE}esearch.fcgi?db={db}&term={query}&retmode=json"
-    resp = requests.get(url, headers=HEADERS, timeout=20)
+    params = eutils_params(cfg, db=db, term=query, retmode="json")
+    resp = request("GET", f"{NCBI_BASE}esearch.fcgi", params=params, headers=HEADERS, cfg=cfg)
     if resp.status_code != 200:
         return None
-    data = resp.json()
+    data = decode_json(resp)
     ids = data.get("esearchresult", {}).get("idlist", [])
-    return ids[0] if ids else None
+    if not ids:
+        return None
+    with _SEARCHES_LOCK:
+        _SEARCHES[key] = ids[0]
+        while len(_SEARCHES) > SEARCH_CACHE_SIZE:
+            _SEARCHES.popitem(last=False)
+    return ids[0]
 
 
-def _esummary(uid: str, db: str) -> Dict:
-    """Fetch summary info for a UID."""
-    url = f"{NCBI_BASE}esummary.fcgi?db={db}&id={uid}&retmode=json"
-    resp = requests.get(url, headers=HEADERS, timeout=20)
-    resp.raise_for_status()
-    return resp.json().get("result", {}).get(uid, {})
+def _esummary(uid: str, db: str, cfg: Optional[HttpConfig] = None) -> Dict:
+    """Fetch summary info for a UID (or accession, whose document is keyed by its GI)."""
+    result = decode_json(_eutil("esummary", {"db": db, "id": uid, "retmode": "json"}, cfg=cfg)).get("result", {})
+    uids = result.get("uids") or [uid]
+    return result.get(uid) or result.get(uids[0], {})
 
 
-def _efetch(uid: str, db: str, rettype: str) -> str:
+def _efetch(uid: str, db: str, rettype: str, cfg: Optional[HttpConfig] = None) -> str:
     """Fetch raw data (FASTA, GenBank, etc.)."""
-    url = f"{NCBI_BASE}efetch.fcgi?db={db}&id={uid}&rettype={rettype}&retmode=text"
-    resp = requests.get(url, headers=HEADERS, timeout=30)
+    params = eutils_params(cfg, db=db, id=uid, rettype=rettype, retmode="text")
+    resp = request("GET", f"{NCBI_BASE}efetch.fcgi", params=params, headers=HEADERS, cfg=cfg, timeout=30)
     resp.raise_for_status()
     return resp.text
 
 
-def fetch_ncbi_entry(identifier: str, db: str = "gene", organism: str = "Homo sapiens", output: str = "json"):
+# History server (WebEnv/query_key) batches
+
+def _search_history(term: str, db: str, cfg: Optional[HttpConfig] = None) -> Tuple[str, str, int]:
+    """esearch ``term`` into the history server; returns (WebEnv, query_key, count)."""
+    params = {"db": db, "term": term, "usehistory": "y", "retmax": 0, "retmode": "json"}
+    result = decode_json(_eutil("esearch", params, cfg=cfg, post=True)).get("esearchresult", {})
+    return result.get("webenv", ""), result.get("querykey", ""), int(result.get("count") or 0)
+
+
+def _epost(uids: List[str], db: str, cfg: Optional[HttpConfig] = None) -> Tuple[str, str]:
+    """Upload UIDs to the history server; returns (WebEnv, query_key). epost only answers in XML."""
+    root = ET.fromstring(_eutil("epost", {"db": db, "id": ",".join(uids)}, cfg=cfg, post=True).content)
+    return root.findtext("WebEnv", ""), root.findtext("QueryKey", "")
+
+
+def _history_summaries(db: str, webenv: str, query_key: str, count: int,
+                       cfg: Optional[HttpConfig] = None) -> Iterator[Dict]:
+    """Yield esummary documents of a history-server set, ESUMMARY_CHUNK_SIZE per request."""
+    for start in range(0, count, ESUMMARY_CHUNK_SIZE):
+        params = {"db": db, "WebEnv": webenv, "query_key": query_key,
+                  "retstart": start, "retmax": ESUMMARY_CHUNK_SIZE, "retmode": "json"}
+        result = decode_json(_eutil("esummary", params, cfg=cfg)).get("result", {})
+        for uid in result.get("uids", []):
+            yield {"uid": uid, **result.get(uid, {})}
+
+
+def _batch_term(chunk: List[str], db: str, organism: str) -> str:
+    """OR-ed exact-match esearch term for a chunk of symbols/accessions."""
+    term = "(" + " OR ".join(f'"{i}"[{BATCH_FIELDS[db]}]' for i in chunk) + ")"
+    if db == "gene":
+        term += f' AND "{organism}"[Organism]'
+    return term
+
+
+def _efetch_lines(params: Dict, cfg: Optional[HttpConfig] = None) -> Iterator[str]:
+    """Stream an efetch body line by line; POST keeps long ID lists out of the URL."""
+    return iter_lines(f"{NCBI_BASE}efetch.fcgi", method="POST", data=eutils_params(cfg, **params), cfg=cfg)
+
+
+def iter_records(lines: Iterable[str], output: str = "fasta") -> Iterator[str]:
+    """Split streamed efetch text into records: FASTA on ``>`` headers, GenBank on ``//`` terminators."""
+    record: List[str] = []
+    for line in lines:
+        if output == "fasta":
+            if line.startswith(">") and record:
+                yield "\n".join(record) + "\n"
+                record = []
+            if line.strip():
+                record.append(line)
+        else:
+            if line.strip() or record:  # skip blank lines between records
+                record.append(line)
+            if line.rstrip() == "//":
+                yield "\n".join(record) + "\n"
+                record = []
+    if any(line.strip() for line in record):
+        yield "\n".join(record) + "\n"
+
+
+def record_accession(record: str, output: str = "fasta") -> str:
+    """Accession.version of a FASTA or GenBank record ("" if none)."""
+    if output == "fasta":
+        return record_name(record.split("\n", 1)[0])
+    for line in record.splitlines():
+        if line.startswith("VERSION"):
+            words = line.split()
+            return words[1] if len(words) > 1 else ""
+        if line.startswith("FEATURES"):
+            break
+    return ""
+
+
+def iter_ncbi_records(identifiers: List[str], db: str = "protein", organism: str = "Homo sapiens",
+                      output: str = "fasta", cfg: Optional[HttpConfig] = None,
+                      dest: Optional[Union[str, Path]] = None) -> Iterator[Tuple[str, str]]:
+    """
+    Stream protein/nucleotide FASTA (``output="fasta"``) or GenBank (``"txt"``)
+    records for many accessions.
+
+    Accessions of ``db``'s kind (see ``classify_identifier``) are efetch-ed
+    directly as ``id=`` lists; anything else is OR-ed into chunked ``[accn]``
+    esearch terms on the history server. Either way EFETCH_CHUNK_SIZE records
+    come per POST request and the body is split into records as it streams. Yields ``(identifier, record)`` in
+    arrival order, appending each record to ``dest`` when given. Identifiers
+    no record matched are not yielded.
+    """
+    if db not in ("protein", "nucleotide"):
+        raise ValueError(f"Batched efetch supports protein/nucleotide, not '{db}'")
+    stripped = list(dict.fromkeys(i.strip() for i in identifiers if i.strip()))
+    wanted: Dict[str, List[str]] = {}
+    for ident in stripped:
+        wanted.setdefault(ident.upper(), []).append(ident)
+
+    listed = [i for i in stripped if classify_identifier(i) == db]
+    searched = [i for i in stripped if classify_identifier(i) != db]
+    batches = [("id", chunk) for chunk in _chunks(listed, EFETCH_CHUNK_SIZE)]
+    batches += [("esearch", chunk) for chunk in _chunks(searched, ESEARCH_CHUNK_SIZE)]
+
+    def _requests(how: str, chunk: List[str]) -> Iterator[Dict]:
+        base = {"db": db, "rettype": RETTYPES[output], "retmode": "text"}
+        if how == "id":
+            yield {**base, "id": ",".join(i.upper() for i in chunk)}
+            return
+        webenv, query_key, count = _search_history(_batch_term(chunk, db, organism), db, cfg=cfg)
+        for start in range(0, count, EFETCH_CHUNK_SIZE):
+            yield {**base, "WebEnv": webenv, "query_key": query_key, "retstart": start, "retmax": EFETCH_CHUNK_SIZE}
+
+    out = open(dest, "w", encoding="utf-8") if dest else None
+    try:
+        for how, chunk in batches:
+            try:
+                for params in _requests(how, chunk):
+                    for record in iter_records(_efetch_lines(params, cfg=cfg), output):
+                        if out is not None:
+                            out.write(record)
+                        acc = record_accession(record, output).upper()
+                        for ident in wanted.pop(acc, []) + wanted.pop(acc.split(".")[0], []):
+                            yield ident, record
+            except (requests.exceptions.RequestException, ValueError) as e:
+                log.warning("NCBI %s efetch (%s) batch of %d failed: %s", output, how, len(chunk), e)
+    finally:
+        if out is not None:
+            out.close()
+
+
+def _id_summaries(ids: List[str], db: str, cfg: Optional[HttpConfig] = None) -> Iterator[Dict]:
+    """Yield esummary documents for UIDs/accessions passed directly as ``id=`` (POST)."""
+    params = {"db": db, "id": ",".join(ids), "retmode": "json"}
+    result = decode_json(_eutil("esummary", params, cfg=cfg, post=True)).get("result", {})
+    for uid in result.get("uids", []):
+        yield {"uid": uid, **result.get(uid, {})}
+
+
+def _summary_record(summary: Dict, uid: str, db: str) -> Dict:
+    """Output record of ``fetch_ncbi_entry(..., output="json")`` for an esummary document."""
+    if db == "gene":
+        return {
+            "Gene ID": summary.get("uid", uid),
+            "Symbol": summary.get("name"),
+            "Description": summary.get("description"),
+            "Organism": summary.get("organism", {}).get("scientificname"),
+            "Chromosome": summary.get("chromosome"),
+            "Map Location": summary.get("maplocation"),
+            "Other Designations": summary.get("otherdesignations", []),
+        }
+    # proteins/nucleotide: minimal metadata
+    return {
+        "ID": summary.get("uid", uid),
+        "Title": summary.get("title"),
+        "Length": summary.get("slen"),
+        "Molecule Type": summary.get("moltype"),
+    }
+
+
+def _summary_keys(summary: Dict, db: str) -> Tuple[List[str], List[str]]:
+    """(exact keys, alias keys) an esummary document answers to, upper-cased."""
+    if db == "gene":
+        if str(summary.get("status", "0")) != "0":  # discontinued/replaced records
+            return [], []
+        aliases = [a.strip() for a in (summary.get("otheraliases") or "").split(",") if a.strip()]
+        return [str(summary.get("name") or "").upper()], [a.upper() for a in aliases]
+    version = str(summary.get("accessionversion") or "").upper()
+    return [version, str(summary.get("caption") or "").upper()], [version.split(".")[0]]
+
+
+def _chunks(items: List[str], size: int) -> Iterator[List[str]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def fetch_ncbi_summaries(identifiers: List[str], db: str = "gene", organism: str = "Homo sapiens",
+                         cfg: Optional[HttpConfig] = None) -> Dict[str, Optional[Dict]]:
+    """
+    Batch ``fetch_ncbi_entry(..., output="json")`` through the E-utilities history server.
+
+    Genes the local gene_info index knows are answered from it. GeneIDs, and gene symbols with a GeneID in the local index, are epost-ed;
+    accessions go straight to esummary as ``id=`` lists; the rest are OR-ed
+    into chunked ``[sym]``/``[accn]`` esearch terms. Summaries come back
+    ESUMMARY_CHUNK_SIZE per request and are mapped to the inputs by symbol
+    (then alias) or accession. Identifiers no exact search matched fall back
+    to ``fetch_ncbi_entry`` (All Fields search); failures map to None.
+    """
+    stripped = list(dict.fromkeys(i.strip() for i in identifiers if i.strip()))
+    results: Dict[str, Optional[Dict]] = {i: None for i in stripped}
+    if db == "gene":
+        # Genes in the local gene_info index need no request at all
+        results.update((i, local_gene_record(i, organism)) for i in stripped)
+        stripped = [i for i in stripped if results[i] is None]
+
+    direct = {i: direct_id(i, db) for i in stripped}
+    local = {i: direct[i] or local_gene_id(i, organism) for i in stripped} if db == "gene" else {}
+    posted = list(dict.fromkeys(uid for uid in local.values() if uid))
+    listed = [] if db == "gene" else list(dict.fromkeys(d for d in direct.values() if d))
+    searched = [i for i in stripped if not local.get(i) and not direct[i]]
+
+    by_uid: Dict[str, Dict] = {}
+    exact: Dict[str, Dict] = {}
+    alias: Dict[str, Dict] = {}
+    batches = [("epost", chunk) for chunk in _chunks(posted, ESUMMARY_CHUNK_SIZE)]
+    batches += [("esummary", chunk) for chunk in _chunks(listed, ESUMMARY_CHUNK_SIZE)]
+    if db in BATCH_FIELDS:
+        batches += [("esearch", chunk) for chunk in _chunks(searched, ESEARCH_CHUNK_SIZE)]
+    for how, chunk in batches:
+        try:
+            if how == "esummary":
+                summaries = _id_summaries(chunk, db, cfg=cfg)
+            elif how == "epost":
+                webenv, query_key = _epost(chunk, db, cfg=cfg)
+                summaries = _history_summaries(db, webenv, query_key, len(chunk), cfg=cfg)
+            else:
+                webenv, query_key, count = _search_history(_batch_term(chunk, db, organism), db, cfg=cfg)
+                summaries = _history_summaries(db, webenv, query_key, count, cfg=cfg)
+            for summary in summaries:
+                by_uid[summary["uid"]] = summary
+                keys, aliases = _summary_keys(summary, db)
+                for key in keys:
+                    exact.setdefault(key, summary)
+                for key in aliases:
+                    alias.setdefault(key, summary)
+        except (requests.exceptions.RequestException, ET.ParseError, ValueError) as e:
+            log.warning("NCBI %s batch of %d failed: %s", how, len(chunk), e)
+
+    missing = []
+    for ident in stripped:
+        key = ident.upper()
+        summary = by_uid.get(local.get(ident) or direct[ident] or "") or exact.get(key) or alias.get(key) \
+            or (alias.get(key.split(".")[0]) if db != "gene" else None)
+        if summary:
+            results[ident] = _summary_record(summary, summary["uid"], db)
+        else:
+            missing.append(ident)
+
+    if missing:
+        log.info("NCBI %s batch: %d of %d identifiers need a per-identifier search", db, len(missing), len(stripped))
+    for ident in missing:
+        try:
+            results[ident] = fetch_ncbi_entry(ident, db=db, organism=organism, output="json", cfg=cfg)
+        except Exception:
+            results[ident] = None
+    return results
+
+
+def fetch_ncbi_entry(identifier: str, db: str = "gene", organism: str = "Homo sapiens", output: str = "json",
+                     cfg: Optional[HttpConfig] = None):
     """
     Fetch an NCBI entry by identifier (gene/protein/nucleotide).
     output = 'json' | 'fasta' | 'txt'
+    Protein/nucleotide FASTA already in the local sequence store (curio.seq_store) is served from disk,
+    and gene JSON from the local gene_info index (curio.gene_info) when it knows the gene.
     """
-    uid = _esearch(identifier, db=db, organism=organism)
+    if db == "gene" and output == "json":
+        record = local_gene_record(identifier, organism)
+        if record:
+            return record
+
+    store = get_store(cfg) if output == "fasta" and db != "gene" else None
+    held = store.resolve(identifier) if store is not None else None
+    if held:
+        return store.get_fasta(held)
+
+    uid = _esearch(identifier, db=db, organism=organism, cfg=cfg)
     if not uid:
         return None
 
     if output == "json":
-        summary = _esummary(uid, db)
-        if db == "gene":
-            return {
-                "Gene ID": summary.get("uid", uid),
-                "Symbol": summary.get("name"),
-                "Description": summary.get("description"),
-                "Organism": summary.get("organism", {}).get("scientificname"),
-                "Chromosome": summary.get("chromosome"),
-                "Map Location": summary.get("maplocation"),
-                "Other Designations": summary.get("otherdesignations", []),
-            }
-        else:
-            # proteins/nucleotide: minimal metadata
-            return {
-                "ID": uid,
-                "Title": summary.get("title"),
-                "Length": summary.get("slen"),
-                "Molecule Type": summary.get("moltype"),
-            }
+        return _summary_record(_esummary(uid, db, cfg=cfg), uid, db)
     elif output == "fasta":
-        return _efetch(uid, db=db, rettype="fasta")
+        text = _efetch(uid, db=db, rettype="fasta", cfg=cfg)
+        if store is not None:
+            store.add_fasta(text)
+        return text
     else:  # GenBank / flatfile
-        return _efetch(uid, db=db, rettype="gb")
+        return _efetch(uid, db=db, rettype="gb", cfg=cfg)
+
+
+def download_ncbi_entry(identifier: str, dest: Union[str, Path], db: str = "protein",
+                        organism: str = "Homo sapiens", output: str = "fasta",
+                        cfg: Optional[HttpConfig] = None) -> Optional[Path]:
+    """
+    Stream an NCBI sequence record (FASTA or GenBank) straight to ``dest``.
+    output = 'fasta' | 'txt'
+    """
+    uid = _esearch(identifier, db=db, organism=organism, cfg=cfg)
+    if not uid:
+        return None
+    params = eutils_params(cfg, db=db, id=uid, rettype="fasta" if output == "fasta" else "gb", retmode="text")
+    return download_to_file(f"{NCBI_BASE}efetch.fcgi", dest, params=params, cfg=cfg).path
+
+
+def fetch_ncbi_batch(identifiers: List[str], db: str = "gene", organism: str = "Homo sapiens", output: str = "json",
+                     cfg: Optional[HttpConfig] = None) -> Dict[str, Optional[Dict]]:
+    """
+    Fetch multiple NCBI entries in batch: JSON summaries via ``fetch_ncbi_summaries``,
+    protein/nucleotide FASTA/GenBank via ``iter_ncbi_records`` (FASTA already in
+    the sequence store is not fetched again). Identifiers the batches miss are
+    fetched one by one; failures map to None.
+    """
+    if output == "json":
+        return fetch_ncbi_summaries(identifiers, db=db, organism=organism, cfg=cfg)
+    stripped = list(dict.fromkeys(i.strip() for i in identifiers if i.strip()))
+    results: Dict[str, Optional[str]] = {i: None for i in stripped}
 
+    pending = stripped
+    if db in ("protein", "nucleotide"):
+        store = get_store(cfg) if output == "fasta" else None
+        if store is not None:
+            for ident in stripped:
+                held = store.resolve(ident)
+                if held:
+                    results[ident] = store.get_fasta(held)
+        queued = [i for i in stripped if results[i] is None]
+        for ident, record in iter_ncbi_records(queued, db=db, organism=organism, output=output, cfg=cfg):
+            results[ident] = record
+            if store is not None:
+                store.add_fasta(record)
+        pending = [i for i in stripped if results[i] is None]
 
-def fetch_ncbi_batch(identifiers: List[str], db: str = "gene", organism: str = "Homo sapiens", output: str = "json") -> Dict[str, Optional[Dict]]:
-    """Fetch multiple NCBI entries in batch."""
-    results = {}
-    for ident in identifiers:
-        ident = ident.strip()
-        if not ident:
-            continue
+    for ident in pending:
         try:
-            results[ident] = fetch_ncbi_entry(ident, db=db, organism=organism, output=output)
+            results[ident] = fetch_ncbi_entry(ident, db=db, organism=organism, output=output, cfg=cfg)
         except Exception:
             results[ident] = None
     return results
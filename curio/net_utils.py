@@ -1,11 +1,51 @@
 # curio/net_utils.py
+import codecs
+import hashlib
+import io
 import logging
+import os
+import random
+import tempfile
+import threading
+import time
+import zlib
 import requests
 from dataclasses import dataclass, field
-from typing import Dict, Optional
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type, TypeVar, Union
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.util.request import ACCEPT_ENCODING
+
+from . import json_backend
+from .cassette import DEFAULT_CASSETTE_PATH, Cassette, FaultInjector
+from .circuit import CircuitBreaker, CircuitOpenError
+
+from .http_cache import (
+    DEFAULT_CACHE_PATH,
+    DEFAULT_TTLS,
+    CachedResponse,
+    ResponseCache,
+    is_cacheable,
+    make_cache_key,
+    ttl_for_url,
+)
+from .rate_limit import DEFAULT_RATE_LIMIT_PATH, SharedTokenBucket, TokenBucket
+from .telemetry import Telemetry
 
 log = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+NCBI_HOST = "eutils.ncbi.nlm.nih.gov"
+# E-utilities rate for requests carrying an API key (3/s without one)
+NCBI_KEYED_RATE = 10.0
+
 @dataclass
 class HttpConfig:
     """HTTP session configuration for CURIO API calls."""
@@ -13,20 +53,655 @@ class HttpConfig:
     headers: Dict[str, str] = field(default_factory=lambda: {
         "User-Agent": "curio/1.0 (+https://github.com/curio)"
     })
+    # Content codings to advertise; None = every coding urllib3 can decode here
+    # (gzip/deflate, plus br/zstd when brotli/zstandard are installed)
+    accept_encoding: Optional[str] = None
+    # Connection pooling (one pooled session per upstream host)
+    pool_connections: int = 4
+    pool_maxsize: int = 16
+    pool_block: bool = False
+    keep_alive: bool = True
+    # Persistent response cache (opt-in); TTLs keyed by "host/path" prefix
+    cache_enabled: bool = False
+    cache_path: Optional[str] = None
+    cache_max_bytes: int = 256 * 1024 * 1024
+    cache_methods: Tuple[str, ...] = ("GET", "POST")
+    cache_ttls: Dict[str, int] = field(default_factory=lambda: dict(DEFAULT_TTLS))
+    # Retry policy: exponential backoff with jitter, honoring Retry-After
+    retries: int = 2
+    backoff_factor: float = 0.5
+    backoff_max: float = 30.0
+    backoff_jitter: float = 0.25
+    respect_retry_after: bool = True
+    retry_statuses: Tuple[int, ...] = (429, 500, 502, 503, 504)
+    retry_exceptions: Tuple[Type[BaseException], ...] = (
+        requests.exceptions.ConnectionError,
+        requests.exceptions.Timeout,
+    )
+    retry_methods: Tuple[str, ...] = ("GET", "HEAD", "POST")
+    # Total wall-clock budget per call, including retries and backoff
+    deadline_seconds: Optional[float] = None
+    # Per-host request rate limits (requests/second); hosts not listed are unthrottled
+    rate_limits: Dict[str, float] = field(default_factory=lambda: {
+        "eutils.ncbi.nlm.nih.gov": 3.0,
+        "rest.kegg.jp": 3.0,
+        "string-db.org": 1.0,
+    })
+    # NCBI E-utilities identification (tool/email/api_key on every eutils call);
+    # an API key lifts the eutils limit to NCBI_KEYED_RATE requests/second
+    ncbi_api_key: Optional[str] = field(default_factory=lambda: os.environ.get("NCBI_API_KEY") or None)
+    ncbi_email: Optional[str] = field(default_factory=lambda: os.environ.get("NCBI_EMAIL") or None)
+    ncbi_tool: str = "curio"
+    # Share buckets across worker processes through a SQLite file
+    rate_limit_shared: bool = False
+    rate_limit_path: Optional[str] = None
+    # Share one upstream call between concurrent identical requests
+    coalesce_requests: bool = True
+    coalesce_methods: Tuple[str, ...] = ("GET", "HEAD", "POST")
+    # Record per-endpoint latency, bytes, statuses and retries
+    telemetry_enabled: bool = True
+    # Keep fetched FASTA sequences in a local indexed store (see curio.seq_store)
+    sequence_store_enabled: bool = False
+    sequence_store_path: Optional[str] = None
+    # Per-host circuit breaker: open after N consecutive failures (connection
+    # errors, timeouts, 5xx), fail fast or serve stale cache while open, then
+    # let half-open probes through after the recovery period
+    breaker_enabled: bool = True
+    breaker_failure_threshold: int = 5
+    breaker_recovery_seconds: float = 30.0
+    breaker_half_open_probes: int = 1
+    # Record/replay cassettes: "record", "replay" or None
+    # (defaults come from the CURIO_CASSETTE_MODE / CURIO_CASSETTE env vars)
+    cassette_mode: Optional[str] = field(default_factory=lambda: os.environ.get("CURIO_CASSETTE_MODE") or None)
+    cassette_path: Optional[str] = field(default_factory=lambda: os.environ.get("CURIO_CASSETTE") or None)
+    # Replay fault injection; replay_error_status=0 raises ConnectionError instead
+    replay_latency: float = 0.0
+    replay_latency_jitter: float = 0.0
+    replay_error_rate: float = 0.0
+    replay_error_status: int = 503
+    replay_seed: Optional[int] = None
 
     @property
     def timeout(self) -> int:
         """Expose timeout under .timeout (compatibility fix)."""
         return self.timeout_seconds
 
+    @classmethod
+    def from_settings(cls, settings: Optional[dict] = None) -> "HttpConfig":
+        """Build a config from the dashboard's ``st.session_state["settings"]`` dict."""
+        s = settings or {}
+        return cls(
+            timeout_seconds=int(s.get("timeout_seconds", 20)),
+            cache_enabled=bool(s.get("http_cache", False)),
+            retries=int(s.get("retries", 2)),
+            deadline_seconds=float(s["deadline_seconds"]) if s.get("deadline_seconds") else None,
+            rate_limit_shared=bool(s.get("shared_rate_limits", False)),
+            breaker_enabled=bool(s.get("circuit_breaker", True)),
+            sequence_store_enabled=bool(s.get("sequence_store", False)),
+            ncbi_api_key=s.get("ncbi_api_key") or os.environ.get("NCBI_API_KEY") or None,
+            ncbi_email=s.get("ncbi_email") or os.environ.get("NCBI_EMAIL") or None,
+        )
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """Raised when a call's total deadline expires before a usable response."""
+
 
 def make_session(cfg: Optional[HttpConfig] = None) -> requests.Session:
+    """Build a new session with a pooled adapter sized from ``cfg``."""
     cfg = cfg or HttpConfig()
     sess = requests.Session()
     sess.headers.update(cfg.headers)
+    if not cfg.keep_alive:
+        sess.headers["Connection"] = "close"
+    adapter = HTTPAdapter(
+        pool_connections=cfg.pool_connections,
+        pool_maxsize=cfg.pool_maxsize,
+        pool_block=cfg.pool_block,
+    )
+    sess.mount("https://", adapter)
+    sess.mount("http://", adapter)
     return sess
 
 
+class SessionRegistry:
+    """Thread-safe, process-wide registry of pooled sessions keyed by host.
+
+    Each upstream (``https://rest.uniprot.org``, ``https://eutils.ncbi.nlm.nih.gov``,
+    ...) gets its own ``requests.Session`` so TCP/TLS connections are reused
+    across calls, pages and worker threads.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._sessions: Dict[Tuple, requests.Session] = {}
+
+    @staticmethod
+    def _key(url: str, cfg: HttpConfig) -> Tuple:
+        parts = urlsplit(url)
+        return (parts.scheme, parts.netloc.lower(), cfg.pool_connections,
+                cfg.pool_maxsize, cfg.pool_block, cfg.keep_alive)
+
+    def get(self, url: str, cfg: Optional[HttpConfig] = None) -> requests.Session:
+        """Return the pooled session for the host of ``url``, creating it once."""
+        cfg = cfg or HttpConfig()
+        key = self._key(url, cfg)
+        with self._lock:
+            sess = self._sessions.get(key)
+            if sess is None:
+                sess = make_session(cfg)
+                self._sessions[key] = sess
+                log.debug("Opened pooled session for %s://%s", key[0], key[1])
+            return sess
+
+    def close_all(self) -> None:
+        """Close every pooled session (e.g. on shutdown or in tests)."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for sess in sessions:
+            sess.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+
+_REGISTRY = SessionRegistry()
+
+
+def get_session(url: str, cfg: Optional[HttpConfig] = None) -> requests.Session:
+    """Return the shared pooled session for the host of ``url``."""
+    return _REGISTRY.get(url, cfg)
+
+
+def close_sessions() -> None:
+    """Close all pooled sessions held by the process-wide registry."""
+    _REGISTRY.close_all()
+
+
+_CACHES: Dict[str, ResponseCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_cache(cfg: Optional[HttpConfig] = None) -> ResponseCache:
+    """Return the shared response cache for ``cfg.cache_path`` (opened once per process)."""
+    cfg = cfg or HttpConfig()
+    path = str(cfg.cache_path or DEFAULT_CACHE_PATH)
+    with _CACHES_LOCK:
+        cache = _CACHES.get(path)
+        if cache is None:
+            cache = ResponseCache(path, max_bytes=cfg.cache_max_bytes)
+            _CACHES[path] = cache
+        return cache
+
+
+def cache_stats(cfg: Optional[HttpConfig] = None) -> Dict[str, Any]:
+    """Return hit/miss counters and size of the response cache."""
+    return get_cache(cfg).stats()
+
+
+def clear_cache(cfg: Optional[HttpConfig] = None) -> None:
+    """Drop every cached response."""
+    get_cache(cfg).clear()
+
+
+def _build_response(method: str, url: str, status: int,
+                    headers: Dict[str, str], content: bytes) -> requests.Response:
+    """Build a fully-read ``requests.Response`` from stored parts.
+
+    The body counts as consumed, so ``iter_content`` (and the streaming
+    helpers built on it) slices ``_content`` instead of reading ``raw``.
+    """
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = content
+    resp._content_consumed = True
+    resp.raw = io.BytesIO(content)
+    resp.headers = CaseInsensitiveDict(headers)
+    resp.url = url
+    resp.encoding = get_encoding_from_headers(resp.headers)
+    resp.request = requests.Request(method.upper(), url).prepare()
+    return resp
+
+
+def _response_from_cache(entry: CachedResponse, method: str) -> requests.Response:
+    """Rebuild a ``requests.Response`` from a cached entry."""
+    resp = _build_response(method, entry.url, entry.status, entry.headers, entry.content)
+    resp.from_cache = True
+    return resp
+
+
+_CASSETTES: Dict[str, Cassette] = {}
+_FAULTS: Dict[Tuple, FaultInjector] = {}
+_CASSETTES_LOCK = threading.Lock()
+
+
+def get_cassette(cfg: Optional[HttpConfig] = None) -> Cassette:
+    """Return the cassette for ``cfg.cassette_path`` (loaded once per process)."""
+    cfg = cfg or HttpConfig()
+    path = str(cfg.cassette_path or DEFAULT_CASSETTE_PATH)
+    with _CASSETTES_LOCK:
+        cassette = _CASSETTES.get(path)
+        if cassette is None:
+            cassette = _CASSETTES[path] = Cassette(path)
+        return cassette
+
+
+def _fault_injector(cfg: HttpConfig) -> FaultInjector:
+    key = (cfg.replay_latency, cfg.replay_latency_jitter, cfg.replay_error_rate, cfg.replay_seed)
+    with _CASSETTES_LOCK:
+        faults = _FAULTS.get(key)
+        if faults is None:
+            faults = _FAULTS[key] = FaultInjector(*key)
+        return faults
+
+
+def _transport(sess: requests.Session,
+               method: str,
+               url: str,
+               cfg: HttpConfig,
+               timeout: float,
+               **kwargs) -> requests.Response:
+    """Perform one HTTP attempt: live, live-and-recorded, or replayed from a cassette."""
+    mode = cfg.cassette_mode
+    if not mode:
+        return sess.request(method, url, timeout=timeout, **kwargs)
+    if mode not in ("record", "replay"):
+        raise ValueError(f"Unknown cassette_mode {mode!r} (expected 'record' or 'replay')")
+
+    cassette = get_cassette(cfg)
+    key = make_cache_key(method, url, kwargs.get("params"), kwargs.get("data"), kwargs.get("json"))
+    if mode == "record":
+        resp = sess.request(method, url, timeout=timeout, **kwargs)
+        cassette.record(key, method, resp)
+        return resp
+
+    faults = _fault_injector(cfg)
+    delay = faults.delay()
+    if delay:
+        time.sleep(min(delay, timeout))
+        if delay > timeout:
+            raise requests.exceptions.ReadTimeout(f"Injected replay latency {delay:.2f}s > timeout for {url}")
+    if faults.should_fail():
+        if cfg.replay_error_status:
+            return _build_response(method, url, cfg.replay_error_status, {}, b"")
+        raise requests.exceptions.ConnectionError(f"Injected replay failure for {method} {url}")
+    item = cassette.play(key, method, url)
+    return _build_response(method, item.url, item.status, item.headers, item.content)
+
+
+_LIMITERS: Dict[Tuple, Union[TokenBucket, SharedTokenBucket]] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limiter(url: str, cfg: Optional[HttpConfig] = None) -> Optional[Union[TokenBucket, SharedTokenBucket]]:
+    """Return the token bucket for ``url``'s host, or None when the host is unthrottled."""
+    cfg = cfg or HttpConfig()
+    host = urlsplit(url).netloc.lower()
+    rate = cfg.rate_limits.get(host)
+    if not rate:
+        return None
+    if host == NCBI_HOST and cfg.ncbi_api_key:
+        rate = max(rate, NCBI_KEYED_RATE)
+    path = str(cfg.rate_limit_path or DEFAULT_RATE_LIMIT_PATH) if cfg.rate_limit_shared else None
+    key = (host, rate, path)
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(key)
+        if limiter is None:
+            limiter = SharedTokenBucket(path, host, rate) if path else TokenBucket(rate)
+            _LIMITERS[key] = limiter
+        return limiter
+
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def get_breaker(url: str, cfg: Optional[HttpConfig] = None) -> Optional[CircuitBreaker]:
+    """Return the circuit breaker for ``url``'s host, or None when breakers are disabled."""
+    cfg = cfg or HttpConfig()
+    if not cfg.breaker_enabled:
+        return None
+    host = urlsplit(url).netloc.lower()
+    with _BREAKERS_LOCK:
+        breaker = _BREAKERS.get(host)
+        if breaker is None:
+            breaker = _BREAKERS[host] = CircuitBreaker(
+                host, cfg.breaker_failure_threshold, cfg.breaker_recovery_seconds, cfg.breaker_half_open_probes)
+        return breaker
+
+
+def breaker_states() -> List[Dict[str, Any]]:
+    """Snapshot of every host's circuit breaker, for the Settings page."""
+    with _BREAKERS_LOCK:
+        breakers = sorted(_BREAKERS.values(), key=lambda b: b.name)
+    return [b.snapshot() for b in breakers]
+
+
+def reset_breakers() -> None:
+    """Close every circuit breaker."""
+    with _BREAKERS_LOCK:
+        for breaker in _BREAKERS.values():
+            breaker.reset()
+
+
+def _retry_after_seconds(resp: requests.Response) -> Optional[float]:
+    """Parse a Retry-After header given as seconds or as an HTTP date."""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def _backoff_delay(cfg: HttpConfig, attempt: int) -> float:
+    """Exponential backoff for ``attempt`` (0-based) with +/- jitter, capped."""
+    base = min(cfg.backoff_max, cfg.backoff_factor * (2 ** attempt))
+    spread = base * cfg.backoff_jitter
+    return max(0.0, base + random.uniform(-spread, spread))
+
+
+_TELEMETRY = Telemetry()
+
+
+def get_telemetry() -> Telemetry:
+    """Return the process-wide HTTP telemetry registry."""
+    return _TELEMETRY
+
+
+def telemetry_snapshot() -> Dict[str, Any]:
+    """Per-endpoint request counts, latency percentiles, bytes, statuses and retries."""
+    return _TELEMETRY.snapshot()
+
+
+def telemetry_prometheus() -> str:
+    """All HTTP metrics in Prometheus text exposition format."""
+    return _TELEMETRY.to_prometheus()
+
+
+def _body_size(resp: requests.Response) -> int:
+    body = resp.request.body if resp.request is not None else None
+    return len(body) if isinstance(body, (bytes, str)) else 0
+
+
+def _content_size(resp: requests.Response, stream: bool) -> int:
+    if stream:
+        length = resp.headers.get("Content-Length", "")
+        return int(length) if length.isdigit() else 0
+    return len(resp.content or b"")
+
+
+def _send(sess: requests.Session,
+          method: str,
+          url: str,
+          cfg: HttpConfig,
+          timeout: float,
+          **kwargs) -> requests.Response:
+    """Send one logical request and record it in the telemetry registry."""
+    if not cfg.telemetry_enabled:
+        return _send_with_retries(sess, method, url, cfg, timeout, [0], **kwargs)
+    retries = [0]
+    start = time.monotonic()
+    try:
+        resp = _send_with_retries(sess, method, url, cfg, timeout, retries, **kwargs)
+    except Exception as e:
+        _TELEMETRY.record_request(url, method, None, time.monotonic() - start,
+                                  retries=retries[0], error=type(e).__name__)
+        raise
+    _TELEMETRY.record_request(url, method, resp.status_code, time.monotonic() - start,
+                              bytes_in=_content_size(resp, bool(kwargs.get("stream"))),
+                              bytes_out=_body_size(resp), retries=retries[0])
+    return resp
+
+
+def _send_with_retries(sess: requests.Session,
+                       method: str,
+                       url: str,
+                       cfg: HttpConfig,
+                       timeout: float,
+                       retries: List[int],
+                       **kwargs) -> requests.Response:
+    """Send one logical request, retrying transient failures per ``cfg``.
+
+    Retryable statuses get the response's Retry-After (when present) or
+    exponential backoff; retryable exceptions get backoff. When
+    ``cfg.deadline_seconds`` is set, per-attempt timeouts shrink to the
+    remaining budget and no retry is scheduled past it. Every attempt first
+    takes a token from the host's rate limiter, if it has one. The call is
+    refused with ``CircuitOpenError`` while the host's circuit breaker is
+    open; otherwise it counts as at most one breaker failure, recorded after
+    retries are exhausted. The number of retries performed is written to
+    ``retries[0]``.
+    """
+    deadline = time.monotonic() + cfg.deadline_seconds if cfg.deadline_seconds else None
+    limiter = get_rate_limiter(url, cfg) if cfg.cassette_mode != "replay" else None
+    breaker = get_breaker(url, cfg)
+    retryable = method in cfg.retry_methods
+    if breaker is not None and not breaker.allow():
+        raise CircuitOpenError(f"Circuit open for {breaker.name}; not sending {method} {url}")
+    attempt = 0
+    failure: Optional[str] = None  # why the latest attempt failed; charged to the breaker once
+    try:
+        while True:
+            if limiter is not None:
+                waited = limiter.acquire()
+                if waited:
+                    log.debug("Rate limited %s for %.2fs", urlsplit(url).netloc, waited)
+
+            call_timeout = timeout
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise DeadlineExceeded(f"Deadline of {cfg.deadline_seconds}s exceeded for {method} {url}")
+                call_timeout = min(timeout, remaining)
+            try:
+                resp = _transport(sess, method, url, cfg, call_timeout, **kwargs)
+            except cfg.retry_exceptions as e:
+                failure = type(e).__name__
+                if not retryable or attempt >= cfg.retries:
+                    raise
+                delay = _backoff_delay(cfg, attempt)
+                reason = failure
+                resp = None
+            else:
+                failure = f"HTTP {resp.status_code}" if resp.status_code >= 500 else None
+                if resp.status_code not in cfg.retry_statuses or not retryable or attempt >= cfg.retries:
+                    break
+                delay = (_retry_after_seconds(resp) if cfg.respect_retry_after else None)
+                delay = min(cfg.backoff_max, delay) if delay is not None else _backoff_delay(cfg, attempt)
+                reason = f"HTTP {resp.status_code}"
+
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                if resp is not None:
+                    break
+                raise DeadlineExceeded(f"Deadline of {cfg.deadline_seconds}s exceeded for {method} {url}")
+            if resp is not None:
+                resp.close()
+            attempt += 1
+            retries[0] = attempt
+            log.warning("Retrying %s %s in %.2fs after %s (attempt %d/%d)",
+                        method, url, delay, reason, attempt, cfg.retries)
+            time.sleep(delay)
+    except Exception:
+        if breaker is not None:
+            if failure is not None:
+                breaker.record_failure(failure)
+            else:
+                breaker.release()
+        raise
+    if breaker is not None:
+        if failure is not None:
+            breaker.record_failure(failure)
+        else:
+            breaker.record_success()
+    return resp
+
+
+class _Flight:
+    __slots__ = ("event", "result", "error", "followers")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent identical calls: one caller runs, the rest share its outcome.
+
+    A key is "in flight" only while its leader runs; later calls start a new
+    flight. Followers receive the leader's return value or its exception.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.followers += 1
+                self.coalesced += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.event.set()
+            if flight.followers:
+                log.debug("Coalesced %d identical request(s) for %s", flight.followers, key[:12])
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+
+_INFLIGHT = SingleFlight()
+
+
+# HttpConfig fields that change what is sent or how the response is obtained;
+# concurrent callers only share an upstream call when these match too.
+_FLIGHT_CONFIG_FIELDS = (
+    "ncbi_api_key", "ncbi_email", "ncbi_tool", "retries", "deadline_seconds",
+    "cache_enabled", "cache_path", "cassette_mode", "cassette_path",
+    "replay_latency", "replay_error_rate", "replay_error_status", "replay_seed",
+)
+
+
+def _flight_key(method: str, url: str, params: Optional[dict], headers: Dict[str, str],
+                timeout: float, cfg: HttpConfig, kwargs: Dict[str, Any]) -> str:
+    key = make_cache_key(method, url, params, kwargs.get("data"), kwargs.get("json"))
+    config = (sorted(headers.items()), timeout, [getattr(cfg, name) for name in _FLIGHT_CONFIG_FIELDS])
+    return key + "|" + hashlib.sha256(repr(config).encode("utf-8")).hexdigest()
+
+
+def request(method: str,
+            url: str,
+            params: Optional[dict] = None,
+            session: Optional[requests.Session] = None,
+            cfg: Optional[HttpConfig] = None,
+            headers: Optional[Dict[str, str]] = None,
+            timeout: Optional[float] = None,
+            **kwargs) -> requests.Response:
+    """Send a request through the pooled session for ``url``'s host.
+
+    Per-call ``headers`` are layered over ``cfg.headers``. When
+    ``cfg.cache_enabled`` is set, fresh cached responses are returned without
+    touching the network and stale ones are revalidated with
+    If-None-Match/If-Modified-Since, or served as-is while the host's circuit
+    breaker is open; E-utilities history-server calls are never cached (see
+    ``is_cacheable``). The response is returned as-is; callers
+    decide how to treat non-2xx statuses. Transient failures are retried per
+    the retry policy on ``cfg`` (see ``_send``). Concurrent identical
+    requests share a single upstream call (see ``SingleFlight``).
+    """
+    cfg = cfg or HttpConfig()
+    method = method.upper()
+    merged = dict(cfg.headers)
+    merged.setdefault("Accept-Encoding", cfg.accept_encoding or ACCEPT_ENCODING)
+    if headers:
+        merged.update(headers)
+
+    cache = None
+    entry = None
+    if cfg.cache_enabled and method in cfg.cache_methods and not kwargs.get("stream") \
+            and is_cacheable(url, params, kwargs.get("data")):
+        cache = get_cache(cfg)
+        key = make_cache_key(method, url, params, kwargs.get("data"), kwargs.get("json"))
+        entry = cache.get(key)
+        if entry is not None and entry.is_fresh:
+            cache.note("hit")
+            if cfg.telemetry_enabled:
+                _TELEMETRY.record_cache(url, method, "hit")
+            return _response_from_cache(entry, method)
+        if entry is not None:
+            merged.update(entry.validators)
+
+    def _fetch() -> requests.Response:
+        sess = session or get_session(url, cfg)
+        try:
+            resp = _send(sess, method, url, cfg, timeout or cfg.timeout,
+                         params=params, headers=merged, **kwargs)
+        except CircuitOpenError:
+            if entry is None:
+                raise
+            log.warning("Circuit open for %s; serving stale cached response", urlsplit(url).netloc)
+            cache.note("stale")
+            if cfg.telemetry_enabled:
+                _TELEMETRY.record_cache(url, method, "stale")
+            return _response_from_cache(entry, method)
+
+        if cache is not None:
+            ttl = ttl_for_url(url, cfg.cache_ttls)
+            if resp.status_code == 304 and entry is not None:
+                cache.refresh(key, ttl, dict(resp.headers))
+                cache.note("revalidated")
+                if cfg.telemetry_enabled:
+                    _TELEMETRY.record_cache(url, method, "revalidated")
+                return _response_from_cache(entry, method)
+            cache.note("miss")
+            if cfg.telemetry_enabled:
+                _TELEMETRY.record_cache(url, method, "miss")
+            if resp.status_code == 200:
+                cache.put(key, method, resp.url, resp.status_code, dict(resp.headers), resp.content, ttl)
+        return resp
+
+    if cfg.coalesce_requests and method in cfg.coalesce_methods and not kwargs.get("stream"):
+        return _INFLIGHT.do(_flight_key(method, url, params, merged, timeout or cfg.timeout, cfg, kwargs), _fetch)
+    return _fetch()
+
+
+def decode_json(resp: requests.Response) -> Any:
+    """Decode a response body with the fastest available JSON backend."""
+    return json_backend.loads(resp.content)
+
+
 def _check_response(resp: requests.Response) -> None:
     """Raise for bad HTTP status codes with logging."""
     if not resp.ok:
@@ -41,19 +716,14 @@ def get_json(url: str,
              method: str = "GET",
              json: Optional[dict] = None) -> dict:
     """Generic JSON fetcher with error handling and timeout support."""
-    cfg = cfg or HttpConfig()
-    sess = session or make_session(cfg)
-
     if method.upper() == "POST":
-        resp = sess.post(url, json=json, params=params,
-                         timeout=cfg.timeout, headers=cfg.headers)
+        resp = request("POST", url, params=params, session=session, cfg=cfg, json=json)
     else:
-        resp = sess.get(url, params=params,
-                        timeout=cfg.timeout, headers=cfg.headers)
+        resp = request("GET", url, params=params, session=session, cfg=cfg)
 
     _check_response(resp)
     try:
-        return resp.json()
+        return decode_json(resp)
     except Exception as e:
         log.exception("Failed to parse JSON from %s", url)
         raise e
@@ -66,41 +736,195 @@ def get_text(url: str,
              method: str = "GET",
              data: Optional[dict] = None) -> str:
     """Generic text fetcher with error handling."""
-    cfg = cfg or HttpConfig()
-    sess = session or make_session(cfg)
-
     if method.upper() == "POST":
-        resp = sess.post(url, data=data, params=params,
-                         timeout=cfg.timeout, headers=cfg.headers)
+        resp = request("POST", url, params=params, session=session, cfg=cfg, data=data)
     else:
-        resp = sess.get(url, params=params,
-                        timeout=cfg.timeout, headers=cfg.headers)
+        resp = request("GET", url, params=params, session=session, cfg=cfg)
 
     _check_response(resp)
     return resp.text
-    
+
 def post_json(url: str,
               json: dict,
               params: Optional[dict] = None,
               session: Optional[requests.Session] = None,
               cfg: Optional[HttpConfig] = None) -> dict:
     """Generic POST JSON helper (for RCSB search GraphQL)."""
-    cfg = cfg or HttpConfig()
-    sess = session or make_session(cfg)
-
-    resp = sess.post(url, json=json, params=params,
-                     timeout=cfg.timeout, headers=cfg.headers)
+    resp = request("POST", url, params=params, session=session, cfg=cfg, json=json)
 
     _check_response(resp)
     try:
-        return resp.json()
+        return decode_json(resp)
     except Exception as e:
         log.exception("Failed to parse JSON from %s", url)
         raise e
 def get_bytes(url: str, session=None, cfg: "HttpConfig" = None) -> bytes:
     """Download binary data (e.g. PNG) with optional session and HttpConfig."""
-    cfg = cfg or HttpConfig()
-    session = session or make_session(cfg)
-    r = session.get(url, timeout=cfg.timeout_seconds)
+    r = request("GET", url, session=session, cfg=cfg)
     r.raise_for_status()
     return r.content
+
+
+# Streaming downloads
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class ChecksumMismatch(ValueError):
+    """Raised when a downloaded file does not match the expected digest."""
+
+
+@dataclass
+class DownloadResult:
+    """Outcome of ``download_to_file``."""
+    path: Path
+    bytes_written: int
+    checksum: str
+    resumed: bool = False
+
+
+def gunzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Decompress a gzip byte stream chunk by chunk (multi-member/bgzip aware)."""
+    dec = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        while chunk:
+            out = dec.decompress(chunk)
+            if out:
+                yield out
+            if dec.eof:
+                chunk = dec.unused_data
+                dec = zlib.decompressobj(zlib.MAX_WBITS | 16)
+            else:
+                chunk = b""
+    tail = dec.flush()
+    if tail:
+        yield tail
+
+
+def iter_chunks(url: str,
+                params: Optional[dict] = None,
+                session: Optional[requests.Session] = None,
+                cfg: Optional[HttpConfig] = None,
+                method: str = "GET",
+                data: Optional[dict] = None,
+                chunk_size: int = DEFAULT_CHUNK_SIZE,
+                gunzip: bool = False) -> Iterator[bytes]:
+    """Yield the response body in chunks without holding it in memory.
+
+    With ``gunzip=True`` a gzip-compressed payload (e.g. ``1TUP.pdb.gz``) is
+    decompressed on the fly.
+    """
+    resp = request(method, url, params=params, session=session, cfg=cfg, data=data, stream=True)
+    try:
+        _check_response(resp)
+        chunks = resp.iter_content(chunk_size=chunk_size)
+        yield from (gunzip_chunks(chunks) if gunzip else chunks)
+    finally:
+        resp.close()
+
+
+def iter_lines(url: str,
+               params: Optional[dict] = None,
+               session: Optional[requests.Session] = None,
+               cfg: Optional[HttpConfig] = None,
+               method: str = "GET",
+               data: Optional[dict] = None,
+               chunk_size: int = DEFAULT_CHUNK_SIZE,
+               gunzip: bool = False,
+               encoding: str = "utf-8") -> Iterator[str]:
+    """Yield decoded text lines (without line endings) from a streamed response."""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    pending = ""
+    for chunk in iter_chunks(url, params=params, session=session, cfg=cfg, method=method,
+                             data=data, chunk_size=chunk_size, gunzip=gunzip):
+        pending += decoder.decode(chunk)
+        lines = pending.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+def download_to_file(url: str,
+                     dest: Union[str, Path],
+                     params: Optional[dict] = None,
+                     session: Optional[requests.Session] = None,
+                     cfg: Optional[HttpConfig] = None,
+                     method: str = "GET",
+                     data: Optional[dict] = None,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     gunzip: bool = False,
+                     checksum: str = "sha256",
+                     expected_checksum: Optional[str] = None,
+                     resume: bool = True) -> DownloadResult:
+    """Stream a response to ``dest`` with bounded memory.
+
+    Data goes to a partial file that is atomically renamed to ``dest`` on
+    success. Resumable downloads (``resume`` set, GET, no ``gunzip``, whose
+    offsets would refer to the compressed stream) use ``dest + ".part"`` and
+    continue a leftover one with an HTTP Range request; servers that ignore
+    the range restart from zero. Other downloads write to a private
+    ``dest.<random>.part`` so concurrent downloads of the same ``dest`` never
+    share a partial file. The digest of the written file is returned and, if
+    given, checked against ``expected_checksum``.
+    """
+    cfg = cfg or HttpConfig()
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    resumable = resume and not gunzip and method.upper() == "GET"
+    if resumable:
+        part = dest.with_name(dest.name + ".part")
+        offset = part.stat().st_size if part.exists() else 0
+    else:
+        fd, name = tempfile.mkstemp(dir=dest.parent, prefix=dest.name + ".", suffix=".part")
+        os.close(fd)
+        part, offset = Path(name), 0
+    try:
+        return _download_part(url, dest, part, offset, params, session, cfg, method, data,
+                              chunk_size, gunzip, checksum, expected_checksum)
+    except BaseException:
+        if not resumable:
+            part.unlink(missing_ok=True)
+        raise
+
+
+def _download_part(url: str, dest: Path, part: Path, offset: int, params: Optional[dict],
+                   session: Optional[requests.Session], cfg: HttpConfig, method: str, data: Optional[dict],
+                   chunk_size: int, gunzip: bool, checksum: str,
+                   expected_checksum: Optional[str]) -> DownloadResult:
+    headers = {"Range": f"bytes={offset}-", "Accept-Encoding": "identity"} if offset else None
+    resp = request(method, url, params=params, session=session, cfg=cfg, data=data,
+                   headers=headers, stream=True)
+    try:
+        if offset and resp.status_code == 416:
+            resp.close()
+            part.unlink()
+            return download_to_file(url, dest, params=params, session=session, cfg=cfg, method=method,
+                                    data=data, chunk_size=chunk_size, gunzip=gunzip, checksum=checksum,
+                                    expected_checksum=expected_checksum, resume=False)
+        _check_response(resp)
+        resumed = bool(offset) and resp.status_code == 206
+        digest = hashlib.new(checksum)
+        if resumed:
+            with part.open("rb") as fh:
+                for block in iter(lambda: fh.read(chunk_size), b""):
+                    digest.update(block)
+        written = offset if resumed else 0
+        chunks = resp.iter_content(chunk_size=chunk_size)
+        with part.open("ab" if resumed else "wb") as fh:
+            for chunk in (gunzip_chunks(chunks) if gunzip else chunks):
+                fh.write(chunk)
+                digest.update(chunk)
+                written += len(chunk)
+    finally:
+        resp.close()
+
+    hexdigest = digest.hexdigest()
+    if expected_checksum and hexdigest.lower() != expected_checksum.lower():
+        part.unlink()
+        raise ChecksumMismatch(f"{checksum} mismatch for {url}: {hexdigest} != {expected_checksum}")
+    part.replace(dest)
+    log.debug("Downloaded %s -> %s (%d bytes%s)", url, dest, written, ", resumed" if resumed else "")
+    return DownloadResult(path=dest, bytes_written=written, checksum=hexdigest, resumed=resumed)
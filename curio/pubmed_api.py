@@ -1,82 +1,326 @@
 from __future__ import annotations
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import concurrent.futures
+from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
 import re
+import xml.etree.ElementTree as ET
 from collections import Counter
 
+import pandas as pd
+import requests
 from matplotlib.figure import Figure
 
-from .net_utils import get_json, get_text, HttpConfig, make_session
+from .ncbi_gene_api import eutils_params
+from .net_utils import decode_json, get_json, get_text, iter_chunks, request, HttpConfig
 from . import get_logger
 
 log = get_logger("pubmed")
 
 EUTILS = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
 
+# NCBI serves only the first 10,000 records of a PubMed result set; efetch and
+# esummary pages starting past it come back empty or with an error
+RETRIEVAL_LIMIT = 10_000
+
+# PMIDs per efetch uilist page / summaries per esummary page on the history server
+ID_PAGE_SIZE = 10_000
+SUMMARY_PAGE_SIZE = 500
+
+SUMMARY_COLUMNS = ("pmid", "title", "journal", "pubdate", "doi", "link")
+
+# Larger esummary ID lists are POSTed (URL length limits)
+POST_ID_THRESHOLD = 200
+# Concurrent esummary chunks; the eutils rate limiter still paces the requests
+SUMMARY_WORKERS = 4
+
+# esummary ``sortpubdate`` layout, parsed in one vectorized pass
+SORTPUBDATE_FORMAT = "%Y/%m/%d %H:%M"
+
+# PMIDs per efetch request for full records (abstracts, MeSH, authors)
+ARTICLE_CHUNK_SIZE = 200
+
 
 def search_pubmed(query: str, retmax: int = 200, cfg: Optional[HttpConfig] = None) -> List[str]:
     """Return a list of PMIDs for a query, sorted by pubdate (desc)."""
-    cfg = cfg or HttpConfig()
-    sess = make_session(cfg)
-    params = {"db": "pubmed", "term": query, "retmax": retmax, "sort": "pubdate", "retmode": "json"}
-    js = get_json(f"{EUTILS}/esearch.fcgi", params=params, session=sess, cfg=cfg)
+    params = eutils_params(cfg, db="pubmed", term=query, retmax=retmax, sort="pubdate", retmode="json")
+    js = get_json(f"{EUTILS}/esearch.fcgi", params=params, cfg=cfg)
     pmids = (js.get("esearchresult") or {}).get("idlist", [])
     log.info("PubMed search '%s' -> %d PMIDs", query, len(pmids))
     return pmids
 
 
-def fetch_pubmed_summaries(pmids: List[str], cfg: Optional[HttpConfig] = None) -> List[Dict[str, Any]]:
-    """Return summaries with fields: pmid, title, journal, pubdate (YYYY-MM-DD), doi, link."""
-    if not pmids:
-        return []
-    cfg = cfg or HttpConfig()
-    sess = make_session(cfg)
-    ids = ",".join(pmids)
-    js = get_json(f"{EUTILS}/esummary.fcgi", params={"db": "pubmed", "id": ids, "retmode": "json"}, session=sess, cfg=cfg)
-    result = js.get("result", {})
-    out: List[Dict[str, Any]] = []
+def _summary_columns(result: Dict[str, Any], pmids: List[str]) -> Dict[str, List[str]]:
+    """Column lists (SUMMARY_COLUMNS) for the esummary ``result`` documents of ``pmids``."""
+    cols: Dict[str, List[str]] = {c: [] for c in SUMMARY_COLUMNS}
+    pubdates: List[str] = []
     for pid in pmids:
         r = result.get(pid)
         if not r:
             continue
         pubdate = r.get("sortpubdate") or r.get("pubdate") or ""
-        # Normalize pubdate to YYYY-MM-DD when possible
-        pubdate_norm = _normalize_pubdate(pubdate)
         doi = ""
         for idobj in r.get("articleids", []):
             if idobj.get("idtype") == "doi":
                 doi = idobj.get("value", "")
                 break
-        link = f"https://pubmed.ncbi.nlm.nih.gov/{pid}/"
-        out.append({
-            "pmid": pid,
-            "title": r.get("title"),
-            "journal": (r.get("fulljournalname") or r.get("source")),
-            "pubdate": pubdate_norm,
-            "doi": doi,
-            "link": link,
-        })
+        cols["pmid"].append(pid)
+        cols["title"].append(r.get("title"))
+        cols["journal"].append(r.get("fulljournalname") or r.get("source"))
+        pubdates.append(pubdate)
+        cols["doi"].append(doi)
+        cols["link"].append(f"https://pubmed.ncbi.nlm.nih.gov/{pid}/")
+    # Normalize pubdate to YYYY-MM-DD when possible
+    cols["pubdate"] = normalize_pubdates(pubdates).tolist()
+    return cols
+
+
+def _esummary(pmids: List[str], cfg: Optional[HttpConfig] = None) -> Dict[str, Any]:
+    """esummary ``result`` for one chunk of PMIDs (POSTed above POST_ID_THRESHOLD)."""
+    params = eutils_params(cfg, db="pubmed", id=",".join(pmids), retmode="json")
+    if len(pmids) <= POST_ID_THRESHOLD:
+        return get_json(f"{EUTILS}/esummary.fcgi", params=params, cfg=cfg).get("result", {})
+    resp = request("POST", f"{EUTILS}/esummary.fcgi", data=params, cfg=cfg)
+    resp.raise_for_status()
+    return decode_json(resp).get("result", {})
+
+
+def fetch_pubmed_frame(pmids: List[str], cfg: Optional[HttpConfig] = None) -> pd.DataFrame:
+    """
+    Summaries for ``pmids`` as a DataFrame of SUMMARY_COLUMNS, in input order.
+    PMIDs go out SUMMARY_PAGE_SIZE per esummary request, up to SUMMARY_WORKERS
+    requests at a time.
+    """
+    chunks = [pmids[i:i + SUMMARY_PAGE_SIZE] for i in range(0, len(pmids), SUMMARY_PAGE_SIZE)]
+    if len(chunks) > 1:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(SUMMARY_WORKERS, len(chunks)),
+                                                   thread_name_prefix="curio-esummary") as pool:
+            results = list(pool.map(lambda chunk: _esummary(chunk, cfg=cfg), chunks))
+    else:
+        results = [_esummary(chunk, cfg=cfg) for chunk in chunks]
+    merged: Dict[str, Any] = {}
+    for result in results:
+        merged.update(result)
+    return pd.DataFrame(_summary_columns(merged, pmids), columns=list(SUMMARY_COLUMNS), dtype="string")
+
+
+def fetch_pubmed_summaries(pmids: List[str], cfg: Optional[HttpConfig] = None) -> List[Dict[str, Any]]:
+    """Return summaries with fields: pmid, title, journal, pubdate (YYYY-MM-DD), doi, link."""
+    if not pmids:
+        return []
+    df = fetch_pubmed_frame(pmids, cfg=cfg).astype(object).where(lambda d: d.notna(), None)
+    return df.to_dict("records")
+
+
+# Paged search through the history server
+
+@dataclass
+class PubMedCursor:
+    """
+    Resumable position in a PubMed result set held on the E-utilities history
+    server. Generators advance ``retstart`` page by page; pass the cursor back
+    in to continue. An expired WebEnv is re-opened with the same query. Only
+    the first ``RETRIEVAL_LIMIT`` of ``count`` records can be paged through
+    (``retrievable``); ``truncated`` tells when that cuts the result set short.
+    """
+    query: str
+    sort: str = "pubdate"
+    count: int = 0
+    retstart: int = 0
+    webenv: str = ""
+    query_key: str = ""
+
+    @property
+    def retrievable(self) -> int:
+        return min(self.count, RETRIEVAL_LIMIT)
+
+    @property
+    def truncated(self) -> bool:
+        return self.count > RETRIEVAL_LIMIT
+
+    @property
+    def exhausted(self) -> bool:
+        return bool(self.webenv) and self.retstart >= self.retrievable
+
+
+def open_pubmed_search(query: Union[str, PubMedCursor], sort: str = "pubdate",
+                       cfg: Optional[HttpConfig] = None) -> PubMedCursor:
+    """Run an esearch with ``usehistory=y`` and return a cursor on its result set (no PMIDs yet)."""
+    cursor = query if isinstance(query, PubMedCursor) else PubMedCursor(query, sort=sort)
+    params = eutils_params(cfg, db="pubmed", term=cursor.query, sort=cursor.sort,
+                           usehistory="y", retmax=0, retmode="json")
+    res = get_json(f"{EUTILS}/esearch.fcgi", params=params, cfg=cfg).get("esearchresult") or {}
+    cursor.count = int(res.get("count") or 0)
+    cursor.webenv = res.get("webenv", "")
+    cursor.query_key = res.get("querykey", "")
+    log.info("PubMed search '%s' -> %d hits on the history server", cursor.query, cursor.count)
+    if cursor.truncated:
+        log.warning("PubMed search '%s' has %d hits; only the first %d can be retrieved",
+                    cursor.query, cursor.count, RETRIEVAL_LIMIT)
+    return cursor
+
+
+def _paged(query: Union[str, PubMedCursor], cap: Optional[int], page_size: int,
+           fetch: Callable[[PubMedCursor, int], Tuple[Any, int]],
+           cfg: Optional[HttpConfig]) -> Iterator[Any]:
+    cursor = query if isinstance(query, PubMedCursor) else PubMedCursor(query)
+    if not cursor.webenv:
+        open_pubmed_search(cursor, cfg=cfg)
+    end = cursor.retrievable if cap is None else min(cursor.retrievable, cursor.retstart + cap)
+    reopened = False
+    while cursor.retstart < end:
+        page, n = fetch(cursor, min(page_size, end - cursor.retstart))
+        if not n:
+            if reopened:
+                break
+            # WebEnvs expire after a few idle hours; a fresh search keeps the position
+            # (history-server requests are never cached, see http_cache.is_cacheable)
+            open_pubmed_search(cursor, cfg=cfg)
+            end = min(end, cursor.retrievable)
+            reopened = True
+            continue
+        reopened = False
+        cursor.retstart += n
+        yield page
+
+
+def iter_pubmed_ids(query: Union[str, PubMedCursor], cap: Optional[int] = None,
+                    page_size: int = ID_PAGE_SIZE, cfg: Optional[HttpConfig] = None) -> Iterator[List[str]]:
+    """
+    Yield pages of PMIDs for ``query`` (or a cursor to resume), sorted by
+    pubdate, ``page_size`` per efetch and at most ``cap`` in total. PubMed
+    stops at the first ``RETRIEVAL_LIMIT`` records (see ``PubMedCursor.truncated``).
+    """
+    def fetch(cursor: PubMedCursor, size: int) -> Tuple[List[str], int]:
+        params = eutils_params(cfg, db="pubmed", WebEnv=cursor.webenv, query_key=cursor.query_key,
+                               retstart=cursor.retstart, retmax=size, rettype="uilist", retmode="text")
+        ids = [line.strip() for line in get_text(f"{EUTILS}/efetch.fcgi", params=params, cfg=cfg).splitlines()
+               if line.strip().isdigit()]
+        return ids, len(ids)
+
+    return _paged(query, cap, page_size, fetch, cfg)
+
+
+def iter_pubmed_summaries(query: Union[str, PubMedCursor], cap: Optional[int] = None,
+                          page_size: int = SUMMARY_PAGE_SIZE,
+                          cfg: Optional[HttpConfig] = None) -> Iterator[pd.DataFrame]:
+    """
+    Yield summaries for ``query`` (or a cursor to resume) as DataFrames of
+    SUMMARY_COLUMNS, one per esummary page, at most ``cap`` rows in total.
+    """
+    def fetch(cursor: PubMedCursor, size: int) -> Tuple[pd.DataFrame, int]:
+        params = eutils_params(cfg, db="pubmed", WebEnv=cursor.webenv, query_key=cursor.query_key,
+                               retstart=cursor.retstart, retmax=size, retmode="json")
+        result = get_json(f"{EUTILS}/esummary.fcgi", params=params, cfg=cfg).get("result") or {}
+        uids = result.get("uids", [])
+        return pd.DataFrame(_summary_columns(result, uids), columns=list(SUMMARY_COLUMNS), dtype="string"), len(uids)
+
+    return _paged(query, cap, page_size, fetch, cfg)
+
+
+def collect_pubmed_summaries(query: Union[str, PubMedCursor], cap: Optional[int] = None,
+                             cfg: Optional[HttpConfig] = None) -> pd.DataFrame:
+    """All pages of ``iter_pubmed_summaries`` as one DataFrame."""
+    pages = list(iter_pubmed_summaries(query, cap=cap, cfg=cfg))
+    if not pages:
+        return pd.DataFrame(columns=list(SUMMARY_COLUMNS), dtype="string")
+    return pd.concat(pages, ignore_index=True)
+
+
+def _text(elem: Optional[ET.Element]) -> str:
+    return re.sub(r"\s+", " ", "".join(elem.itertext())).strip() if elem is not None else ""
+
+
+def _article_record(article: ET.Element) -> Dict[str, Any]:
+    """Structured record for one ``<PubmedArticle>`` / ``<PubmedBookArticle>`` element."""
+    sections = [{"label": a.get("Label") or a.get("NlmCategory") or "", "text": _text(a)}
+                for a in article.iterfind(".//Abstract/AbstractText")]
+    mesh = [d for d in article.iterfind(".//MeshHeadingList/MeshHeading")]
+    authors = []
+    for author in article.iterfind(".//AuthorList/Author"):
+        name = " ".join(p for p in (author.findtext("LastName"), author.findtext("Initials")) if p)
+        authors.append(name or _text(author.find("CollectiveName")))
+    date = article.find(".//JournalIssue/PubDate")
+    return {
+        "pmid": _text(article.find(".//PMID")),
+        "title": _text(article.find(".//ArticleTitle")) or _text(article.find(".//BookTitle")),
+        "journal": _text(article.find(".//Journal/Title")),
+        "year": _year_from_date(_text(date)) if date is not None else None,
+        "abstract": " ".join(sec["text"] for sec in sections if sec["text"]),
+        "abstract_sections": sections,
+        "mesh": [_text(h.find("DescriptorName")) for h in mesh],
+        "mesh_major": [_text(h.find("DescriptorName")) for h in mesh
+                       if any(e.get("MajorTopicYN") == "Y" for e in h)],
+        "keywords": [_text(k) for k in article.iterfind(".//KeywordList/Keyword")],
+        "authors": [a for a in authors if a],
+        "publication_types": [_text(t) for t in article.iterfind(".//PublicationTypeList/PublicationType")],
+    }
+
+
+def parse_pubmed_xml(chunks: Iterable[bytes]) -> Iterator[Dict[str, Any]]:
+    """
+    Incrementally parse PubMed efetch XML (bytes chunks) into article records;
+    each article's elements are dropped as soon as its record is yielded.
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root = None
+    for chunk in chunks:
+        parser.feed(chunk)
+        for event, elem in parser.read_events():
+            if event == "start":
+                if root is None:
+                    root = elem
+            elif elem.tag in ("PubmedArticle", "PubmedBookArticle"):
+                yield _article_record(elem)
+                root.clear()
+    parser.close()
+
+
+def iter_pubmed_articles(pmids: List[str], cfg: Optional[HttpConfig] = None,
+                         chunk_size: int = ARTICLE_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Yield full article records (abstract sections, MeSH headings, keywords,
+    authors, publication types) for ``pmids``: one POSTed efetch per
+    ``chunk_size`` PMIDs, parsed as the XML streams in. A failed chunk is
+    logged and skipped.
+    """
+    for i in range(0, len(pmids), chunk_size):
+        chunk = pmids[i:i + chunk_size]
+        params = eutils_params(cfg, db="pubmed", id=",".join(chunk), retmode="xml")
+        try:
+            yield from parse_pubmed_xml(iter_chunks(f"{EUTILS}/efetch.fcgi", method="POST", data=params, cfg=cfg))
+        except (requests.exceptions.RequestException, ET.ParseError) as e:
+            log.warning("PubMed efetch of %d PMIDs failed: %s", len(chunk), e)
+
+
+def fetch_pubmed_abstracts(pmids: List[str], cfg: Optional[HttpConfig] = None) -> Dict[str, str]:
+    """Abstract text per PMID via ``iter_pubmed_articles``; missing ones map to an empty string."""
+    out = {pmid: "" for pmid in pmids}
+    for record in iter_pubmed_articles(pmids, cfg=cfg):
+        if record["pmid"] in out:
+            out[record["pmid"]] = record["abstract"]
     return out
 
 
 def fetch_pubmed_abstract(pmid: str, cfg: Optional[HttpConfig] = None) -> str:
     """Return abstract text (may be empty)."""
-    cfg = cfg or HttpConfig()
-    sess = make_session(cfg)
-    xml = get_text(f"{EUTILS}/efetch.fcgi", params={"db": "pubmed", "id": pmid, "retmode": "xml"}, session=sess, cfg=cfg)
+    params = eutils_params(cfg, db="pubmed", id=pmid, retmode="xml")
+    xml = get_text(f"{EUTILS}/efetch.fcgi", params=params, cfg=cfg)
     # Very light XML scrape to avoid heavy deps
     m = re.findall(r"<AbstractText[^>]*>(.*?)</AbstractText>", xml, flags=re.S)
     text = " ".join(_strip_xml_tags(t).strip() for t in m).strip()
     return re.sub(r"\s+", " ", text)
 
 
-def plot_trend(records: List[Dict[str, Any]], years: int = 10) -> Figure:
+def plot_trend(records: Union[List[Dict[str, Any]], pd.DataFrame], years: int = 10) -> Figure:
     """Return a matplotlib Figure: publications per year over the past `years`."""
     this_year = datetime.utcnow().year
     bins = list(range(this_year - years + 1, this_year + 1))
     counts = {y: 0 for y in bins}
-    for r in records:
-        d = r.get("pubdate") or ""
+    dates = records["pubdate"].fillna("") if isinstance(records, pd.DataFrame) else \
+        [r.get("pubdate") or "" for r in records]
+    for d in dates:
         y = _year_from_date(d)
         if y in counts:
             counts[y] += 1
@@ -109,6 +353,21 @@ def extract_keywords(abstracts: List[str], topk: int = 25) -> List[Tuple[str, in
     return cnt.most_common(topk)
 
 
+def normalize_pubdates(dates: Iterable[str]) -> pd.Series:
+    """
+    Vectorized ``_normalize_pubdate``: ``sortpubdate`` strings ("2021/03/04 00:00")
+    parse in one ``to_datetime`` pass, anything else once per distinct value.
+    """
+    raw = pd.Series(list(dates), dtype="string").fillna("").str.strip()
+    parsed = pd.to_datetime(raw, format=SORTPUBDATE_FORMAT, errors="coerce")
+    out = parsed.dt.strftime("%Y-%m-%d").astype("string")
+    rest = out.isna()
+    if rest.any():
+        out[rest] = raw[rest].map(_normalize_pubdate)
+    return out
+
+
+@lru_cache(maxsize=65536)
 def _normalize_pubdate(s: str) -> str:
     # Try common formats else return original
     s = s.strip()
@@ -0,0 +1,110 @@
+# curio/rate_limit.py
+"""
+Per-host token-bucket rate limiting for CURIO API calls.
+
+Buckets hand out reservations: a caller that finds the bucket empty is told
+how long until its token is available and sleeps outside the lock, so
+concurrent threads queue fairly at exactly the configured rate. The shared
+variant keeps bucket state in SQLite so every Streamlit worker process on the
+machine draws from the same budget.
+"""
+
+from __future__ import annotations
+import math
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Union
+
+from . import get_logger
+
+log = get_logger("rate_limit")
+
+DEFAULT_RATE_LIMIT_PATH = Path(__file__).resolve().parent / "cache" / "rate_limits.sqlite"
+
+
+class TokenBucket:
+    """Thread-safe in-process token bucket.
+
+    Args:
+        rate: tokens (requests) added per second.
+        burst: bucket capacity; defaults to ``ceil(rate)``.
+    """
+
+    def __init__(self, rate: float, burst: int = 0) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.burst = burst or max(1, math.ceil(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until it is available. Returns seconds waited."""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class SharedTokenBucket:
+    """Token bucket whose state lives in SQLite, shared across processes.
+
+    ``BEGIN IMMEDIATE`` takes the database write lock, so reservations from
+    different processes are serialized by SQLite itself.
+    """
+
+    def __init__(self, path: Union[str, Path], name: str, rate: float, burst: int = 0) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.path = Path(path)
+        self.name = name
+        self.rate = float(rate)
+        self.burst = burst or max(1, math.ceil(rate))
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30,
+                                     isolation_level=None, check_same_thread=False)
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets "
+                "(name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def _reserve(self) -> float:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)
+                ).fetchone()
+                now = time.time()
+                tokens = float(self.burst) if row is None else \
+                    min(self.burst, row[0] + max(0.0, now - row[1]) * self.rate)
+                tokens -= 1
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                    (self.name, tokens, now),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return 0.0 if tokens >= 0 else -tokens / self.rate
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until it is available. Returns seconds waited."""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
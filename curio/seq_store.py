@@ -0,0 +1,324 @@
+# curio/seq_store.py
+"""
+Local FASTA sequence store for CURIO.
+
+Fetched sequences are appended, 60 residues per line, to one FASTA file
+with a samtools-compatible ``.fai`` index (NAME, LENGTH, OFFSET, LINEBASES,
+LINEWIDTH), so the file can also be opened with ``samtools faidx`` or
+pyfaidx. Reads go through ``mmap`` and only touch the requested bytes; a
+name already in the store is never written twice. Records appended by other
+processes are picked up from the ``.fai`` on the next lookup; appends
+themselves are not locked across processes, so keep to one writing process
+at a time. Existing FASTA files, plain, gzip or bgzip, can be imported as a
+stream, and the store can be exported bgzip-compressed (BGZF), ready for
+``samtools faidx``.
+"""
+
+from __future__ import annotations
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from . import get_logger
+from .id_index import open_text
+from .net_utils import HttpConfig
+
+log = get_logger("seq_store")
+
+DEFAULT_STORE_PATH = Path(__file__).resolve().parent / "cache" / "sequences.fa"
+
+LINE_BASES = 60
+
+_VERSION = re.compile(r"\.\d+$")
+
+# BGZF (bgzip) blocks hold at most this much input; the empty block marks end of file
+BGZF_BLOCK_SIZE = 0xFF00
+BGZF_EOF = bytes.fromhex("1f8b08040000000000ff0600424302001b0003000000000000000000")
+
+
+class FaiEntry(NamedTuple):
+    length: int
+    offset: int
+    line_bases: int
+    line_width: int
+
+
+def record_name(header: str) -> str:
+    """Key for a FASTA header: the accession of ``>sp|P04637|P53_HUMAN ...``, else the first word."""
+    words = header.lstrip(">").split(None, 1)
+    token = words[0] if words else ""
+    parts = token.split("|")
+    return parts[1] if len(parts) > 2 and parts[1] else token
+
+
+def iter_fasta(lines: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """Yield ``(header, sequence)`` pairs from FASTA text lines."""
+    header: Optional[str] = None
+    seq: List[str] = []
+    for line in lines:
+        line = line.strip()
+        if line.startswith(">"):
+            if header is not None:
+                yield header, "".join(seq)
+            header, seq = line, []
+        elif line and header is not None:
+            seq.append(line)
+    if header is not None:
+        yield header, "".join(seq)
+
+
+def _bgzf_block(data: bytes) -> bytes:
+    """One BGZF block: a gzip member whose "BC" extra field records its own size."""
+    deflate = zlib.compressobj(6, zlib.DEFLATED, -15)
+    cdata = deflate.compress(data) + deflate.flush()
+    if len(cdata) + 25 > 0xFFFF:
+        # Incompressible input can outgrow a block; split it
+        half = len(data) // 2
+        return _bgzf_block(data[:half]) + _bgzf_block(data[half:])
+    header = struct.pack("<4BI2BH2BHH", 31, 139, 8, 4, 0, 0, 255, 6, 66, 67, 2, len(cdata) + 25)
+    return header + cdata + struct.pack("<II", zlib.crc32(data), len(data))
+
+
+class SequenceStore:
+    """Append-only FASTA file + ``.fai`` index with mmap random access. Thread-safe."""
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_STORE_PATH) -> None:
+        self.path = Path(path)
+        self.fai_path = self.path.with_name(self.path.name + ".fai")
+        self._lock = threading.Lock()
+        self._index: Dict[str, FaiEntry] = {}
+        self._aliases: Dict[str, str] = {}  # unversioned/upper-case name -> stored name
+        self._map: Optional[mmap.mmap] = None
+        self._mapped = 0
+        self._fai_seen: Tuple[int, int] = (0, 0)  # (inode, bytes read) of the .fai
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.touch(exist_ok=True)
+        if self.fai_path.exists() and self.fai_path.stat().st_mtime >= self.path.stat().st_mtime:
+            self._load_fai()
+        else:
+            self.reindex()
+
+    # Index
+
+    def _load_fai(self) -> None:
+        """Read ``.fai`` lines not seen yet; a replaced or truncated file is read from the start."""
+        try:
+            st = os.stat(self.fai_path)
+        except FileNotFoundError:
+            return
+        inode, seen = self._fai_seen
+        if st.st_ino == inode and st.st_size == seen:
+            return
+        if st.st_ino != inode or st.st_size < seen:
+            self._index, self._aliases, seen = {}, {}, 0
+        with open(self.fai_path, "rb") as fh:
+            fh.seek(seen)
+            data = fh.read()
+        complete = data[:data.rfind(b"\n") + 1]  # a line still being written is read next time
+        for line in complete.decode("utf-8").splitlines():
+            name, length, offset, bases, width = line.split("\t")[:5]
+            self._index[name] = FaiEntry(int(length), int(offset), int(bases), int(width))
+            self._alias(name)
+        self._fai_seen = (st.st_ino, seen + len(complete))
+
+    def refresh(self) -> None:
+        """Pick up records that another process appended to the store."""
+        with self._lock:
+            self._load_fai()
+
+    def _alias(self, name: str) -> None:
+        self._aliases.setdefault(_VERSION.sub("", name.upper()), name)
+
+    def reindex(self) -> None:
+        """Rebuild the ``.fai`` by scanning the FASTA file (lines must be uniform per record)."""
+        index: Dict[str, FaiEntry] = {}
+        with open(self.path, "rb") as fh:
+            offset = 0
+            name = None
+            length = bases = width = 0
+            for raw in fh:
+                offset += len(raw)
+                if raw.startswith(b">"):
+                    if name is not None:
+                        index[name] = FaiEntry(length, start, bases, width)
+                    name = record_name(raw.decode("utf-8"))
+                    start, length, bases, width = offset, 0, 0, 0
+                elif name is not None and raw.strip():
+                    if not bases:
+                        bases, width = len(raw.rstrip(b"\r\n")), len(raw)
+                    length += len(raw.rstrip(b"\r\n"))
+            if name is not None:
+                index[name] = FaiEntry(length, start, bases, width)
+        with self._lock:
+            self._index = index
+            self._aliases = {}
+            for name in index:
+                self._alias(name)
+            # Replaced, not rewritten in place, so other processes see a new file and re-read it
+            fd, tmp = tempfile.mkstemp(dir=self.fai_path.parent, prefix=self.fai_path.name + ".")
+            with open(fd, "w", encoding="utf-8") as fh:
+                fh.writelines(f"{n}\t{e.length}\t{e.offset}\t{e.line_bases}\t{e.line_width}\n"
+                              for n, e in index.items())
+            os.replace(tmp, self.fai_path)
+            st = os.stat(self.fai_path)
+            self._fai_seen = (st.st_ino, st.st_size)
+
+    def __contains__(self, name: str) -> bool:
+        self.refresh()
+        return name in self._index
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self._index)
+
+    def names(self) -> List[str]:
+        self.refresh()
+        return list(self._index)
+
+    def resolve(self, identifier: str) -> Optional[str]:
+        """Stored name for ``identifier``, ignoring case and a missing/different ``.version``."""
+        self.refresh()
+        identifier = identifier.strip()
+        if identifier in self._index:
+            return identifier
+        return self._aliases.get(_VERSION.sub("", identifier.upper()))
+
+    # Writes
+
+    def add(self, header: str, sequence: str) -> bool:
+        """Append one record; returns False (and writes nothing) if its name is already stored."""
+        header = header if header.startswith(">") else f">{header}"
+        name = record_name(header)
+        sequence = "".join(sequence.split())
+        if not name or not sequence:
+            return False
+        with self._lock:
+            self._load_fai()
+            if name in self._index:
+                return False
+            with open(self.path, "ab") as fh:
+                head = (header.rstrip() + "\n").encode("utf-8")
+                offset = fh.tell() + len(head)
+                body = "".join(sequence[i:i + LINE_BASES] + "\n" for i in range(0, len(sequence), LINE_BASES))
+                fh.write(head + body.encode("ascii"))
+            bases = min(LINE_BASES, len(sequence))
+            entry = FaiEntry(len(sequence), offset, bases, bases + 1)
+            with open(self.fai_path, "a", encoding="utf-8") as fh:
+                fh.write(f"{name}\t{entry.length}\t{entry.offset}\t{entry.line_bases}\t{entry.line_width}\n")
+            self._index[name] = entry
+            self._alias(name)
+        return True
+
+    def add_fasta(self, text: str) -> List[str]:
+        """Store every record of a FASTA string; returns the record names (new or not)."""
+        names = []
+        for header, seq in iter_fasta(text.splitlines()):
+            self.add(header, seq)
+            names.append(record_name(header))
+        return names
+
+    def import_fasta(self, source: Union[str, Path]) -> int:
+        """Stream a plain, gzip or bgzip FASTA file into the store; returns records added."""
+        with open_text(source) as fh:
+            added = sum(self.add(header, seq) for header, seq in iter_fasta(fh))
+        log.info("Imported %d new sequences from %s", added, source)
+        return added
+
+    def export(self, dest: Union[str, Path], compress: bool = True) -> Path:
+        """
+        Copy the store to ``dest``, bgzip-compressed (BGZF) when ``compress``:
+        any gzip reader can read it, and ``samtools faidx`` can index it and
+        read regions from it without decompressing the rest.
+        """
+        dest = Path(dest)
+        with self._lock, open(self.path, "rb") as src, open(dest, "wb") as out:
+            if not compress:
+                for block in iter(lambda: src.read(1 << 20), b""):
+                    out.write(block)
+                return dest
+            for block in iter(lambda: src.read(BGZF_BLOCK_SIZE), b""):
+                out.write(_bgzf_block(block))
+            out.write(BGZF_EOF)
+        return dest
+
+    # Reads
+
+    def _mapped_bytes(self, end: int) -> mmap.mmap:
+        if self._map is None or end > self._mapped:
+            # Remap after appends; the old map is left to readers still holding it
+            with self._lock:
+                with open(self.path, "rb") as fh:
+                    self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+                self._mapped = len(self._map)
+        return self._map
+
+    def fetch(self, name: str, start: int = 0, end: Optional[int] = None) -> Optional[str]:
+        """Residues ``[start, end)`` (0-based) of ``name``, or None if not stored."""
+        entry = self._index.get(name)
+        if entry is None:
+            self.refresh()
+            entry = self._index.get(name)
+        if entry is None:
+            return None
+        end = entry.length if end is None else min(end, entry.length)
+        if start >= end:
+            return ""
+        lb, lw = entry.line_bases, entry.line_width
+        first = entry.offset + (start // lb) * lw + start % lb
+        last = entry.offset + ((end - 1) // lb) * lw + (end - 1) % lb + 1
+        raw = self._mapped_bytes(last)[first:last]
+        return raw.replace(b"\n", b"").replace(b"\r", b"").decode("ascii")
+
+    def header(self, name: str) -> Optional[str]:
+        """The stored header line (without newline) of ``name``."""
+        self.refresh()
+        entry = self._index.get(name)
+        if entry is None:
+            return None
+        data = self._mapped_bytes(entry.offset)
+        begin = data.rfind(b"\n>", 0, entry.offset) + 1
+        return data[begin:entry.offset].rstrip(b"\r\n").decode("utf-8")
+
+    def get_fasta(self, name: str) -> Optional[str]:
+        """The record as FASTA text, as it was stored."""
+        self.refresh()
+        entry = self._index.get(name)
+        if entry is None:
+            return None
+        header = self.header(name)
+        seq = self.fetch(name)
+        return header + "\n" + "".join(seq[i:i + LINE_BASES] + "\n" for i in range(0, len(seq), LINE_BASES))
+
+    def stats(self) -> Dict[str, Union[int, str]]:
+        return {"path": str(self.path), "sequences": len(self._index),
+                "bytes": self.path.stat().st_size if self.path.exists() else 0}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+                self._mapped = 0
+
+
+_STORES: Dict[str, SequenceStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_store(cfg: Optional[HttpConfig] = None) -> Optional[SequenceStore]:
+    """Shared store for ``cfg``, or None unless ``cfg.sequence_store_enabled``."""
+    cfg = cfg or HttpConfig()
+    if not cfg.sequence_store_enabled:
+        return None
+    path = os.fspath(cfg.sequence_store_path or DEFAULT_STORE_PATH)
+    with _STORES_LOCK:
+        store = _STORES.get(path)
+        if store is None:
+            store = _STORES[path] = SequenceStore(path)
+        return store
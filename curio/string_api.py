@@ -1,7 +1,7 @@
 from __future__ import annotations
 from typing import List, Dict, Optional
 
-from .net_utils import get_json, HttpConfig, make_session
+from .net_utils import get_json, HttpConfig
 from . import get_logger
 
 log = get_logger("string")
@@ -26,15 +26,13 @@ def fetch_interactions(
     Returns:
         A list of interaction records with scores and partner info.
     """
-    cfg = cfg or HttpConfig()
-    sess = make_session(cfg)
     url = f"{BASE}/network"
     params = {
         "identifiers": gene,
         "species": species,
         "limit": limit,
     }
-    js = get_json(url, params=params, session=sess, cfg=cfg)
+    js = get_json(url, params=params, cfg=cfg)
     if not js:
         log.warning("No STRING data for %s (species %s)", gene, species)
     else:
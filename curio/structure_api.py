@@ -1,16 +1,22 @@
 # curio/structure_api.py
 
+import concurrent.futures
 import logging
-import requests   
 import re
-from typing import List, Optional, Dict, Any
+import threading
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import List, Optional, Dict, Any, Union
 
+from .id_index import local_accession, local_pdb_ids
 from .net_utils import (
+    DeadlineExceeded,
     HttpConfig,
-    make_session,
     get_json,
     get_text,
-    post_json,  
+    post_json,
+    download_to_file,
 )
 
 log = logging.getLogger(__name__)
@@ -25,84 +31,170 @@ UNIPROT_XREF_URL = "https://rest.uniprot.org/uniprotkb"
 
 # Functions
 
-def resolve_query_to_pdb_ids(query: str, max_hits: int = 12,
-                             cfg: Optional[HttpConfig] = None) -> List[str]:
+# Search strategies raced by ``search_pdb_ids``, best first.
+STRATEGIES = ("rcsb_text", "uniprot_xref")
+
+
+class _Cancelled(Exception):
+    """A losing strategy noticed it was cancelled between requests."""
+
+
+@dataclass
+class PdbSearchResult:
+    """PDB IDs for a query plus the strategy that produced them."""
+    ids: List[str]
+    strategy: Optional[str]  # "pdb_id", one of STRATEGIES, or None if nothing matched
+    elapsed: float
+
+
+def _budget(cfg: HttpConfig, deadline_at: float, cancel: threading.Event) -> HttpConfig:
+    """Copy of ``cfg`` whose deadline is whatever is left of the overall budget."""
+    if cancel.is_set():
+        raise _Cancelled()
+    remaining = deadline_at - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded("Structure search deadline exceeded")
+    return replace(cfg, deadline_seconds=min(remaining, cfg.deadline_seconds or remaining))
+
+
+def _search_rcsb_text(query: str, max_hits: int, cfg: HttpConfig,
+                      deadline_at: float, cancel: threading.Event,
+                      organism: Optional[str] = None) -> List[str]:
+    free_payload = {
+        "query": {
+            "type": "terminal",
+            "service": "text",
+            "parameters": {
+                "attribute": "struct.title",
+                "operator": "contains_phrase",
+                "value": query
+            }
+        },
+        "return_type": "entry",
+        "request_options": {
+            "pager": {"start": 0, "rows": max_hits},
+            "results_content_type": ["experimental"],
+            "sort": [{"sort_by": "score", "direction": "desc"}],
+        }
+    }
+    data = post_json(SEARCH_URL, json=free_payload, cfg=_budget(cfg, deadline_at, cancel))
+    return [x["identifier"] for x in data.get("result_set", [])]
+
+
+def _search_uniprot_xref(query: str, max_hits: int, cfg: HttpConfig,
+                         deadline_at: float, cancel: threading.Event,
+                         organism: Optional[str] = None) -> List[str]:
+    # 0. The local ID-mapping index may already know the accession and its PDB entries
+    accession = local_accession(query, organism)
+    if accession:
+        pdb_ids = local_pdb_ids(accession)
+        if pdb_ids:
+            return pdb_ids[:max_hits]
+        xdata = get_json(f"{UNIPROT_XREF_URL}/{accession}/database/PDB", cfg=_budget(cfg, deadline_at, cancel))
+        return [item["id"] for item in xdata.get("results", []) if "id" in item][:max_hits]
+
+    # 1. Find UniProt accession for this gene/protein
+    uquery = f'{query} AND organism_name:"{organism}"' if organism else query
+    uparams = {"query": uquery, "fields": "accession", "size": 1, "format": "json"}
+    udata = get_json(UNIPROT_SEARCH_URL, params=uparams, cfg=_budget(cfg, deadline_at, cancel))
+    if not udata.get("results"):
+        return []
+    accession = udata["results"][0]["primaryAccession"]
+
+    # 2. Get PDB cross-references from UniProt
+    xref_url = f"{UNIPROT_XREF_URL}/{accession}/database/PDB"
+    xdata = get_json(xref_url, cfg=_budget(cfg, deadline_at, cancel))
+    return [item["id"] for item in xdata.get("results", []) if "id" in item][:max_hits]
+
+
+_STRATEGY_FUNCS = {
+    "rcsb_text": _search_rcsb_text,
+    "uniprot_xref": _search_uniprot_xref,
+}
+
+
+def search_pdb_ids(query: str, max_hits: int = 12,
+                   cfg: Optional[HttpConfig] = None,
+                   deadline_seconds: Optional[float] = None,
+                   organism: Optional[str] = None) -> PdbSearchResult:
     """
-    Resolve a user query (PDB ID, gene symbol, protein name) to a list of valid RCSB PDB IDs.
-    Priority:
-      1. Direct 4-char PDB ID
-      2. RCSB REST Search API
-      3. RCSB GraphQL free-text Search
-      4. UniProt cross-reference mapping
+    Resolve a query to PDB IDs by racing the search strategies concurrently.
+
+    RCSB free-text search and the UniProt accession -> PDB cross-reference
+    path start together and share one overall deadline (``deadline_seconds``,
+    else ``cfg.deadline_seconds``, else ``cfg.timeout``). The best-priority
+    strategy (see ``STRATEGIES``) that returns IDs in time wins; lower-priority
+    results are only used once every better strategy has failed or come back
+    empty. Losers are cancelled: queued work is dropped and running work stops
+    before its next request. ``organism`` narrows the UniProt accession lookup.
     """
+    started = time.monotonic()
+    cfg = cfg or HttpConfig()
     query = query.strip()
     if not query:
-        return []
+        return PdbSearchResult([], None, 0.0)
 
     # If the query already looks like a PDB ID (4 chars alphanumeric)
     if re.match(r"^[0-9][A-Za-z0-9]{3}$", query):
-        return [query.upper()]
+        return PdbSearchResult([query.upper()], "pdb_id", 0.0)
 
-    headers = {"Content-Type": "application/json"}
-    if cfg and cfg.headers:
-        headers.update(cfg.headers)
+    budget = deadline_seconds or cfg.deadline_seconds or cfg.timeout
+    deadline_at = started + budget
+    cancel = threading.Event()
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=len(STRATEGIES),
+                                                 thread_name_prefix="curio-pdb-search")
+    futures = {name: pool.submit(_STRATEGY_FUNCS[name], query, max_hits, cfg, deadline_at, cancel, organism)
+               for name in STRATEGIES}
+    outcomes: Dict[str, List[str]] = {}
 
-    # --- Primary: JSON search API ---
-        # --- Fallback: RCSB JSON free-text search ---
-    try:
-        free_payload = {
-            "query": {
-                "type": "terminal",
-                "service": "text",
-                "parameters": {
-                    "attribute": "struct.title",
-                    "operator": "contains_phrase",
-                    "value": query
-                }
-            },
-            "return_type": "entry",
-            "request_options": {
-                "pager": {"start": 0, "rows": max_hits},
-                "results_content_type": ["experimental"],
-                "sort": [{"sort_by": "score", "direction": "desc"}],
-            }
-        }
-        r2 = requests.post(SEARCH_URL, json=free_payload, headers=headers,
-                           timeout=(cfg.timeout_seconds if cfg else 15))
-        r2.raise_for_status()
-        data2 = r2.json()
-        ids = [x["identifier"] for x in data2.get("result_set", [])]
-        if ids:
-            return ids
-    except Exception as e:
-        log.warning("Free-text search failed for %s: %s", query, e)
-    #  Fallback: UniProt cross-reference search 
+    def _outcome(name: str) -> List[str]:
+        if name not in outcomes:
+            try:
+                outcomes[name] = futures[name].result()
+            except Exception as e:
+                log.warning("PDB search strategy %s failed for %s: %s", name, query, e)
+                outcomes[name] = []
+        return outcomes[name]
+
+    winner: Optional[str] = None
     try:
-        # 1. Find UniProt accession for this gene/protein
-        uparams = {"query": query, "fields": "accession", "size": 1, "format": "json"}
-        uresp = requests.get(UNIPROT_SEARCH_URL, params=uparams,
-                             timeout=(cfg.timeout_seconds if cfg else 15))
-        uresp.raise_for_status()
-        udata = uresp.json()
-        if not udata.get("results"):
-            return []
-        accession = udata["results"][0]["primaryAccession"]
-
-        # 2. Get PDB cross-references from UniProt
-        xref_url = f"{UNIPROT_XREF_URL}/{accession}/database/PDB"
-        xresp = requests.get(xref_url, timeout=(cfg.timeout_seconds if cfg else 15))
-        xresp.raise_for_status()
-        xdata = xresp.json()
-
-        pdb_ids = []
-        for item in xdata.get("results", []):
-            if "id" in item:
-                pdb_ids.append(item["id"])
-        if pdb_ids:
-            return pdb_ids[:max_hits]
-    except Exception as e:
-        log.error("UniProt cross-ref lookup failed for %s: %s", query, e)
-    return []
+        pending = set(futures.values())
+        while True:
+            # The first strategy, in priority order, that is still running or has IDs decides.
+            leader = next((n for n in STRATEGIES if not futures[n].done() or _outcome(n)), None)
+            if leader is None or futures[leader].done():
+                winner = leader
+                break
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                # Deadline hit: take the best strategy that did finish with IDs.
+                winner = next((n for n in STRATEGIES if futures[n].done() and _outcome(n)), None)
+                break
+            _, pending = concurrent.futures.wait(pending, timeout=remaining,
+                                                 return_when=concurrent.futures.FIRST_COMPLETED)
+    finally:
+        cancel.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    elapsed = time.monotonic() - started
+    if winner is None:
+        log.warning("No PDB entries found for %s within %.1fs", query, budget)
+        return PdbSearchResult([], None, elapsed)
+    log.info("PDB search for %s won by %s in %.2fs", query, winner, elapsed)
+    return PdbSearchResult(outcomes[winner][:max_hits], winner, elapsed)
+
+
+def resolve_query_to_pdb_ids(query: str, max_hits: int = 12,
+                             cfg: Optional[HttpConfig] = None) -> List[str]:
+    """
+    Resolve a user query (PDB ID, gene symbol, protein name) to a list of valid RCSB PDB IDs.
+    Priority:
+      1. Direct 4-char PDB ID
+      2. RCSB free-text search
+      3. UniProt cross-reference mapping
+    Strategies 2 and 3 run concurrently under one deadline (see ``search_pdb_ids``).
+    """
+    return search_pdb_ids(query, max_hits=max_hits, cfg=cfg).ids
 
 
 def fetch_entry_summary(pdb_id: str,
@@ -110,12 +202,9 @@ def fetch_entry_summary(pdb_id: str,
     """
     Fetch metadata summary for a given PDB entry.
     """
-    cfg = cfg or HttpConfig()
-    sess = make_session(cfg)
-
     url = f"{SUMMARY_URL}/{pdb_id}"
     try:
-        return get_json(url, session=sess, cfg=cfg)
+        return get_json(url, cfg=cfg)
     except Exception as e:
         log.error("Failed to fetch summary for %s: %s", pdb_id, str(e))
         return None
@@ -126,17 +215,31 @@ def fetch_pdb_file(pdb_id: str,
     """
     Download a PDB structure file as text.
     """
-    cfg = cfg or HttpConfig()
-    sess = make_session(cfg)
-
     url = f"{PDB_FILE_URL}/{pdb_id}.pdb"
     try:
-        return get_text(url, session=sess, cfg=cfg)
+        return get_text(url, cfg=cfg)
     except Exception as e:
         log.error("Failed to fetch PDB file for %s: %s", pdb_id, str(e))
         return None
 
 
+def download_pdb_file(pdb_id: str,
+                      dest_dir: Union[str, Path],
+                      cfg: Optional[HttpConfig] = None,
+                      compressed: bool = True) -> Optional[Path]:
+    """
+    Stream a PDB structure file to ``dest_dir/{pdb_id}.pdb`` without holding it in memory.
+    By default the gzipped file is transferred and decompressed on the fly.
+    """
+    suffix = ".pdb.gz" if compressed else ".pdb"
+    url = f"{PDB_FILE_URL}/{pdb_id}{suffix}"
+    try:
+        return download_to_file(url, Path(dest_dir) / f"{pdb_id}.pdb", cfg=cfg, gunzip=compressed).path
+    except Exception as e:
+        log.error("Failed to download PDB file for %s: %s", pdb_id, str(e))
+        return None
+
+
 # NEW: Label Parsing
 
 def parse_pdb_metadata(pdb_text: str) -> Dict[str, Any]:
@@ -0,0 +1,218 @@
+# curio/telemetry.py
+"""
+In-process HTTP telemetry for CURIO.
+
+Every logical request made through ``net_utils`` is recorded per upstream
+host and endpoint template (IDs in the path are collapsed to ``{id}``):
+request counts by status, latency histogram and percentiles, bytes in/out,
+retries, errors and response-cache outcomes. Data is available as a Python
+snapshot, JSON, or Prometheus text exposition.
+"""
+
+from __future__ import annotations
+import bisect
+import json
+import re
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Histogram bucket upper bounds, in seconds (Prometheus "le" labels).
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+# Number of recent latencies kept per endpoint for percentile estimates.
+SAMPLE_SIZE = 1024
+
+_VERSION_SEGMENT = re.compile(r"^v\d+$")
+
+# Known API routes per host. "{id}" stands for one path segment (gene symbol,
+# accession, PDB ID, KEGG ID, ...) whatever its spelling, so label cardinality
+# stays bounded; literal routes are listed before the "{id}" ones they shadow.
+# Paths on other hosts fall back to collapsing segments that contain digits.
+ROUTES: Dict[str, Tuple[str, ...]] = {
+    "rest.uniprot.org": ("/uniprotkb/search", "/uniprotkb/stream",
+                         "/uniprotkb/{id}", "/uniprotkb/{id}/database/PDB"),
+    "rest.kegg.jp": ("/find/genes/{id}", "/get/{id}", "/link/pathway/{id}"),
+    "data.rcsb.org": ("/rest/v1/core/entry/{id}",),
+    "files.rcsb.org": ("/download/{id}",),
+}
+
+
+def _id_segment(seg: str) -> str:
+    _, dot, ext = seg.partition(".")
+    return "{id}" + (dot + ext if ext[:1].isalpha() else "")
+
+
+def _template_segment(seg: str) -> str:
+    if not any(c.isdigit() for c in seg) or _VERSION_SEGMENT.match(seg):
+        return seg
+    return _id_segment(seg)
+
+
+def _route_template(host: str, segments: List[str]) -> Optional[str]:
+    for route in ROUTES.get(host, ()):
+        parts = route.split("/")
+        if len(parts) == len(segments) and all(p == "{id}" or p == s for p, s in zip(parts, segments)):
+            return "/".join(_id_segment(s) if p == "{id}" else p for p, s in zip(parts, segments))
+    return None
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def endpoint_template(url: str) -> Tuple[str, str]:
+    """Return ``(host, path template)`` with ID path segments collapsed.
+
+    Paths matching a ``ROUTES`` entry use its template, so
+    ``https://rest.kegg.jp/get/hsa:APP`` becomes ``("rest.kegg.jp", "/get/{id}")``;
+    elsewhere only segments containing digits are collapsed. File extensions
+    are kept, so ``/download/1TUP.pdb.gz`` becomes ``/download/{id}.pdb.gz``.
+    """
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    segments = parts.path.split("/")
+    path = _route_template(host, segments) or "/".join(_template_segment(seg) for seg in segments)
+    return host, path or "/"
+
+
+class EndpointStats:
+    """Counters and latency distribution for one (host, endpoint, method)."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.latency_sum = 0.0
+        self.statuses: Counter = Counter()
+        self.cache: Counter = Counter()
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.samples: Deque[float] = deque(maxlen=SAMPLE_SIZE)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        idx = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+        return ordered[idx]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "error_rate": (self.errors / self.count) if self.count else 0.0,
+            "retries": self.retries,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "latency_mean": (self.latency_sum / self.count) if self.count else None,
+            "latency_p50": self.percentile(0.50),
+            "latency_p95": self.percentile(0.95),
+            "latency_p99": self.percentile(0.99),
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items(), key=lambda kv: str(kv[0]))},
+            "cache": dict(self.cache),
+        }
+
+
+class Telemetry:
+    """Thread-safe registry of ``EndpointStats`` keyed by host/endpoint/method."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str, str], EndpointStats] = {}
+        self.started_at = time.time()
+
+    def _get(self, url: str, method: str) -> EndpointStats:
+        host, endpoint = endpoint_template(url)
+        key = (host, endpoint, method.upper())
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = EndpointStats()
+        return stats
+
+    def record_request(self, url: str, method: str, status: Optional[int], latency: float,
+                       bytes_in: int = 0, bytes_out: int = 0, retries: int = 0,
+                       error: Optional[str] = None) -> None:
+        """Record one logical request (after retries). ``status`` is None on exceptions."""
+        with self._lock:
+            s = self._get(url, method)
+            s.count += 1
+            s.retries += retries
+            s.bytes_in += bytes_in
+            s.bytes_out += bytes_out
+            s.latency_sum += latency
+            s.samples.append(latency)
+            s.buckets[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+            s.statuses[status if status is not None else (error or "error")] += 1
+            if error is not None or (status is not None and status >= 400):
+                s.errors += 1
+
+    def record_cache(self, url: str, method: str, outcome: str) -> None:
+        """Record a response-cache outcome ("hit", "miss", "revalidated")."""
+        with self._lock:
+            self._get(url, method).cache[outcome] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self.started_at = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a JSON-serialisable view of all endpoints."""
+        with self._lock:
+            endpoints = [
+                {"host": h, "endpoint": e, "method": m, **s.as_dict()}
+                for (h, e, m), s in sorted(self._stats.items())
+            ]
+        return {"since": self.started_at, "endpoints": endpoints}
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def to_prometheus(self, prefix: str = "curio_http") -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+
+        def _labels(**kw: Any) -> str:
+            return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in kw.items()) + "}"
+
+        with self._lock:
+            items = sorted(self._stats.items())
+            lines += [f"# HELP {prefix}_requests_total HTTP requests by final status.",
+                      f"# TYPE {prefix}_requests_total counter"]
+            for (h, e, m), s in items:
+                for status, n in sorted(s.statuses.items(), key=lambda kv: str(kv[0])):
+                    lines.append(f"{prefix}_requests_total{_labels(host=h, endpoint=e, method=m, status=status)} {n}")
+            for name, attr, help_text in (
+                ("errors_total", "errors", "HTTP requests that failed or returned >= 400."),
+                ("retries_total", "retries", "HTTP retry attempts."),
+                ("response_bytes_total", "bytes_in", "Response body bytes received."),
+                ("request_bytes_total", "bytes_out", "Request body bytes sent."),
+            ):
+                lines += [f"# HELP {prefix}_{name} {help_text}", f"# TYPE {prefix}_{name} counter"]
+                for (h, e, m), s in items:
+                    lines.append(f"{prefix}_{name}{_labels(host=h, endpoint=e, method=m)} {getattr(s, attr)}")
+            lines += [f"# HELP {prefix}_cache_total Response cache outcomes.",
+                      f"# TYPE {prefix}_cache_total counter"]
+            for (h, e, m), s in items:
+                for outcome, n in sorted(s.cache.items()):
+                    lines.append(f"{prefix}_cache_total{_labels(host=h, endpoint=e, method=m, outcome=outcome)} {n}")
+            lines += [f"# HELP {prefix}_request_duration_seconds HTTP request latency including retries.",
+                      f"# TYPE {prefix}_request_duration_seconds histogram"]
+            for (h, e, m), s in items:
+                cumulative = 0
+                for bound, n in zip(LATENCY_BUCKETS + (float("inf"),), s.buckets):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{prefix}_request_duration_seconds_bucket"
+                                 f"{_labels(host=h, endpoint=e, method=m, le=le)} {cumulative}")
+                lines.append(f"{prefix}_request_duration_seconds_sum{_labels(host=h, endpoint=e, method=m)} "
+                             f"{s.latency_sum:.6f}")
+                lines.append(f"{prefix}_request_duration_seconds_count{_labels(host=h, endpoint=e, method=m)} "
+                             f"{s.count}")
+        return "\n".join(lines) + "\n"
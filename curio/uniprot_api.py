@@ -1,26 +1,119 @@
 # curio/uniprot_api.py
 
+import json
+import logging
 import requests
 import re
-from typing import Dict, List, Optional, Union
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .id_index import local_accession
+from .net_utils import HttpConfig, decode_json, download_to_file, iter_lines, request
+from .seq_store import get_store
+
+log = logging.getLogger(__name__)
 
 BASE_URL = "https://rest.uniprot.org/uniprotkb"
+STREAM_URL = f"{BASE_URL}/stream"
 
 HEADERS = {"User-Agent": "CURIO_Dashboard/1.0"}
 
+# Identifiers OR-ed into one batched search query (keeps URLs well under server limits)
+BATCH_CHUNK_SIZE = 100
+# Results per page when following the search ``Link`` cursor (UniProt maximum)
+PAGE_SIZE = 500
+
+ACCESSION_RE = re.compile(r"^[OPQ][0-9][A-Z0-9]{3}[0-9]$")
+
+REVIEWED = "UniProtKB reviewed (Swiss-Prot)"
+
+# Output column -> UniProt return fields (``fields=``) needed to build it.
+# JSON requests ask only for the fields of the requested columns.
+COLUMN_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "Gene Name": ("gene_primary",),
+    "UniProt ID": ("accession",),
+    "Protein Name": ("protein_name",),
+    "Organism": ("organism_name",),
+    "Length": ("length",),
+    "Sequence": ("sequence",),
+    "GO: Biological Process": ("go_p",),
+    "GO: Molecular Function": ("go_f",),
+    "GO: Cellular Component": ("go_c",),
+    "Subcellular Localization": ("cc_subcellular_location",),
+    # Extra columns, on demand
+    "Function": ("cc_function",),
+    "Keywords": ("keyword",),
+    "EC Number": ("ec",),
+    "Gene Synonyms": ("gene_synonym",),
+    "Mass (Da)": ("mass",),
+    "PDB IDs": ("xref_pdb",),
+    "Reviewed": ("reviewed",),
+    "Annotation Score": ("annotation_score",),
+}
+
+DEFAULT_COLUMNS: Tuple[str, ...] = (
+    "Gene Name", "UniProt ID", "Protein Name", "Organism", "Length", "Sequence",
+    "GO: Biological Process", "GO: Molecular Function", "GO: Cellular Component",
+    "Subcellular Localization",
+)
+
+# Fields batch lookups always need to map hits back to the input identifiers
+_MATCH_FIELDS = ("accession", "sec_acc", "gene_primary", "reviewed")
+
+
+def uniprot_fields(columns: Optional[Sequence[str]] = None) -> str:
+    """
+    Return the ``fields=`` value covering ``columns`` (default: ``DEFAULT_COLUMNS``).
+    Raises ValueError for a column not in ``COLUMN_FIELDS``.
+    """
+    columns = DEFAULT_COLUMNS if columns is None else columns
+    unknown = [c for c in columns if c not in COLUMN_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown UniProt column(s) {unknown} (have: {', '.join(COLUMN_FIELDS)})")
+    fields = list(_MATCH_FIELDS)
+    for column in columns:
+        fields.extend(COLUMN_FIELDS[column])
+    return ",".join(dict.fromkeys(fields))
+
+
+def _is_accession(identifier: str) -> bool:
+    return ACCESSION_RE.match(identifier.upper()) is not None
+
+
+def _gene_key(identifier: str) -> str:
+    return identifier.replace(" ", "").upper()
+
+
+def _primary_gene(entry: Dict) -> str:
+    return (entry.get("genes") or [{}])[0].get("geneName", {}).get("value", "").upper()
+
+
+def _preferred(current: Optional[Dict], entry: Dict) -> Dict:
+    """Of two search hits for one gene symbol: the first, unless only ``entry`` is reviewed (Swiss-Prot)."""
+    if current is None or (entry.get("entryType") == REVIEWED and current.get("entryType") != REVIEWED):
+        return entry
+    return current
+
 
 def fetch_uniprot_entry(
     identifier: str,
     organism: str = "Homo sapiens",
-    output: str = "json"
+    output: str = "json",
+    cfg: Optional[HttpConfig] = None,
+    columns: Optional[Sequence[str]] = None
 ) -> Optional[Union[Dict, str]]:
     """
-    Fetch a UniProt entry by accession or gene name.
+    Fetch a UniProt entry by accession or gene name. A gene name resolves to
+    the same entry as in ``fetch_uniprot_batch``: the first hit whose primary
+    gene matches, a reviewed (Swiss-Prot) one winning over unreviewed ones.
 
     Args:
         identifier (str): UniProt accession or gene name
         organism (str): organism name to restrict search
         output (str): "json", "fasta", or "txt"
+        cfg (HttpConfig): optional HTTP configuration
+        columns (List[str]): output columns for JSON (see ``COLUMN_FIELDS``);
+            only the UniProt fields they need are downloaded
 
     Returns:
         Dict if output="json", str otherwise.
@@ -28,18 +121,33 @@ def fetch_uniprot_entry(
     identifier = identifier.strip()
     organism = organism.strip()
 
-    # Check if accession number format (O/P/Q followed by pattern)
-    is_accession = re.match(r"^[OPQ][0-9][A-Z0-9]{3}[0-9]$", identifier.upper()) is not None
+    # Check if accession number format (O/P/Q followed by pattern); otherwise
+    # try the local ID-mapping index (curio.id_index) before searching
+    is_accession = _is_accession(identifier)
+    accession = identifier if is_accession else local_accession(identifier.replace(" ", ""), organism)
 
-    # Build URL depending on mode
-    if is_accession:
-        url = f"{BASE_URL}/{identifier}?format={output}"
-    else:
-        query = f'gene_exact:"{identifier.replace(" ", "")}" AND organism_name:"{organism}"'
-        url = f"{BASE_URL}/search?query={query}&format={output}&size=50"
+    # Gene names are searched like in fetch_uniprot_batch, so both pick the same entry
+    if not accession:
+        fields = uniprot_fields(columns) if output == "json" else ",".join(_MATCH_FIELDS)
+        entry = _resolve_entries([identifier], organism, fields=fields, cfg=cfg)[identifier]
+        if entry is None:
+            return None
+        if output == "json":
+            return parse_uniprot_entry(entry, columns)
+        accession = entry["primaryAccession"]
+
+    # FASTA we already hold in the local sequence store (curio.seq_store) costs no request
+    store = get_store(cfg) if output == "fasta" else None
+    held = store.resolve(accession) if store is not None else None
+    if held:
+        return store.get_fasta(held)
+
+    url = f"{BASE_URL}/{accession}?format={output}"
+    if output == "json":
+        url += f"&fields={uniprot_fields(columns)}"
 
     try:
-        response = requests.get(url, headers=HEADERS, timeout=20)
+        response = request("GET", url, headers=HEADERS, cfg=cfg)
         if response.status_code == 404:
             return None
         elif response.status_code != 200:
@@ -48,48 +156,309 @@ def fetch_uniprot_entry(
         return None
 
     if output == "json":
-        data = response.json()
-        if is_accession:
-            return parse_uniprot_entry(data)
-        elif data.get("results"):
-            # Pick exact gene match
-            for entry in data["results"]:
-                gene_name = entry.get("genes", [{}])[0].get("geneName", {}).get("value", "").upper()
-                if gene_name == identifier.replace(" ", "").upper():
-                    return parse_uniprot_entry(entry)
-            return None
-        else:
-            return None
+        return parse_uniprot_entry(decode_json(response), columns)
     else:
         # FASTA or TXT returns raw string
+        if store is not None:
+            store.add_fasta(response.text)
         return response.text
 
 
+def _chunks(items: List[str], size: int = BATCH_CHUNK_SIZE) -> Iterator[List[str]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _search_pages(query: str,
+                  output: str = "json",
+                  fields: Optional[str] = None,
+                  cfg: Optional[HttpConfig] = None) -> Iterator[requests.Response]:
+    """
+    Yield every page of a UniProtKB search, following the ``Link: rel="next"`` cursor.
+    Raises ``requests.HTTPError`` on a non-200 page.
+    """
+    url: Optional[str] = f"{BASE_URL}/search"
+    params: Optional[Dict] = {"query": query, "format": output, "size": PAGE_SIZE}
+    if fields:
+        params["fields"] = fields
+    while url:
+        response = request("GET", url, params=params, headers=HEADERS, cfg=cfg)
+        if response.status_code != 200:
+            raise requests.HTTPError(f"UniProt search returned {response.status_code}", response=response)
+        yield response
+        url = response.links.get("next", {}).get("url")
+        params = None  # the cursor URL carries the query
+
+
+def _search_entries(query: str, fields: Optional[str] = None,
+                    cfg: Optional[HttpConfig] = None) -> List[Dict]:
+    entries: List[Dict] = []
+    for response in _search_pages(query, "json", fields, cfg):
+        entries.extend(decode_json(response).get("results", []))
+    return entries
+
+
+def _resolve_entries(identifiers: List[str],
+                     organism: str = "Homo sapiens",
+                     fields: Optional[str] = None,
+                     cfg: Optional[HttpConfig] = None) -> Dict[str, Optional[Dict]]:
+    """
+    Map identifiers to raw UniProt JSON entries with chunked OR-queries.
+
+    Accessions are looked up with ``accession:(A OR B ...)`` (secondary
+    accessions match too); gene symbols with ``gene_exact:(...) AND
+    organism_name:...``, where the first entry whose primary gene name matches
+    wins, a reviewed entry beating an unreviewed one. Symbols found in the
+    local ID-mapping index (``curio.id_index``) are fetched by accession
+    instead. A failed chunk leaves its identifiers unresolved (None).
+    """
+    local: Dict[str, str] = {}
+    for i in identifiers:
+        if i and not _is_accession(i) and _gene_key(i) not in local:
+            acc = local_accession(_gene_key(i), organism)
+            if acc:
+                local[_gene_key(i)] = acc
+    accessions = list(dict.fromkeys([i.upper() for i in identifiers if _is_accession(i)] + list(local.values())))
+    genes = list(dict.fromkeys(_gene_key(i) for i in identifiers
+                               if i and not _is_accession(i) and _gene_key(i) not in local))
+
+    by_accession: Dict[str, Dict] = {}
+    for chunk in _chunks(accessions):
+        try:
+            entries = _search_entries(f"accession:({' OR '.join(chunk)})", fields, cfg)
+        except requests.exceptions.RequestException as e:
+            log.warning("UniProt accession batch of %d failed: %s", len(chunk), e)
+            continue
+        wanted = set(chunk)
+        for entry in entries:
+            for acc in [entry.get("primaryAccession")] + entry.get("secondaryAccessions", []):
+                if acc in wanted:
+                    by_accession.setdefault(acc, entry)
+
+    by_gene: Dict[str, Dict] = {}
+    for chunk in _chunks(genes):
+        terms = " OR ".join(f'"{g}"' for g in chunk)
+        try:
+            entries = _search_entries(f'gene_exact:({terms}) AND organism_name:"{organism}"', fields, cfg)
+        except requests.exceptions.RequestException as e:
+            log.warning("UniProt gene batch of %d failed: %s", len(chunk), e)
+            continue
+        wanted = set(chunk)
+        for entry in entries:
+            gene = _primary_gene(entry)
+            if gene not in wanted:
+                continue
+            by_gene[gene] = _preferred(by_gene.get(gene), entry)
+
+    def _entry(i: str) -> Optional[Dict]:
+        if _is_accession(i):
+            return by_accession.get(i.upper())
+        key = _gene_key(i)
+        return by_accession.get(local[key]) if key in local else by_gene.get(key)
+
+    return {i: _entry(i) for i in identifiers}
+
+
+def _split_records(text: str, output: str) -> Dict[str, str]:
+    """Split a FASTA or flat-file (txt) payload into records keyed by primary accession."""
+    records: Dict[str, str] = {}
+    if output == "fasta":
+        for record in re.split(r"(?m)^(?=>)", text):
+            if record.startswith(">"):
+                header = record.split("\n", 1)[0][1:]
+                parts = header.split("|")
+                records[parts[1] if len(parts) > 2 else header.split()[0]] = record
+    else:
+        for record in text.split("//\n"):
+            match = re.search(r"(?m)^AC   (\w+);", record)
+            if match:
+                records[match.group(1)] = record + "//\n"
+    return records
+
+
 def fetch_uniprot_batch(
     identifiers: List[str],
     organism: str = "Homo sapiens",
-    output: str = "json"
+    output: str = "json",
+    cfg: Optional[HttpConfig] = None,
+    columns: Optional[Sequence[str]] = None
 ) -> Dict[str, Optional[Union[Dict, str]]]:
     """
     Handle batch queries to UniProt.
 
+    Identifiers are resolved with chunked OR-queries (``BATCH_CHUNK_SIZE`` per
+    request, paged via the ``Link`` cursor) rather than one request each. For
+    "fasta"/"txt" output, identifiers are first resolved to primary accessions
+    and the records are then downloaded in that format and split back out.
+
     Args:
         identifiers (List[str]): list of accessions or gene names
         organism (str): organism name
         output (str): "json", "fasta", "txt"
+        cfg (HttpConfig): optional HTTP configuration shared by all requests
+        columns (List[str]): output columns for JSON (see ``COLUMN_FIELDS``)
 
     Returns:
         Dict mapping identifier -> result
     """
-    results = {}
-    for identifier in identifiers:
-        results[identifier] = fetch_uniprot_entry(identifier, organism, output)
-    return results
+    stripped = {i: i.strip() for i in identifiers}
+    if output == "json":
+        entries = _resolve_entries(list(stripped.values()), organism.strip(),
+                                   fields=uniprot_fields(columns), cfg=cfg)
+        return {i: (parse_uniprot_entry(entries[s], columns) if entries[s] else None)
+                for i, s in stripped.items()}
+
+    # FASTA for accessions (or locally indexed symbols) already in the sequence store needs no request
+    held: Dict[str, str] = {}
+    store = get_store(cfg) if output == "fasta" else None
+    if store is not None:
+        for i, s in stripped.items():
+            acc = s.upper() if _is_accession(s) else local_accession(_gene_key(s), organism.strip()) if s else None
+            name = store.resolve(acc) if acc else None
+            if name:
+                held[i] = store.get_fasta(name)
+    pending = [s for i, s in stripped.items() if i not in held]
+
+    entries = _resolve_entries(pending, organism.strip(), fields=",".join(_MATCH_FIELDS), cfg=cfg) if pending else {}
+    primaries = list(dict.fromkeys(e["primaryAccession"] for e in entries.values() if e))
+    records: Dict[str, str] = {}
+    for chunk in _chunks(primaries):
+        try:
+            for response in _search_pages(f"accession:({' OR '.join(chunk)})", output, cfg=cfg):
+                fetched = _split_records(response.text, output)
+                if store is not None:
+                    for record in fetched.values():
+                        store.add_fasta(record)
+                records.update(fetched)
+        except requests.exceptions.RequestException as e:
+            log.warning("UniProt %s batch of %d failed: %s", output, len(chunk), e)
+    return {i: held[i] if i in held else (records.get(entries[s]["primaryAccession"]) if entries[s] else None)
+            for i, s in stripped.items()}
+
+
+def iter_uniprot_records(
+    query: str,
+    output: str = "fasta",
+    fields: Optional[str] = None,
+    cfg: Optional[HttpConfig] = None
+) -> Iterator[str]:
+    """
+    Stream a UniProtKB query from ``/uniprotkb/stream`` and yield one record at a time.
+
+    Records are FASTA entries, flat-file ("txt") entries ending in ``//``, or
+    TSV/list lines (the TSV header first), each with a trailing newline. The
+    response is consumed line by line, so memory stays flat however many
+    entries match.
+
+    Args:
+        query (str): UniProt query, e.g. 'reviewed:true AND organism_id:9606 AND keyword:KW-0418'
+        output (str): "fasta", "txt", "tsv" or "list"
+        fields (str): comma-separated return fields (tsv only)
+        cfg (HttpConfig): optional HTTP configuration
+    """
+    params = {"query": query, "format": output}
+    if fields:
+        params["fields"] = fields
+    record: List[str] = []
+    for line in iter_lines(STREAM_URL, params=params, cfg=cfg):
+        if output == "fasta":
+            if line.startswith(">") and record:
+                yield "\n".join(record) + "\n"
+                record = []
+            if line:
+                record.append(line)
+        elif output == "txt":
+            record.append(line)
+            if line == "//":
+                yield "\n".join(record) + "\n"
+                record = []
+        elif line:
+            yield line + "\n"
+    if record:
+        yield "\n".join(record) + "\n"
+
+
+def iter_uniprot_entries(
+    query: str,
+    fields: Optional[str] = None,
+    parse: bool = True,
+    cfg: Optional[HttpConfig] = None,
+    columns: Optional[Sequence[str]] = None
+) -> Iterator[Dict]:
+    """
+    Yield JSON entries for a UniProtKB query, one search page (``PAGE_SIZE``) at a time.
+
+    JSON is paged through the search ``Link`` cursor rather than ``/stream``,
+    whose single JSON document cannot be parsed incrementally; only one page
+    is held in memory. Entries are passed through ``parse_uniprot_entry``
+    (downloading only the fields ``columns`` need, unless ``fields`` is given)
+    unless ``parse`` is False.
+    """
+    if parse and fields is None:
+        fields = uniprot_fields(columns)
+    for response in _search_pages(query, "json", fields, cfg):
+        for entry in decode_json(response).get("results", []):
+            yield parse_uniprot_entry(entry, columns) if parse else entry
+
+
+def download_uniprot_query(
+    query: str,
+    dest: Union[str, Path],
+    output: str = "fasta",
+    fields: Optional[str] = None,
+    cfg: Optional[HttpConfig] = None
+) -> Optional[Path]:
+    """
+    Write every entry matching ``query`` straight to ``dest`` with bounded memory.
+
+    "fasta", "txt", "tsv" and "list" are streamed from ``/uniprotkb/stream``
+    to disk as received; "json" is written as JSON Lines (one raw entry per
+    line) from the paged search.
+    """
+    dest = Path(dest)
+    try:
+        if output != "json":
+            params = {"query": query, "format": output}
+            if fields:
+                params["fields"] = fields
+            return download_to_file(STREAM_URL, dest, params=params, cfg=cfg, resume=False).path
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        part = dest.with_name(dest.name + ".part")
+        with open(part, "w", encoding="utf-8") as fh:
+            for entry in iter_uniprot_entries(query, fields=fields, parse=False, cfg=cfg):
+                fh.write(json.dumps(entry) + "\n")
+        part.replace(dest)
+        return dest
+    except (requests.exceptions.RequestException, OSError) as e:
+        log.error("UniProt download for %r failed: %s", query, e)
+        return None
+
+
+def _xref_ids(database: str) -> Callable[[Dict], List[str]]:
+    return lambda entry: [r.get("id", "") for r in entry.get("uniProtKBCrossReferences", [])
+                          if r.get("database") == database]
+
+
+# Builders for the extra (non-default) columns in COLUMN_FIELDS
+_EXTRA_PARSERS: Dict[str, Callable[[Dict], Any]] = {
+    "Function": lambda e: " ".join(
+        t.get("value", "") for c in e.get("comments", []) if c.get("commentType") == "FUNCTION"
+        for t in c.get("texts", [])) or "N/A",
+    "Keywords": lambda e: [k.get("name", "") for k in e.get("keywords", [])],
+    "EC Number": lambda e: [n.get("value", "") for n in
+                            e.get("proteinDescription", {}).get("recommendedName", {}).get("ecNumbers", [])],
+    "Gene Synonyms": lambda e: [s.get("value", "") for s in (e.get("genes") or [{}])[0].get("synonyms", [])],
+    "Mass (Da)": lambda e: e.get("sequence", {}).get("molWeight", "N/A"),
+    "PDB IDs": _xref_ids("PDB"),
+    "Reviewed": lambda e: e.get("entryType") == REVIEWED,
+    "Annotation Score": lambda e: e.get("annotationScore", "N/A"),
+}
 
 
-def parse_uniprot_entry(entry: Dict) -> Dict:
+def parse_uniprot_entry(entry: Dict, columns: Optional[Sequence[str]] = None) -> Dict:
     """
     Parse a UniProt JSON entry into a structured dict.
+    ``columns`` selects and orders the output (default: ``DEFAULT_COLUMNS``).
     """
     try:
         go_terms = {"Biological Process": [], "Molecular Function": [], "Cellular Component": []}
@@ -119,7 +488,7 @@ def parse_uniprot_entry(entry: Dict) -> Dict:
                     if loc_string:
                         subcellular_locations.append(loc_string)
 
-        return {
+        parsed = {
             "Gene Name": entry.get("genes", [{}])[0].get("geneName", {}).get("value", "N/A"),
             "UniProt ID": entry.get("primaryAccession", "N/A"),
             "Protein Name": (
@@ -136,6 +505,9 @@ def parse_uniprot_entry(entry: Dict) -> Dict:
             "GO: Cellular Component": go_terms["Cellular Component"],
             "Subcellular Localization": subcellular_locations,
         }
+        if columns is None:
+            return parsed
+        return {c: parsed[c] if c in parsed else _EXTRA_PARSERS[c](entry) for c in columns}
     except Exception:
         return {}
 
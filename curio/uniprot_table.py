@@ -0,0 +1,112 @@
+# curio/uniprot_table.py
+"""
+Columnar UniProt batch results.
+
+Parsed entries are laid out as one pandas DataFrame, one row per query
+identifier, with list columns for GO terms, localizations and other
+multi-valued fields. Frames convert to Arrow tables and export to
+Parquet/Feather when ``pyarrow`` is installed (CSV/TSV always work).
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import pandas as pd
+
+from . import get_logger
+from .net_utils import HttpConfig
+from .uniprot_api import DEFAULT_COLUMNS, fetch_uniprot_batch
+
+log = get_logger("uniprot_table")
+
+QUERY_COLUMN = "Query"
+
+# Columns holding lists in parsed entries
+LIST_COLUMNS = (
+    "GO: Biological Process", "GO: Molecular Function", "GO: Cellular Component",
+    "Subcellular Localization", "Keywords", "EC Number", "Gene Synonyms", "PDB IDs",
+)
+# Numeric columns; "N/A" becomes a missing value
+NUMERIC_COLUMNS = ("Length", "Mass (Da)", "Annotation Score")
+
+EXPORT_FORMATS = ("parquet", "feather", "csv", "tsv")
+
+
+def entries_to_frame(results: Union[Dict[str, Optional[Dict]], Iterable[Dict]],
+                     columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Build a DataFrame from ``fetch_uniprot_batch`` JSON results (identifier -> entry)
+    or from an iterable of parsed entries (e.g. ``iter_uniprot_entries``).
+
+    A dict input gets a leading ``Query`` column; identifiers without an
+    entry keep their row with missing values.
+    """
+    columns = list(DEFAULT_COLUMNS if columns is None else columns)
+    if isinstance(results, dict):
+        rows = [{QUERY_COLUMN: q, **(e or {})} for q, e in results.items()]
+        columns = [QUERY_COLUMN] + columns
+    else:
+        rows = list(results)
+    df = pd.DataFrame.from_records(rows, columns=columns)
+    for col in df.columns:
+        if col in NUMERIC_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("Float64" if col == "Mass (Da)" else "Int64")
+        elif col in LIST_COLUMNS:
+            df[col] = df[col].map(lambda v: v if isinstance(v, list) else [])
+        elif col == "Reviewed":
+            df[col] = df[col].astype("boolean")
+        else:
+            df[col] = df[col].astype("string")
+    return df
+
+
+def fetch_uniprot_table(identifiers: List[str],
+                        organism: str = "Homo sapiens",
+                        cfg: Optional[HttpConfig] = None,
+                        columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Batch-fetch UniProt entries (see ``fetch_uniprot_batch``) as one DataFrame."""
+    results = fetch_uniprot_batch(identifiers, organism=organism, output="json", cfg=cfg, columns=columns)
+    return entries_to_frame(results, columns)
+
+
+def filter_terms(df: pd.DataFrame, column: str, term: str) -> pd.DataFrame:
+    """Rows whose list ``column`` has an item containing ``term`` (case-insensitive)."""
+    term = term.lower()
+    mask = df[column].map(lambda items: any(term in item.lower() for item in items))
+    return df[mask.astype(bool)]
+
+
+def to_arrow(df: pd.DataFrame):
+    """Convert to a ``pyarrow.Table`` (list columns become Arrow list<string>)."""
+    try:
+        import pyarrow as pa
+    except ImportError as e:  # optional dependency
+        raise ImportError("pyarrow is required for Arrow/Parquet/Feather export (pip install pyarrow)") from e
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def export_table(df: pd.DataFrame, path: Union[str, Path], fmt: Optional[str] = None) -> Path:
+    """
+    Write ``df`` to ``path`` as Parquet, Feather, CSV or TSV (``fmt`` defaults
+    to the file suffix). List columns are joined with "; " for CSV/TSV.
+    """
+    path = Path(path)
+    fmt = (fmt or path.suffix.lstrip(".")).lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}' (have: {', '.join(EXPORT_FORMATS)})")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if fmt in ("parquet", "feather"):
+        table = to_arrow(df)
+        import pyarrow.feather as feather
+        import pyarrow.parquet as parquet
+
+        (parquet.write_table if fmt == "parquet" else feather.write_feather)(table, str(path))
+    else:
+        flat = df.copy()
+        for col in flat.columns:
+            if col in LIST_COLUMNS:
+                flat[col] = flat[col].map("; ".join)
+        flat.to_csv(path, index=False, sep="," if fmt == "csv" else "\t")
+    log.info("Exported %d UniProt rows to %s", len(df), path)
+    return path
@@ -1,7 +1,24 @@
 # pages/2_UniProt_Search.py
 
+import json
+import tempfile
+from pathlib import Path
+
+import pandas as pd
 import streamlit as st
-from curio.uniprot_api import fetch_uniprot_entry, fetch_uniprot_batch
+from curio.uniprot_api import (
+    COLUMN_FIELDS,
+    DEFAULT_COLUMNS,
+    fetch_uniprot_batch,
+    fetch_uniprot_entry,
+    iter_uniprot_entries,
+    iter_uniprot_records,
+)
+from curio.uniprot_table import LIST_COLUMNS, entries_to_frame, export_table, filter_terms
+from curio.net_utils import HttpConfig
+
+# Exports larger than this are left on disk instead of being read into memory for st.download_button
+DOWNLOAD_BUTTON_MAX_BYTES = 100 * 1024 * 1024
 
 st.set_page_config(page_title="UniProt Search", page_icon="🔬", layout="wide")
 
@@ -12,6 +29,8 @@ st.markdown("Retrieve **UniProtKB entries** by accession or gene name. Supports
 st.sidebar.header("Search Options")
 organism = st.sidebar.text_input("Organism", "Homo sapiens")
 output_format = st.sidebar.radio("Output Format", ["json", "fasta", "txt"], horizontal=True)
+extra_columns = st.sidebar.multiselect("Extra columns (JSON)", [c for c in COLUMN_FIELDS if c not in DEFAULT_COLUMNS])
+columns = list(DEFAULT_COLUMNS) + extra_columns
 
 # Main input area
 query_input = st.text_area(
@@ -24,44 +43,128 @@ if st.button("Search"):
     if not queries:
         st.warning("Please enter at least one identifier or gene name.")
     else:
+        cfg = HttpConfig.from_settings(st.session_state.get("settings"))
         with st.spinner("Fetching results from UniProt..."):
             if len(queries) == 1:
-                results = {queries[0]: fetch_uniprot_entry(queries[0], organism=organism, output=output_format)}
+                results = {queries[0]: fetch_uniprot_entry(queries[0], organism=organism, output=output_format,
+                                                           cfg=cfg, columns=columns)}
             else:
-                results = fetch_uniprot_batch(queries, organism=organism, output=output_format)
+                results = fetch_uniprot_batch(queries, organism=organism, output=output_format, cfg=cfg, columns=columns)
                 st.session_state["uniprot"] = results
 
         st.success(f"Retrieved {sum(v is not None for v in results.values())} / {len(results)} results")
 
-        # Display results
-        for identifier, result in results.items():
-            st.markdown("---")
-            st.subheader(f"{identifier}")
-
-            if result is None:
-                st.error("No entry found.")
-                continue
-
-            if output_format == "json":
-                # Display parsed dict
-                with st.expander("Full Entry", expanded=True):
-                    for key, value in result.items():
-                        if isinstance(value, list):
-                            st.markdown(f"**{key}:**")
-                            if value:
-                                st.write("\n".join(value))
-                            else:
-                                st.write("—")
-                        else:
-                            st.markdown(f"**{key}:** {value}")
-
-                # Sequence copy
-                if "Sequence" in result and result["Sequence"] != "N/A":
-                    st.text_area("Protein Sequence", result["Sequence"], height=150)
-                    st.download_button("⬇️ Download Sequence (FASTA)", f">{identifier}\n{result['Sequence']}", file_name=f"{identifier}.fasta")
+        if output_format == "json":
+            # One table for the whole batch (rendered below so it survives reruns)
+            st.session_state["uniprot_table"] = entries_to_frame(results, columns)
+        else:
+            st.session_state.pop("uniprot_table", None)
+            for identifier, result in results.items():
+                st.markdown("---")
+                st.subheader(f"{identifier}")
+
+                if result is None:
+                    st.error("No entry found.")
+                    continue
 
-            else:
                 # FASTA or TXT
                 with st.expander("Raw Output", expanded=True):
                     st.text_area("Result", result, height=300)
-                st.download_button(f"⬇️ Download {output_format.upper()}", result, file_name=f"{identifier}.{output_format}")
\ No newline at end of file
+                st.download_button(f"⬇️ Download {output_format.upper()}", result, file_name=f"{identifier}.{output_format}")
+
+table = st.session_state.get("uniprot_table")
+if table is not None:
+    st.markdown("---")
+    st.subheader(f"Results ({len(table):,} rows)")
+    term = st.text_input("Filter rows (gene, protein, GO term or localization contains…)")
+    view = table
+    if term:
+        searchable = [c for c in ("Gene Name", "Protein Name") if c in table.columns]
+        mask = pd.Series(False, index=table.index)
+        for col in searchable:
+            mask |= table[col].str.contains(term, case=False, regex=False).fillna(False).astype(bool)
+        for col in (c for c in LIST_COLUMNS if c in table.columns):
+            mask |= table.index.isin(filter_terms(table, col, term).index)
+        view = table[mask]
+    st.dataframe(view.drop(columns=["Sequence"], errors="ignore"), use_container_width=True, hide_index=True)
+
+    e1, e2 = st.columns(2)
+    with tempfile.TemporaryDirectory() as tmp:
+        e1.download_button("⬇️ Download CSV", export_table(view, Path(tmp) / "uniprot.csv").read_bytes(),
+                           file_name="uniprot.csv", mime="text/csv")
+        try:
+            parquet_bytes = export_table(view, Path(tmp) / "uniprot.parquet").read_bytes()
+        except ImportError:
+            e2.caption("Install `pyarrow` for Parquet/Feather export.")
+        else:
+            e2.download_button("⬇️ Download Parquet", parquet_bytes, file_name="uniprot.parquet",
+                               mime="application/octet-stream")
+
+    # Sequence of one entry
+    found = view.dropna(subset=["UniProt ID"]) if "UniProt ID" in view.columns else view.iloc[0:0]
+    if "Sequence" in view.columns and not found.empty:
+        pick = st.selectbox("Show sequence for", found["Query"])
+        row = found[found["Query"] == pick].iloc[0]
+        if pd.notna(row["Sequence"]) and row["Sequence"] != "N/A":
+            st.text_area("Protein Sequence", row["Sequence"], height=150)
+            st.download_button("⬇️ Download Sequence (FASTA)", f">{pick}\n{row['Sequence']}", file_name=f"{pick}.fasta")
+
+
+# Streaming export for large result sets
+st.markdown("---")
+st.header("Stream a UniProt query")
+st.markdown("Export large result sets (e.g. a whole proteome) without loading them into memory. "
+            "Results are written to disk as they arrive and previewed progressively.")
+stream_query = st.text_input("UniProt query", "reviewed:true AND organism_id:9606 AND keyword:KW-0418")
+stream_format = st.radio("Export Format", ["fasta", "tsv", "json"], horizontal=True)
+preview_limit = st.number_input("Preview rows/records", 10, 1000, 100, step=10)
+
+if st.button("Stream"):
+    cfg = HttpConfig.from_settings(st.session_state.get("settings"))
+    suffix = "jsonl" if stream_format == "json" else stream_format
+    # One private directory per session, removed with the session; a new stream replaces the last export
+    if "uniprot_export_dir" not in st.session_state:
+        st.session_state.uniprot_export_dir = tempfile.TemporaryDirectory(prefix="curio_uniprot_")
+    export_dir = st.session_state.uniprot_export_dir
+    for old in Path(export_dir.name).iterdir():
+        old.unlink(missing_ok=True)
+    out_path = Path(export_dir.name) / f"uniprot_stream.{suffix}"
+    status = st.empty()
+    preview = st.empty()
+    shown = []
+    count = 0
+    try:
+        with open(out_path, "w", encoding="utf-8") as fh:
+            if stream_format == "json":
+                for entry in iter_uniprot_entries(stream_query, cfg=cfg, columns=columns):
+                    fh.write(json.dumps(entry) + "\n")
+                    count += 1
+                    if len(shown) < preview_limit:
+                        shown.append({k: v for k, v in entry.items() if k != "Sequence"})
+                    if count % 500 == 0 or count == preview_limit:
+                        status.info(f"Streamed {count:,} entries…")
+                        preview.dataframe(pd.DataFrame(shown), use_container_width=True)
+            else:
+                for record in iter_uniprot_records(stream_query, output=stream_format, cfg=cfg):
+                    fh.write(record)
+                    count += 1
+                    if len(shown) < preview_limit:
+                        shown.append(record)
+                    if count % 500 == 0 or count == preview_limit:
+                        status.info(f"Streamed {count:,} records…")
+                        preview.code("".join(shown), language="text")
+    except Exception as e:
+        out_path.unlink(missing_ok=True)
+        st.error(f"Streaming failed after {count:,} records: {e}")
+    else:
+        status.success(f"Streamed {count:,} records to `{out_path}`")
+        if stream_format == "json":
+            preview.dataframe(pd.DataFrame(shown), use_container_width=True)
+        else:
+            preview.code("".join(shown), language="text")
+        size = out_path.stat().st_size
+        if size <= DOWNLOAD_BUTTON_MAX_BYTES:
+            st.download_button(f"⬇️ Download {suffix.upper()}", out_path.read_bytes(), file_name=out_path.name)
+        else:
+            st.info(f"The export is {size / 1e6:,.0f} MB, too large to serve through the browser; "
+                    f"copy it from `{out_path}` on the server. It is removed when this session ends.")
@@ -1,20 +1,21 @@
 from __future__ import annotations
 import io
 import json
-import requests
+from collections import Counter
 from pathlib import Path
 
 import pandas as pd
 import streamlit as st
 
 from curio.pubmed_api import (
-    search_pubmed,
-    fetch_pubmed_summaries,
-    fetch_pubmed_abstract,
+    RETRIEVAL_LIMIT,
+    iter_pubmed_articles,
+    iter_pubmed_summaries,
+    open_pubmed_search,
     plot_trend,
     extract_keywords,
 )
-from curio.net_utils import HttpConfig
+from curio.net_utils import HttpConfig, request
 from curio import __version__ as curio_version
 
 st.set_page_config(page_title="PubMed — Literature Search", page_icon="📚", layout="wide")
@@ -22,7 +23,6 @@ st.title("PubMed — Literature Search")
 
 # Session settings (fallbacks)
 default_years = st.session_state.get("settings", {}).get("trend_years", 10)
-timeout_seconds = st.session_state.get("settings", {}).get("timeout_seconds", 20)
 
 # Controls
 colq1, colq2, colq3 = st.columns([4, 2, 2])
@@ -36,16 +36,18 @@ with colq2:
     )
 with colq3:
     years = st.number_input("Trend window (years)", min_value=3, max_value=30, value=int(default_years), step=1)
+cap = st.number_input("Records per run (newest first)", min_value=100, max_value=100_000, value=1000, step=500)
 
 c1, c2, c3 = st.columns([1, 1, 1])
 run_custom = c1.button("Run")
 run_sample = c2.button("Run Sample Query")
 test_button = c3.button("Test Connection")
 
-# Test Connection (UI-only; minimal unauth call; avoid logging via our net utils)
+# Test Connection (UI-only; minimal unauth call on the pooled session, no error logging)
 if test_button:
     try:
-        r = requests.get(
+        r = request(
+            "GET",
             "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/einfo.fcgi",
             params={"db": "pubmed", "retmode": "json"},
             timeout=8,
@@ -63,21 +65,41 @@ if run_custom and query.strip():
 elif run_sample and sample:
     final_query = sample
 
-# Results area
+# Results area: summaries stream in pages off the history server; "Load more" resumes the cursor
+cfg = HttpConfig.from_settings(st.session_state.get("settings"))
 if final_query:
-    cfg = HttpConfig(timeout_seconds=timeout_seconds)
     with st.spinner("Searching PubMed…"):
-        pmids = search_pubmed(final_query, cfg=cfg)
+        st.session_state["pubmed_cursor"] = open_pubmed_search(final_query, cfg=cfg)
+    st.session_state["pubmed_frame"] = None
 
-    if not pmids:
+cursor = st.session_state.get("pubmed_cursor")
+load_more = cursor is not None and not cursor.exhausted and st.session_state.get("pubmed_frame") is not None \
+    and st.button(f"Load {int(cap)} more")
+if cursor is not None and (final_query or load_more):
+    pages = [] if st.session_state.get("pubmed_frame") is None else [st.session_state["pubmed_frame"]]
+    target = min(cursor.retrievable, cursor.retstart + int(cap))
+    progress = st.progress(0.0, text="Fetching summaries…")
+    for page in iter_pubmed_summaries(cursor, cap=int(cap), cfg=cfg):
+        pages.append(page)
+        progress.progress(min(1.0, cursor.retstart / max(target, 1)),
+                          text=f"Fetched {cursor.retstart:,} of {cursor.count:,} records")
+    progress.empty()
+    st.session_state["pubmed_frame"] = pd.concat(pages, ignore_index=True) if pages else pd.DataFrame()
+
+df = st.session_state.get("pubmed_frame")
+if cursor is not None and df is not None:
+    if df.empty:
         st.warning("No results found.")
     else:
-        summaries = fetch_pubmed_summaries(pmids[:200], cfg=cfg)
-        st.session_state["pubmed"] = summaries
+        # Report page keeps a list of records
+        st.session_state["pubmed"] = df.head(200).to_dict("records")
 
         # Show table
-        df = pd.DataFrame(summaries)
         st.subheader("Results")
+        st.caption(f"{len(df):,} of {cursor.count:,} records for '{cursor.query}'")
+        if cursor.truncated:
+            st.warning(f"PubMed only serves the first {RETRIEVAL_LIMIT:,} records of a search; "
+                       "narrow the query to reach the rest.")
         st.dataframe(df, use_container_width=True)
 
         # Downloads
@@ -92,24 +114,25 @@ if final_query:
 
         # Trend plot
         st.subheader("Trend")
-        fig = plot_trend(summaries, years=int(years))
+        fig = plot_trend(df, years=int(years))
         st.pyplot(fig, use_container_width=True)
 
-        # Fetch a few abstracts for keywords
+        # Abstracts and MeSH headings for the newest records (batched efetch, 200 PMIDs per request)
+        pmids = df["pmid"].tolist()
         st.subheader("Top keywords")
-        top_n = st.slider("Number of abstracts to scan", 5, min(25, len(pmids)), 10)
-        abstracts = []
+        top_hi = max(6, min(1000, len(pmids)))
+        top_n = st.slider("Number of abstracts to scan", 5, top_hi, min(100, top_hi))
         with st.spinner("Fetching abstracts…"):
-            for pid in pmids[:top_n]:
-                try:
-                    abstracts.append(fetch_pubmed_abstract(pid, cfg=cfg))
-                except Exception:
-                    pass
-        kw = extract_keywords(abstracts, topk=25)
+            articles = list(iter_pubmed_articles(pmids[:top_n], cfg=cfg))
+        kw = extract_keywords([a["abstract"] for a in articles], topk=25)
         if kw:
             st.write(", ".join(f"`{k}` ({v})" for k, v in kw))
         else:
             st.info("No keywords extracted.")
+        mesh = Counter(term for a in articles for term in a["mesh"]).most_common(25)
+        if mesh:
+            st.subheader("Top MeSH headings")
+            st.write(", ".join(f"`{k}` ({v})" for k, v in mesh))
 
 # Debug log viewer (visible when global toggle is on)
 if st.session_state.get("settings", {}).get("show_debug", False):
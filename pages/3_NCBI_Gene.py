@@ -4,7 +4,9 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 
 import streamlit as st   
 
-from curio.ncbi_gene_api import fetch_ncbi_entry, fetch_ncbi_batch
+from curio.ncbi_gene_api import fetch_ncbi_entry
+from curio.aio import fetch_ncbi_batch, run_sync
+from curio.net_utils import HttpConfig
 
 st.set_page_config(page_title="NCBI Search", page_icon="🧬", layout="wide")
 
@@ -28,15 +30,16 @@ if st.button("Search"):
     if not queries:
         st.warning("Please enter at least one identifier or gene name.")
     else:
+        cfg = HttpConfig.from_settings(st.session_state.get("settings"))
         with st.spinner(f"Fetching results from NCBI ({db_choice})..."):
             if len(queries) == 1:
                 results = {queries[0]: fetch_ncbi_entry(
-                    queries[0], db=db_choice, organism=organism, output=output_format
+                    queries[0], db=db_choice, organism=organism, output=output_format, cfg=cfg
                 )}
             else:
-                results = fetch_ncbi_batch(
-                    queries, db=db_choice, organism=organism, output=output_format
-                )
+                results = run_sync(fetch_ncbi_batch(
+                    queries, db=db_choice, organism=organism, output=output_format, cfg=cfg
+                ))
                 st.session_state["ncbi_gene"] = results
 
         st.success(f"Retrieved {sum(v is not None for v in results.values())} / {len(results)} results")
@@ -1,9 +1,9 @@
 from __future__ import annotations
-import requests
 import streamlit as st
 from pathlib import Path
 
 from curio.reactome_api import embed_url_for_gene
+from curio.net_utils import request
 from curio import __version__ as curio_version
 
 st.set_page_config(page_title="Reactome — Pathways", page_icon="🧭", layout="wide")
@@ -26,7 +26,8 @@ test_button = b3.button("Test Connection")
 # Test Connection (UI-only; no persistent logging)
 if test_button:
     try:
-        r = requests.get(
+        r = request(
+            "GET",
             "https://reactome.org/ContentService/data/database/info",
             timeout=8,
             headers={"User-Agent": f"CURIO/{curio_version} (test)"}
@@ -2,27 +2,34 @@
 from __future__ import annotations
 
 import re
+import tempfile
+from pathlib import Path
 from typing import Dict, List
 
 import streamlit as st
 import streamlit.components.v1 as components
-import requests
 from curio.structure_api import (
-    resolve_query_to_pdb_ids,  # str -> List[str] (PDB IDs)
+    search_pdb_ids,  # str -> PdbSearchResult (PDB IDs + winning strategy)
     fetch_entry_summary,       # pdb_id -> dict | None
-    fetch_pdb_file             # pdb_id -> str (PDB text) | None
+    download_pdb_file          # pdb_id, dir -> Path | None (streamed to disk)
 )
 from curio.net_utils import HttpConfig
+from curio.aio import fetch_entry_summaries, run_sync
 from curio import __version__ as curio_version
 
+# PDB files larger than this are not read into memory for st.download_button
+DOWNLOAD_BUTTON_MAX_BYTES = 50 * 1024 * 1024
+
 # Page setup
 st.set_page_config(page_title="Protein Structures", page_icon="🧬", layout="wide")
 st.title("RCSB Protein Structure Search")
 
 # HTTP config
-cfg = HttpConfig(timeout_seconds=20)
+cfg = HttpConfig.from_settings(st.session_state.get("settings"))
 cfg.headers["User-Agent"] = f"CURIO/structures v{curio_version}"
 
+organism = st.sidebar.text_input("Organism (optional, narrows the UniProt cross-reference search)", "")
+
 # Query input
 st.markdown(
     "Search by **PDB ID** (e.g., `7JXH`)."
@@ -102,21 +109,17 @@ if run:
         st.warning("Please enter a query.")
     else:
         with st.spinner(f"Searching RCSB for `{q}`…"):
-            ids = resolve_query_to_pdb_ids(q, max_hits=12, cfg=cfg)
+            found = search_pdb_ids(q, max_hits=12, cfg=cfg, organism=organism.strip() or None)
+        ids = found.ids
 
         if not ids:
             st.error("No results found. Try a different query.")
         else:
             st.session_state.rcsb_candidates = ids
+            st.caption(f"Found via `{found.strategy}` in {found.elapsed:.1f}s")
             with st.spinner("Fetching entry metadata…"):
-                meta: Dict[str, dict] = {}
-                for pid in ids:
-                    try:
-                        js = fetch_entry_summary(pid, cfg=cfg)
-                        if js:
-                            meta[pid] = js
-                    except Exception:
-                        pass
+                summaries = run_sync(fetch_entry_summaries(ids, cfg=cfg))
+                meta: Dict[str, dict] = {pid: js for pid, js in summaries.items() if js}
                 st.session_state.rcsb_meta = meta
 
 # Candidates section
@@ -200,22 +203,24 @@ if pid:
         inter_url = f"https://www.rcsb.org/structure/{pid}#interactions"
         components.iframe(inter_url, height=800, width="100%", scrolling=True)
 
-    # Download PDB
+    # Download PDB (streamed to disk so large entries are never held as str + bytes)
     with st.spinner(f"Fetching PDB file for {pid}…"):
-        pdb_text = None
-        try:
-            pdb_text = fetch_pdb_file(pid, cfg=cfg)
-        except Exception:
-            pdb_text = None
+        # One private directory per session, removed with the session
+        if "pdb_download_dir" not in st.session_state:
+            st.session_state.pdb_download_dir = tempfile.TemporaryDirectory(prefix="curio_pdb_")
+        pdb_path = download_pdb_file(pid, st.session_state.pdb_download_dir.name, cfg=cfg)
 
-    if pdb_text:
+    if pdb_path and pdb_path.stat().st_size <= DOWNLOAD_BUTTON_MAX_BYTES:
         st.download_button(
             label=f"Download {pid}.pdb",
-            data=pdb_text.encode("utf-8"),
+            data=pdb_path.read_bytes(),
             file_name=f"{pid}.pdb",
             mime="chemical/x-pdb",
             use_container_width=True
         )
+    elif pdb_path:
+        st.info(f"{pid}.pdb is {pdb_path.stat().st_size / 1e6:,.0f} MB, too large to serve through the "
+                f"browser; copy it from `{pdb_path}` on the server or get it from files.rcsb.org.")
       # Save chosen structure summary into session for reports
     if summary:
         st.session_state["pdb"] = summary
@@ -1,5 +1,6 @@
 import streamlit as st
 from curio import kegg_api
+from curio.net_utils import HttpConfig
 
 st.title("KEGG Pathway Explorer")
 
@@ -7,7 +8,8 @@ query = st.text_input("Enter gene name or ID (e.g., AKR1C3 or 5774)", "")
 org = st.text_input("Organism code (default: hsa for human)", "hsa")
 
 if query:
-    genes = kegg_api.find_kegg_gene(query, org=org)
+    cfg = HttpConfig.from_settings(st.session_state.get("settings"))
+    genes = kegg_api.find_kegg_gene(query, org=org, cfg=cfg)
 
     if not genes:
         st.warning("No KEGG gene found.")
@@ -16,13 +18,13 @@ if query:
 
         if selected_gene:
             st.subheader(f"KEGG Entry: {selected_gene}")
-            entry = kegg_api.get_kegg_entry(selected_gene)
+            entry = kegg_api.get_kegg_entry(selected_gene, cfg=cfg)
             st.text_area("Raw KEGG entry", entry, height=200)
 
             st.subheader("KEGG Pathway Viewer")
 
             # Fetch all pathways for this gene
-            pathways = kegg_api.get_gene_pathways(selected_gene)
+            pathways = kegg_api.get_gene_pathways(selected_gene, cfg=cfg)
             st.session_state["kegg"] = {
                 "gene": selected_gene,
                 "entry": entry,
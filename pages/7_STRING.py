@@ -23,7 +23,7 @@ with c3:
 run_btn = st.button("Fetch STRING network")
 
 if run_btn and gene.strip():
-    cfg = HttpConfig(timeout_seconds=st.session_state.get("settings", {}).get("timeout_seconds", 20))
+    cfg = HttpConfig.from_settings(st.session_state.get("settings"))
     with st.spinner("Fetching STRING interactions…"):
         data = fetch_interactions(gene.strip(), int(tax_id), limit=limit, cfg=cfg)
         st.session_state["string"] = data
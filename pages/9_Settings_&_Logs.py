@@ -2,6 +2,20 @@ from __future__ import annotations
 import streamlit as st
 from pathlib import Path
 
+import pandas as pd
+
+from curio.net_utils import (
+    HttpConfig,
+    breaker_states,
+    cache_stats,
+    clear_cache,
+    get_telemetry,
+    reset_breakers,
+    telemetry_prometheus,
+    telemetry_snapshot,
+)
+from curio.seq_store import get_store
+
 st.set_page_config(page_title="Settings & Logs", page_icon="⚙️", layout="wide")
 st.title("Settings & Logs")
 
@@ -11,10 +25,97 @@ settings = st.session_state.setdefault("settings", {})
 st.subheader("General Settings")
 settings["timeout_seconds"] = st.slider("HTTP Timeout (seconds)", 5, 60, settings.get("timeout_seconds", 20))
 settings["retries"] = st.slider("Retry attempts", 0, 5, settings.get("retries", 2))
+settings["deadline_seconds"] = st.slider("Total time budget per request incl. retries (seconds, 0 = none)",
+                                        0, 180, settings.get("deadline_seconds", 0))
 settings["show_debug"] = st.checkbox("Show debug logs in modules", settings.get("show_debug", False))
+settings["http_cache"] = st.checkbox("Cache API responses on disk", settings.get("http_cache", False))
+settings["shared_rate_limits"] = st.checkbox("Share API rate limits across worker processes",
+                                             settings.get("shared_rate_limits", False))
+settings["circuit_breaker"] = st.checkbox("Fail fast when an API host keeps failing (circuit breaker)",
+                                          settings.get("circuit_breaker", True))
+settings["ncbi_api_key"] = st.text_input("NCBI API key (10 requests/s instead of 3; default NCBI_API_KEY)",
+                                         settings.get("ncbi_api_key", ""), type="password")
+settings["ncbi_email"] = st.text_input("Contact email sent to NCBI E-utilities (default NCBI_EMAIL)",
+                                       settings.get("ncbi_email", ""))
+settings["sequence_store"] = st.checkbox("Keep fetched FASTA sequences in a local indexed store",
+                                         settings.get("sequence_store", False))
 
 st.success("Settings updated")
 
+st.subheader("HTTP Cache")
+cfg = HttpConfig.from_settings(settings)
+if cfg.cache_enabled:
+    stats = cache_stats(cfg)
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Entries", stats["entries"])
+    c2.metric("Size (MB)", f"{stats['bytes'] / 1e6:.1f}")
+    c3.metric("Hits / Misses", f"{stats['hits']} / {stats['misses']}")
+    c4.metric("Hit rate", f"{stats['hit_rate']:.0%}")
+    if st.button("Clear cache"):
+        clear_cache(cfg)
+        st.info("HTTP cache cleared.")
+else:
+    st.info("HTTP cache disabled.")
+
+st.subheader("HTTP Telemetry")
+snapshot = telemetry_snapshot()
+if snapshot["endpoints"]:
+    def ms(v):
+        return round(v * 1000, 1) if v is not None else None
+
+    rows = []
+    for ep in snapshot["endpoints"]:
+        rows.append({
+            "Host": ep["host"],
+            "Endpoint": f"{ep['method']} {ep['endpoint']}",
+            "Requests": ep["count"],
+            "p50 (ms)": ms(ep["latency_p50"]),
+            "p95 (ms)": ms(ep["latency_p95"]),
+            "p99 (ms)": ms(ep["latency_p99"]),
+            "Errors": f"{ep['error_rate']:.0%}",
+            "Retries": ep["retries"],
+            "KB in": round(ep["bytes_in"] / 1024, 1),
+            "KB out": round(ep["bytes_out"] / 1024, 1),
+            "Statuses": ", ".join(f"{k}: {v}" for k, v in ep["statuses"].items()),
+            "Cache": ", ".join(f"{k}: {v}" for k, v in ep["cache"].items()),
+        })
+    st.dataframe(pd.DataFrame(rows), use_container_width=True)
+    t1, t2, t3 = st.columns(3)
+    t1.download_button("⬇️ Prometheus metrics", telemetry_prometheus(), file_name="curio_metrics.prom", mime="text/plain")
+    t2.download_button("⬇️ JSON snapshot", get_telemetry().to_json(), file_name="curio_metrics.json", mime="application/json")
+    if t3.button("Reset telemetry"):
+        get_telemetry().reset()
+else:
+    st.info("No HTTP requests recorded yet in this process.")
+
+st.subheader("Circuit Breakers")
+breakers = breaker_states()
+if breakers:
+    st.dataframe(pd.DataFrame([{
+        "Host": b["host"],
+        "State": b["state"],
+        "Consecutive failures": b["consecutive_failures"],
+        "Total failures": b["total_failures"],
+        "Rejected": b["rejected"],
+        "Retry in (s)": b["retry_in_seconds"],
+        "Last error": b["last_error"],
+    } for b in breakers]), use_container_width=True)
+    if st.button("Reset circuit breakers"):
+        reset_breakers()
+else:
+    st.info("No API hosts contacted yet in this process.")
+
+st.subheader("Sequence Store")
+store = get_store(cfg)
+if store is not None:
+    info = store.stats()
+    s1, s2 = st.columns(2)
+    s1.metric("Sequences", info["sequences"])
+    s2.metric("Size (MB)", f"{info['bytes'] / 1e6:.1f}")
+    st.caption(info["path"])
+else:
+    st.info("Sequence store disabled.")
+
 st.subheader("Logs")
 log_path = Path(__file__).resolve().parents[1] / "curio" / "logs" / "curio.log"
 if log_path.exists():
@@ -0,0 +1,80 @@
+# tests/test_aio.py
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from curio import aio
+
+
+def _slow_summary(pdb_id, cfg=None):
+    time.sleep(0.2)
+    return {"rcsb_id": pdb_id}
+
+
+@patch("curio.structure_api.fetch_entry_summary", side_effect=_slow_summary)
+def test_entry_summaries_run_concurrently(mock_summary):
+    ids = ["1TUP", "2OCJ", "3KMD", "4HJE", "6GGB"]
+    start = time.monotonic()
+    result = aio.run_sync(aio.fetch_entry_summaries(ids, limit=5))
+    assert list(result) == ids
+    assert result["3KMD"] == {"rcsb_id": "3KMD"}
+    assert time.monotonic() - start < 0.6
+
+
+def test_gather_bounded_limits_concurrency():
+    running = 0
+    peak = 0
+
+    async def job(i):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return i
+
+    out = asyncio.run(aio.gather_bounded((job(i) for i in range(10)), limit=3))
+    assert out == list(range(10))
+    assert peak == 3
+
+
+def test_gather_bounded_cancels_pending_on_error():
+    cancelled = []
+
+    async def boom():
+        raise ValueError("upstream failed")
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    with pytest.raises(ValueError):
+        asyncio.run(aio.gather_bounded([slow(), boom(), slow()], limit=3))
+    assert len(cancelled) == 2
+
+
+@patch("curio.ncbi_gene_api.fetch_ncbi_entry", side_effect=[{"Symbol": "TP53"}, RuntimeError("x")])
+def test_ncbi_batch_maps_failures_to_none(mock_fetch):
+    result = aio.run_sync(aio.fetch_ncbi_batch(["TP53", "APP"], output="fasta", limit=1))
+    assert result == {"TP53": {"Symbol": "TP53"}, "APP": None}
+
+
+def _slow_json(url, **kwargs):
+    time.sleep(0.1)
+    return {"url": url}
+
+
+@patch("curio.net_utils.get_json", side_effect=_slow_json)
+def test_identical_awaits_are_coalesced(mock_get_json):
+    url = "https://data.rcsb.org/rest/v1/core/entry/1TUP"
+
+    async def main():
+        return await asyncio.gather(*(aio.get_json(url) for _ in range(4)))
+
+    assert aio.run_sync(main()) == [{"url": url}] * 4
+    assert mock_get_json.call_count == 1
@@ -1,10 +1,15 @@
 # tests/test_apis.py
+import json
+import time
+
 import pytest
+import requests
 from unittest.mock import patch
 
 from curio import (
     kegg_api,
     ncbi_gene_api,
+    net_utils,
     pubmed_api,
     reactome_api,
     string_api,
@@ -25,7 +30,7 @@ def test_kegg_entry(mock_get):
     assert "TP53" in entry
 
 
-@patch("requests.get")
+@patch("curio.kegg_api.request")
 def test_kegg_pathways(mock_get):
     mock_get.return_value.status_code = 200
     mock_get.return_value.text = "hsa:7157\tpath:hsa04115\n"
@@ -40,10 +45,115 @@ def test_ncbi_gene_entry(mock_summary, mock_search):
     assert result["Symbol"] == "TP53"
 
 
-@patch("curio.ncbi_gene_api.fetch_ncbi_entry", side_effect=[{"Symbol": "TP53"}, {"Symbol": "APP"}])
-def test_ncbi_batch(mock_fetch):
-    result = ncbi_gene_api.fetch_ncbi_batch(["TP53", "APP"])
-    assert "TP53" in result and "APP" in result
+def _eutils_response(url, data=None, params=None, **kwargs):
+    resp = requests.Response()
+    resp.status_code = 200
+    form = data or params
+    if url.endswith("esearch.fcgi"):
+        body = {"esearchresult": {"count": "2", "webenv": "MCID_1", "querykey": "1"}}
+    elif url.endswith("epost.fcgi"):
+        resp._content = b"<ePostResult><QueryKey>1</QueryKey><WebEnv>MCID_2</WebEnv></ePostResult>"
+        return resp
+    else:
+        body = {"result": {"uids": ["7157", "351"],
+                           "7157": {"name": "TP53", "otheraliases": "P53, LFS1", "description": "tumor protein p53"},
+                           "351": {"name": "APP", "otheraliases": "AD1", "description": "amyloid beta precursor"}}}
+    resp._content = json.dumps(body).encode()
+    return resp
+
+
+@patch("curio.ncbi_gene_api.fetch_ncbi_entry", return_value=None)
+@patch("curio.ncbi_gene_api.request", side_effect=lambda method, url, **kw: _eutils_response(url, **kw))
+def test_ncbi_batch(mock_request, mock_fetch):
+    cfg = ncbi_gene_api.HttpConfig(ncbi_api_key="KEY", ncbi_email="me@example.org")
+    result = ncbi_gene_api.fetch_ncbi_batch(["TP53", "lfs1", "APP", "NOPE"], cfg=cfg)
+    assert result["TP53"]["Gene ID"] == "7157" and result["lfs1"]["Symbol"] == "TP53"
+    assert result["APP"]["Description"] == "amyloid beta precursor"
+    assert result["NOPE"] is None
+    mock_fetch.assert_called_once_with("NOPE", db="gene", organism="Homo sapiens", output="json", cfg=cfg)
+
+    search, summary = mock_request.call_args_list
+    assert search.args[0] == "POST"
+    assert search.kwargs["data"]["term"].startswith('("TP53"[sym] OR "lfs1"[sym] OR "APP"[sym]')
+    assert search.kwargs["data"]["api_key"] == "KEY" and search.kwargs["data"]["email"] == "me@example.org"
+    assert summary.kwargs["params"]["WebEnv"] == "MCID_1" and summary.kwargs["params"]["retmax"] == 500
+
+
+@patch("curio.ncbi_gene_api.local_gene_id", side_effect=lambda symbol, organism: {"TP53": "7157"}.get(symbol))
+@patch("curio.ncbi_gene_api.request", side_effect=lambda method, url, **kw: _eutils_response(url, **kw))
+def test_ncbi_batch_posts_local_gene_ids(mock_request, mock_local):
+    result = ncbi_gene_api.fetch_ncbi_summaries(["TP53"])
+    assert result["TP53"]["Symbol"] == "TP53"
+    post, summary = mock_request.call_args_list
+    assert post.args[1].endswith("epost.fcgi") and post.kwargs["data"]["id"] == "7157"
+    assert summary.kwargs["params"]["WebEnv"] == "MCID_2"
+
+GENBANK = """LOCUS       NP_000537                393 aa            linear   PRI 01-JAN-2024
+DEFINITION  cellular tumor antigen p53 [Homo sapiens].
+VERSION     NP_000537.3
+ORIGIN
+        1 meepqsdpsv
+//
+
+LOCUS       NP_000475                770 aa            linear   PRI 01-JAN-2024
+VERSION     NP_000475.1
+//
+"""
+
+
+def test_ncbi_record_splitters():
+    fasta = [">NP_000537.3 p53", "MEEPQ", "SDPSV", "", ">NP_000475.1 APP", "MLPGL"]
+    records = list(ncbi_gene_api.iter_records(fasta))
+    assert records == [">NP_000537.3 p53\nMEEPQ\nSDPSV\n", ">NP_000475.1 APP\nMLPGL\n"]
+    records = list(ncbi_gene_api.iter_records(GENBANK.splitlines(), output="txt"))
+    assert len(records) == 2 and records[1].startswith("LOCUS       NP_000475")
+    assert [ncbi_gene_api.record_accession(r, "txt") for r in records] == ["NP_000537.3", "NP_000475.1"]
+
+
+@patch("curio.ncbi_gene_api.fetch_ncbi_entry", return_value=None)
+@patch("curio.ncbi_gene_api.iter_lines", return_value=iter(GENBANK.splitlines()))
+@patch("curio.ncbi_gene_api.request", side_effect=lambda method, url, **kw: _eutils_response(url, **kw))
+def test_ncbi_batch_efetch_streams_records(mock_request, mock_lines, mock_fetch, tmp_path):
+    dest = tmp_path / "records.gb"
+    records = dict(ncbi_gene_api.iter_ncbi_records(["np_000475", "NP_000537.3", "XP_1"], output="txt", dest=dest))
+    assert list(records) == ["NP_000537.3", "np_000475"]
+    assert dest.read_text().count("//") == 2
+    assert mock_lines.call_args.kwargs["method"] == "POST"
+    assert mock_lines.call_args.kwargs["data"]["rettype"] == "gb"
+    assert mock_lines.call_args.kwargs["data"]["id"] == "NP_000475,NP_000537.3,XP_1"
+    mock_request.assert_not_called()  # accessions skip esearch
+
+    mock_lines.return_value = iter(GENBANK.splitlines())
+    result = ncbi_gene_api.fetch_ncbi_batch(["NP_000537", "XP_1"], db="protein", output="txt")
+    assert "VERSION     NP_000537.3" in result["NP_000537"] and result["XP_1"] is None
+    mock_fetch.assert_called_once_with("XP_1", db="protein", organism="Homo sapiens", output="txt", cfg=None)
+
+
+def test_classify_identifier():
+    kinds = {i: ncbi_gene_api.classify_identifier(i) for i in
+             ["NP_000475.1", "nm_000546", "AAA12345", "U49845", "AF123456.2", "7157", "TP53", "HLA-A"]}
+    assert kinds == {"NP_000475.1": "protein", "nm_000546": "nucleotide", "AAA12345": "protein",
+                     "U49845": "nucleotide", "AF123456.2": "nucleotide", "7157": "uid",
+                     "TP53": "text", "HLA-A": "text"}
+    assert ncbi_gene_api.direct_id("nm_000546", "nucleotide") == "NM_000546"
+    assert ncbi_gene_api.direct_id("NM_000546", "protein") is None
+
+
+@patch("curio.ncbi_gene_api.local_gene_id", return_value=None)
+@patch("curio.ncbi_gene_api.request")
+def test_esearch_skips_ids_and_caches_symbols(mock_request, mock_local):
+    ncbi_gene_api.clear_search_cache()
+    assert ncbi_gene_api._esearch("7157", db="gene") == "7157"
+    assert ncbi_gene_api._esearch("NP_000537.3", db="protein") == "NP_000537.3"
+    mock_request.assert_not_called()
+
+    mock_request.return_value = _eutils_response("esearch.fcgi")
+    mock_request.return_value._content = b'{"esearchresult": {"idlist": ["351"]}}'
+    assert ncbi_gene_api._esearch("APP", db="gene") == "351"
+    assert ncbi_gene_api._esearch("app", db="gene") == "351"
+    assert mock_request.call_count == 1
+    ncbi_gene_api.clear_search_cache()
+
 
 # PubMed API (mocked)
 @patch("curio.pubmed_api.get_json")
@@ -64,12 +174,142 @@ def test_pubmed_search_and_summary(mock_get_json):
 
 @patch("curio.pubmed_api.get_text", return_value="<AbstractText>Mock abstract</AbstractText>")
 def test_pubmed_abstract_and_keywords(mock_get_text):
-    abstract = pubmed_api.fetch_pubmed_abstract("12345")
+    abstract = pubmed_api.fetch_pubmed_abstract("12345", cfg=net_utils.HttpConfig(ncbi_api_key="KEY"))
     assert "Mock abstract" in abstract
+    params = mock_get_text.call_args.kwargs["params"]
+    assert (params["api_key"], params["tool"], params["id"]) == ("KEY", "curio", "12345")
 
     keywords = pubmed_api.extract_keywords([abstract], topk=5)
     assert ("mock", 1) in keywords
 
+def _pubmed_get_json(url, params=None, cfg=None):
+    if url.endswith("esearch.fcgi"):
+        return {"esearchresult": {"count": "5", "webenv": "MCID_P", "querykey": "1"}}
+    start, size = params["retstart"], params["retmax"]
+    uids = [str(100 + i) for i in range(start, min(start + size, 5))]
+    result = {u: {"title": f"Paper {u}", "source": "J", "pubdate": "2021 Mar 4"} for u in uids}
+    return {"result": {"uids": uids, **result}}
+
+
+@patch("curio.pubmed_api.get_json", side_effect=_pubmed_get_json)
+def test_pubmed_summaries_page_and_resume(mock_get_json):
+    cursor = pubmed_api.open_pubmed_search("TP53 AND cancer")
+    pages = list(pubmed_api.iter_pubmed_summaries(cursor, cap=3, page_size=2))
+    assert [len(p) for p in pages] == [2, 1] and cursor.retstart == 3 and not cursor.exhausted
+    assert pages[0]["pubdate"].tolist() == ["2021-03-04", "2021-03-04"]
+
+    rest = pubmed_api.collect_pubmed_summaries(cursor)
+    assert rest["pmid"].tolist() == ["103", "104"] and cursor.exhausted
+    assert mock_get_json.call_args.kwargs["params"]["WebEnv"] == "MCID_P"
+
+
+@patch("curio.pubmed_api.get_json", side_effect=_pubmed_get_json)
+@patch("curio.pubmed_api.get_text", side_effect=["", "101\n102\n103\n104\n105\n"])
+def test_pubmed_ids_reopen_expired_history(mock_get_text, mock_get_json):
+    pages = list(pubmed_api.iter_pubmed_ids("TP53", cap=10))
+    assert pages == [["101", "102", "103", "104", "105"]]
+    assert mock_get_json.call_count == 2  # first WebEnv came back empty, search re-opened once
+    assert mock_get_text.call_args.kwargs["params"]["rettype"] == "uilist"
+
+
+@patch("curio.pubmed_api.get_json",
+       return_value={"esearchresult": {"count": "25000", "webenv": "MCID_BIG", "querykey": "1"}})
+@patch("curio.pubmed_api.get_text", side_effect=lambda url, params=None, cfg=None:
+       "\n".join(str(i) for i in range(params["retstart"], params["retstart"] + params["retmax"])))
+def test_pubmed_ids_stop_at_retrieval_limit(mock_get_text, mock_get_json):
+    cursor = pubmed_api.open_pubmed_search("TP53 AND cancer")
+    pages = list(pubmed_api.iter_pubmed_ids(cursor, page_size=4000))
+    assert [len(p) for p in pages] == [4000, 4000, 2000]
+    assert cursor.truncated and cursor.exhausted and cursor.retstart == pubmed_api.RETRIEVAL_LIMIT
+    assert mock_get_json.call_count == 1  # no re-open past the limit
+
+
+def test_pubmed_reopen_with_cache_enabled_gets_a_new_webenv(tmp_path):
+    cfg = net_utils.HttpConfig(cache_enabled=True, cache_path=str(tmp_path / "c.sqlite"), rate_limits={})
+    webenvs = iter(["MCID_OLD", "MCID_NEW"])
+
+    def eutils(method, url, params=None, **kwargs):
+        resp = requests.Response()
+        resp.status_code, resp.url = 200, url
+        if url.endswith("esearch.fcgi"):
+            resp._content = json.dumps({"esearchresult": {"count": "2", "webenv": next(webenvs),
+                                                          "querykey": "1"}}).encode()
+        else:
+            resp._content = b"" if params["WebEnv"] == "MCID_OLD" else b"101\n102\n"
+        return resp
+
+    sess = net_utils.get_session(pubmed_api.EUTILS, cfg)
+    with patch.object(sess, "request", side_effect=eutils) as mock_req:
+        assert list(pubmed_api.iter_pubmed_ids("TP53", cfg=cfg)) == [["101", "102"]]
+    assert [c.args[1].rsplit("/", 1)[1] for c in mock_req.call_args_list] == \
+        ["esearch.fcgi", "efetch.fcgi", "esearch.fcgi", "efetch.fcgi"]
+    assert mock_req.call_args.kwargs["params"]["WebEnv"] == "MCID_NEW"
+
+
+def _esummary_post(method, url, data=None, cfg=None):
+    uids = data["id"].split(",")
+    resp = requests.Response()
+    resp.status_code = 200
+    resp._content = json.dumps({"result": {"uids": uids, **{u: {"title": u, "sortpubdate": "2019/07/15 00:00"}
+                                                              for u in uids}}}).encode()
+    return resp
+
+
+@patch("curio.pubmed_api.request", side_effect=_esummary_post)
+def test_pubmed_frame_chunks_and_posts(mock_request):
+    pmids = [str(i) for i in range(1, 1301)]
+    df = pubmed_api.fetch_pubmed_frame(pmids)
+    assert df["pmid"].tolist() == pmids and set(df["pubdate"]) == {"2019-07-15"}
+    assert sorted(len(c.kwargs["data"]["id"].split(",")) for c in mock_request.call_args_list) == [300, 500, 500]
+    assert all(c.args[0] == "POST" for c in mock_request.call_args_list)
+
+
+def test_normalize_pubdates_vectorized():
+    dates = pubmed_api.normalize_pubdates(["2021/03/04 00:00", "2020 Mar", "2018 Dec 5", "Spring 2019", ""])
+    assert dates.tolist() == ["2021-03-04", "2020-03-01", "2018-12-05", "2019-01-01", ""]
+
+
+PUBMED_XML = b"""<?xml version="1.0" ?>
+<PubmedArticleSet>
+<PubmedArticle><MedlineCitation><PMID Version="1">111</PMID><Article>
+  <Journal><JournalIssue><PubDate><Year>2022</Year></PubDate></JournalIssue><Title>Nature</Title></Journal>
+  <ArticleTitle>p53 in <i>cancer</i></ArticleTitle>
+  <Abstract><AbstractText Label="BACKGROUND">Tumour suppressor.</AbstractText>
+            <AbstractText Label="RESULTS">Mutations <sup>common</sup>.</AbstractText></Abstract>
+  <AuthorList><Author><LastName>Doe</LastName><Initials>J</Initials></Author>
+              <Author><CollectiveName>TP53 Consortium</CollectiveName></Author></AuthorList>
+  <PublicationTypeList><PublicationType>Review</PublicationType></PublicationTypeList>
+</Article>
+<MeshHeadingList><MeshHeading><DescriptorName MajorTopicYN="Y">Tumor Suppressor Protein p53</DescriptorName></MeshHeading>
+<MeshHeading><DescriptorName MajorTopicYN="N">Humans</DescriptorName></MeshHeading></MeshHeadingList>
+<KeywordList><Keyword>TP53</Keyword></KeywordList></MedlineCitation></PubmedArticle>
+<PubmedArticle><MedlineCitation><PMID>222</PMID><Article><ArticleTitle>No abstract</ArticleTitle></Article>
+</MedlineCitation></PubmedArticle>
+</PubmedArticleSet>"""
+
+
+def test_parse_pubmed_xml_streams_records():
+    chunks = [PUBMED_XML[i:i + 64] for i in range(0, len(PUBMED_XML), 64)]
+    first, second = pubmed_api.parse_pubmed_xml(chunks)
+    assert first["pmid"] == "111" and first["title"] == "p53 in cancer" and first["year"] == 2022
+    assert first["abstract_sections"][1] == {"label": "RESULTS", "text": "Mutations common."}
+    assert first["abstract"] == "Tumour suppressor. Mutations common."
+    assert first["mesh"] == ["Tumor Suppressor Protein p53", "Humans"]
+    assert first["mesh_major"] == ["Tumor Suppressor Protein p53"]
+    assert first["authors"] == ["Doe J", "TP53 Consortium"] and first["keywords"] == ["TP53"]
+    assert first["publication_types"] == ["Review"]
+    assert second["pmid"] == "222" and second["abstract"] == "" and second["mesh"] == []
+
+
+@patch("curio.pubmed_api.iter_chunks", side_effect=lambda *a, **kw: iter([PUBMED_XML]))
+def test_pubmed_abstracts_batched(mock_chunks):
+    abstracts = pubmed_api.fetch_pubmed_abstracts(["111", "222", "333"])
+    assert abstracts == {"111": "Tumour suppressor. Mutations common.", "222": "", "333": ""}
+    assert mock_chunks.call_count == 1
+    assert mock_chunks.call_args.kwargs["method"] == "POST"
+    assert mock_chunks.call_args.kwargs["data"]["id"] == "111,222,333"
+
+
 # Reactome API
 def test_reactome_embed_url():
     url = reactome_api.embed_url_for_gene("TP53")
@@ -82,14 +322,38 @@ def test_string_interactions(mock_get_json):
     assert results[0]["preferredName"] == "TP53"
 
 # Structure API (mocked)
-@patch("requests.post")
-def test_structure_resolve_query(mock_post):
-    mock_post.return_value.status_code = 200
-    mock_post.return_value.json.return_value = {"result_set": [{"identifier": "1TUP"}]}
+@patch("curio.structure_api.get_json", return_value={"results": []})
+@patch("curio.structure_api.post_json", return_value={"result_set": [{"identifier": "1TUP"}]})
+def test_structure_resolve_query(mock_post, mock_get):
     pdb_ids = structure_api.resolve_query_to_pdb_ids("p53")
     assert "1TUP" in pdb_ids
 
 
+def _uniprot_xref(url, params=None, cfg=None):
+    if params:
+        return {"results": [{"primaryAccession": "P04637"}]}
+    return {"results": [{"id": "2OCJ"}, {"id": "3KMD"}]}
+
+
+@patch("curio.structure_api.get_json", side_effect=_uniprot_xref)
+@patch("curio.structure_api.post_json", return_value={"result_set": []})
+def test_structure_search_falls_back_to_uniprot_xref(mock_post, mock_get):
+    found = structure_api.search_pdb_ids("p53")
+    assert (found.ids, found.strategy) == (["2OCJ", "3KMD"], "uniprot_xref")
+
+
+@patch("curio.structure_api.get_json", side_effect=_uniprot_xref)
+def test_structure_search_races_under_one_deadline(mock_get):
+    def slow_search(url, json=None, cfg=None):
+        time.sleep(2)
+        return {"result_set": [{"identifier": "1TUP"}]}
+
+    with patch("curio.structure_api.post_json", side_effect=slow_search):
+        found = structure_api.search_pdb_ids("p53", deadline_seconds=0.5)
+    assert found.strategy == "uniprot_xref"
+    assert found.elapsed < 1.5
+
+
 @patch("curio.structure_api.get_json", return_value={"struct": {"title": "p53 protein"}})
 def test_structure_entry_summary(mock_get_json):
     summary = structure_api.fetch_entry_summary("1TUP")
@@ -106,10 +370,9 @@ def test_structure_fetch_and_parse(mock_get_text):
     assert labeled["pdb_id"] == "1TUP"
 
 # UniProt API (mocked)
-@patch("requests.get")
+@patch("curio.uniprot_api.request")
 def test_uniprot_entry(mock_get):
-    mock_get.return_value.status_code = 200
-    mock_get.return_value.json.return_value = {
+    mock_get.return_value = _uniprot_page([{
         "primaryAccession": "P04637",
         "genes": [{"geneName": {"value": "TP53"}}],
         "proteinDescription": {"recommendedName": {"fullName": {"value": "Cellular tumor antigen p53"}}},
@@ -117,12 +380,136 @@ def test_uniprot_entry(mock_get):
         "sequence": {"length": 393, "value": "MEEPQSDPSV..."},
         "uniProtKBCrossReferences": [],
         "comments": [],
-    }
+    }])
     result = uniprot_api.fetch_uniprot_entry("TP53")
     assert result["Gene Name"] == "TP53"
 
 
-@patch("curio.uniprot_api.fetch_uniprot_entry", side_effect=[{"Gene Name": "TP53"}, {"Gene Name": "APP"}])
-def test_uniprot_batch(mock_fetch):
-    results = uniprot_api.fetch_uniprot_batch(["TP53", "APP"])
-    assert "TP53" in results and "APP" in results
+def _uniprot_page(entries, next_url=None):
+    resp = requests.Response()
+    resp.status_code = 200
+    resp._content = json.dumps({"results": entries}).encode()
+    if next_url:
+        resp.headers["Link"] = f'<{next_url}>; rel="next"'
+    return resp
+
+
+@patch("curio.uniprot_api.request")
+def test_uniprot_batch(mock_request):
+    tp53 = {"primaryAccession": "P04637", "genes": [{"geneName": {"value": "TP53"}}],
+            "entryType": "UniProtKB reviewed (Swiss-Prot)"}
+    app_trembl = {"primaryAccession": "A0A0A0MRG2", "genes": [{"geneName": {"value": "APP"}}],
+                  "entryType": "UniProtKB unreviewed (TrEMBL)"}
+    app = {"primaryAccession": "P05067", "genes": [{"geneName": {"value": "APP"}}],
+           "entryType": "UniProtKB reviewed (Swiss-Prot)"}
+    q9y261 = {"primaryAccession": "Q9Y261", "secondaryAccessions": ["Q9UKK0"],
+              "genes": [{"geneName": {"value": "FOXA2"}}]}
+    mock_request.side_effect = [
+        _uniprot_page([q9y261]),
+        _uniprot_page([app_trembl, tp53], next_url="https://rest.uniprot.org/uniprotkb/search?cursor=abc"),
+        _uniprot_page([app]),
+    ]
+    results = uniprot_api.fetch_uniprot_batch(["TP53", "APP", "Q9UKK0", "NOPE1"])
+    assert mock_request.call_count == 3
+    first, second, third = mock_request.call_args_list
+    assert first.kwargs["params"]["query"] == "accession:(Q9UKK0)"
+    assert second.kwargs["params"]["query"] == 'gene_exact:("TP53" OR "APP" OR "NOPE1") AND organism_name:"Homo sapiens"'
+    assert third.args[1].endswith("cursor=abc") and third.kwargs["params"] is None
+    assert results["TP53"]["UniProt ID"] == "P04637"
+    assert results["APP"]["UniProt ID"] == "P05067"
+    assert results["Q9UKK0"]["UniProt ID"] == "Q9Y261"
+    assert results["NOPE1"] is None
+
+
+@patch("curio.uniprot_api.request")
+def test_uniprot_entry_and_batch_pick_the_same_gene_hit(mock_request):
+    trembl = {"primaryAccession": "A0A0A0MRG2", "genes": [{"geneName": {"value": "APP"}}],
+              "entryType": "UniProtKB unreviewed (TrEMBL)"}
+    swissprot = {"primaryAccession": "P05067", "genes": [{"geneName": {"value": "APP"}}],
+                 "entryType": "UniProtKB reviewed (Swiss-Prot)"}
+    mock_request.side_effect = lambda *a, **k: _uniprot_page([trembl, swissprot])
+    single = uniprot_api.fetch_uniprot_entry("APP")
+    batch = uniprot_api.fetch_uniprot_batch(["APP"])["APP"]
+    assert single["UniProt ID"] == batch["UniProt ID"] == "P05067"
+
+
+def test_uniprot_fields_follow_requested_columns():
+    fields = uniprot_api.uniprot_fields(["UniProt ID", "Sequence", "PDB IDs"]).split(",")
+    assert "sequence" in fields and "xref_pdb" in fields
+    assert "go_p" not in fields and "cc_subcellular_location" not in fields
+    with pytest.raises(ValueError):
+        uniprot_api.uniprot_fields(["Not A Column"])
+
+
+@patch("curio.uniprot_api.request")
+def test_uniprot_batch_requests_projected_fields(mock_request):
+    mock_request.return_value = _uniprot_page([{
+        "primaryAccession": "P04637", "genes": [{"geneName": {"value": "TP53"}}],
+        "keywords": [{"name": "Apoptosis"}], "sequence": {"length": 393},
+    }])
+    results = uniprot_api.fetch_uniprot_batch(["TP53"], columns=["UniProt ID", "Length", "Keywords"])
+    assert "keyword" in mock_request.call_args.kwargs["params"]["fields"].split(",")
+    assert results["TP53"] == {"UniProt ID": "P04637", "Length": 393, "Keywords": ["Apoptosis"]}
+
+
+def test_uniprot_table_is_columnar_and_exports(tmp_path):
+    from curio.uniprot_table import entries_to_frame, export_table, filter_terms
+
+    df = entries_to_frame({
+        "TP53": {"Gene Name": "TP53", "UniProt ID": "P04637", "Length": 393,
+                 "GO: Biological Process": ["GO:0006915 (apoptotic process)"]},
+        "NOPE1": None,
+    })
+    assert list(df["Query"]) == ["TP53", "NOPE1"]
+    assert str(df["Length"].dtype) == "Int64" and df["Length"].isna().tolist() == [False, True]
+    assert df["GO: Molecular Function"].tolist() == [[], []]
+    assert list(filter_terms(df, "GO: Biological Process", "APOPTOTIC")["Query"]) == ["TP53"]
+    text = export_table(df, tmp_path / "uniprot.tsv").read_text()
+    assert "GO:0006915 (apoptotic process)" in text.splitlines()[1]
+
+
+def test_uniprot_table_parquet_roundtrip(tmp_path):
+    pytest.importorskip("pyarrow")
+    import pandas as pd
+    from curio.uniprot_table import entries_to_frame, export_table
+
+    df = entries_to_frame({"TP53": {"UniProt ID": "P04637", "Keywords": ["Apoptosis"]}},
+                          columns=["UniProt ID", "Keywords"])
+    back = pd.read_parquet(export_table(df, tmp_path / "uniprot.parquet"))
+    assert list(back["Keywords"][0]) == ["Apoptosis"]
+
+
+@patch("curio.uniprot_api.iter_lines", return_value=iter([
+    ">sp|P04637|P53_HUMAN p53", "MEEPQ", "SDPSV", ">sp|P05067|A4_HUMAN APP", "MLPGL",
+]))
+def test_uniprot_stream_yields_fasta_records(mock_lines):
+    records = list(uniprot_api.iter_uniprot_records("gene:TP53 OR gene:APP", output="fasta"))
+    assert records == [">sp|P04637|P53_HUMAN p53\nMEEPQ\nSDPSV\n", ">sp|P05067|A4_HUMAN APP\nMLPGL\n"]
+    assert mock_lines.call_args.args[0] == uniprot_api.STREAM_URL
+
+
+@patch("curio.uniprot_api.request")
+def test_uniprot_entries_generator_pages_lazily(mock_request, tmp_path):
+    mock_request.side_effect = [
+        _uniprot_page([{"primaryAccession": "P04637"}], next_url="https://rest.uniprot.org/uniprotkb/search?cursor=1"),
+        _uniprot_page([{"primaryAccession": "P05067"}]),
+    ]
+    entries = uniprot_api.iter_uniprot_entries("reviewed:true", parse=False)
+    assert next(entries)["primaryAccession"] == "P04637"
+    assert mock_request.call_count == 1
+    assert [e["primaryAccession"] for e in entries] == ["P05067"]
+
+
+@patch("curio.uniprot_api.request")
+def test_uniprot_batch_fasta_splits_records(mock_request):
+    fasta = requests.Response()
+    fasta.status_code = 200
+    fasta._content = b">sp|P04637|P53_HUMAN p53\nMEEPQ\nSDPSV\n>sp|P05067|A4_HUMAN APP\nMLPGL\n"
+    mock_request.side_effect = [
+        _uniprot_page([{"primaryAccession": "P04637", "genes": [{"geneName": {"value": "TP53"}}]},
+                       {"primaryAccession": "P05067", "genes": [{"geneName": {"value": "APP"}}]}]),
+        fasta,
+    ]
+    results = uniprot_api.fetch_uniprot_batch(["TP53", "APP"], output="fasta")
+    assert results["TP53"] == ">sp|P04637|P53_HUMAN p53\nMEEPQ\nSDPSV\n"
+    assert results["APP"].startswith(">sp|P05067|")
@@ -0,0 +1,56 @@
+# tests/test_gene_info.py
+import gzip
+from unittest.mock import patch
+
+import pytest
+
+from curio import gene_info, ncbi_gene_api
+
+GENE_INFO = """\
+#tax_id\tGeneID\tSymbol\tLocusTag\tSynonyms\tdbXrefs\tchromosome\tmap_location\tdescription\ttype_of_gene\tSymbol_from_nomenclature_authority\tFull_name_from_nomenclature_authority\tNomenclature_status\tOther_designations\tModification_date\tFeature_type
+9606\t7157\tTP53\t-\tBCC7|LFS1|P53\tMIM:191170\t17\t17p13.1\ttumor protein p53\tprotein-coding\tTP53\ttumor protein p53\tO\tcellular tumor antigen p53|p53 tumor suppressor\t20240101\t-
+9606\t351\tAPP\t-\tAAA|AD1|ABETA\tMIM:104760\t21\t21q21.3\tamyloid beta precursor protein\tprotein-coding\tAPP\tamyloid beta precursor protein\tO\tamyloid beta A4 protein\t20240101\t-
+9606\t100\tADA\t-\tP53\t-\t20\t20q13.12\tadenosine deaminase\tprotein-coding\tADA\tadenosine deaminase\tO\t-\t20240101\t-
+10090\t22059\tTrp53\t-\tp53\t-\t11\t11 B3\ttransformation related protein 53\tprotein-coding\tTrp53\t-\tO\t-\t20240101\t-
+"""
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    src = tmp_path / "Homo_sapiens.gene_info.gz"
+    with gzip.open(src, "wt") as fh:
+        fh.write(GENE_INFO)
+    path = tmp_path / "gene_info.sqlite"
+    assert gene_info.build_gene_info(src, path, organism="Homo sapiens") == 3
+    monkeypatch.setattr(gene_info, "DEFAULT_GENE_INFO_PATH", path)
+    yield gene_info.get_gene_info()
+    gene_info.close_gene_info()
+
+
+def test_symbols_before_synonyms(index):
+    assert index.gene_id("tp53", "Homo sapiens") == 7157
+    assert index.gene_id("P53", 9606) is None  # synonym of both TP53 and ADA
+    assert index.gene_id("AD1") == 351
+    assert index.gene_id("Trp53", "Mus musculus") is None  # other taxa were filtered out
+    assert index.gene_id("TP53", "Bos taurus") is None  # unknown organism: no taxon, no match
+    assert index.gene_id("351") == 351
+    assert index.gene_id("351", "Homo sapiens") == 351
+    assert index.gene_id("351", "Mus musculus") is None  # a human GeneID is no mouse gene
+    record = index.record(7157)
+    assert record["Organism"] == "Homo sapiens" and record["Map Location"] == "17p13.1"
+    assert record["Other Designations"] == "cellular tumor antigen p53|p53 tumor suppressor"
+    assert index.record(100)["Other Designations"] == ""
+
+
+def test_no_index_means_network_fallback(tmp_path, monkeypatch):
+    monkeypatch.setattr(gene_info, "DEFAULT_GENE_INFO_PATH", tmp_path / "missing.sqlite")
+    assert gene_info.local_gene_record("TP53") is None
+
+
+@patch("curio.ncbi_gene_api.request")
+def test_gene_json_served_locally(mock_request, index):
+    assert ncbi_gene_api.fetch_ncbi_entry("LFS1", db="gene", output="json")["Gene ID"] == "7157"
+    batch = ncbi_gene_api.fetch_ncbi_batch(["TP53", "351"])
+    assert batch["TP53"]["Symbol"] == "TP53" and batch["351"]["Symbol"] == "APP"
+    assert ncbi_gene_api._esearch("APP", db="gene") == "351"
+    mock_request.assert_not_called()
@@ -0,0 +1,101 @@
+# tests/test_id_index.py
+import gzip
+import json
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+
+from curio import id_index, ncbi_gene_api, structure_api, uniprot_api
+
+DAT = """\
+P04637\tUniProtKB-ID\tP53_HUMAN
+P04637\tGene_Name\tTP53
+P04637\tGeneID\t7157
+P04637\tPDB\t1TUP
+P04637\tPDB\t2OCJ
+P04637-2\tRefSeq\tNP_001119584.1
+P04637\tGI\t120407068
+K7PPA8\tUniProtKB-ID\tK7PPA8_HUMAN
+K7PPA8\tGene_Name\tTP53
+Q9Y261\tUniProtKB-ID\tFOXA2_HUMAN
+Q9Y261\tGene_Synonym\tHNF3B
+"""
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    src = tmp_path / "HUMAN_9606_idmapping.dat.gz"
+    with gzip.open(src, "wt") as fh:
+        fh.write(DAT)
+    path = tmp_path / "id_index.sqlite"
+    assert id_index.build_index(src, path, organism="Homo sapiens") == 10
+    monkeypatch.setattr(id_index, "DEFAULT_INDEX_PATH", path)
+    yield id_index.get_index()
+    id_index.close_indexes()
+
+
+def test_lookups_prefer_symbols_and_swissprot(index):
+    assert index.accessions("tp53", "Homo sapiens") == ["P04637", "K7PPA8"]
+    assert index.accession("HNF3B", 9606) == "Q9Y261"
+    assert index.accession("NP_001119584") == "P04637"
+    assert index.accession("TP53", "Mus musculus") is None
+    assert index.accession("TP53", "Bos taurus") is None  # unknown organism: no taxon, no match
+    assert index.xrefs("P04637", "pdb") == ["1TUP", "2OCJ"]
+    assert id_index.local_gene_id("TP53", "Homo sapiens") == "7157"
+
+
+def _selected_line(acc, mnemonic, gene_id, pdb, taxon):
+    cols = [""] * 22
+    cols[0], cols[1], cols[2], cols[5], cols[12] = acc, mnemonic, gene_id, pdb, str(taxon)
+    return "\t".join(cols) + "\n"
+
+
+def test_rebuilding_from_selected_file_replaces_its_rows(index, tmp_path):
+    src = tmp_path / "idmapping_selected.tab"
+    src.write_text(_selected_line("P04637", "P53_HUMAN", "7157", "1TUP; 3KMD", 9606)
+                   + _selected_line("P02340", "P53_MOUSE", "22059", "", 10090))
+    path = index.path
+
+    def xref_rows():
+        with sqlite3.connect(str(path)) as conn:
+            return conn.execute("SELECT COUNT(*) FROM xref").fetchone()[0]
+
+    id_index.build_index(src, path)
+    once = xref_rows()
+    id_index.build_index(src, path)
+    assert xref_rows() == once
+    assert not list(tmp_path.glob("*.building"))
+    rebuilt = id_index.get_index()
+    assert rebuilt is not index
+    assert rebuilt.xrefs("P04637", "pdb") == ["1TUP", "3KMD"]  # the .dat file's 2OCJ was replaced
+    assert rebuilt.accessions("TP53", "Homo sapiens") == ["P04637", "K7PPA8"]  # .dat symbols kept
+    assert rebuilt.accession("22059", 10090) == "P02340"
+
+
+def test_no_index_means_network_fallback(tmp_path, monkeypatch):
+    monkeypatch.setattr(id_index, "DEFAULT_INDEX_PATH", tmp_path / "missing.sqlite")
+    assert id_index.get_index() is None
+    assert id_index.local_accession("TP53") is None
+
+
+@patch("curio.uniprot_api.request")
+def test_uniprot_gene_lookup_skips_search(mock_request, index):
+    mock_request.return_value.status_code = 200
+    mock_request.return_value.content = json.dumps({
+        "primaryAccession": "P04637", "genes": [{"geneName": {"value": "TP53"}}]}).encode()
+    assert uniprot_api.fetch_uniprot_entry("TP53")["UniProt ID"] == "P04637"
+    assert mock_request.call_args.args[1].startswith(f"{uniprot_api.BASE_URL}/P04637?format=json")
+
+
+@patch("curio.ncbi_gene_api.request")
+def test_ncbi_gene_esearch_resolved_locally(mock_request, index):
+    assert ncbi_gene_api._esearch("TP53", db="gene") == "7157"
+    mock_request.assert_not_called()
+
+
+@patch("curio.structure_api.get_json")
+def test_structure_xref_strategy_is_offline(mock_get_json, index):
+    assert structure_api._search_uniprot_xref("TP53", 12, structure_api.HttpConfig(), float("inf"),
+                                              structure_api.threading.Event(), "Homo sapiens") == ["1TUP", "2OCJ"]
+    mock_get_json.assert_not_called()
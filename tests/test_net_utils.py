@@ -0,0 +1,489 @@
+# tests/test_net_utils.py
+import gzip
+import hashlib
+import io
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from curio import json_backend, kegg_api, net_utils, structure_api
+from curio.cassette import CassetteMiss
+from curio.circuit import CircuitBreaker, CircuitOpenError
+from curio.http_cache import ResponseCache
+from curio.net_utils import HttpConfig, SessionRegistry
+from curio.rate_limit import SharedTokenBucket, TokenBucket
+from curio.telemetry import Telemetry, endpoint_template
+
+
+@pytest.fixture(autouse=True)
+def _fresh_registry(monkeypatch):
+    monkeypatch.setattr(net_utils, "_REGISTRY", SessionRegistry())
+    monkeypatch.setattr(net_utils, "_BREAKERS", {})
+    yield
+    net_utils.close_sessions()
+
+
+# Session registry
+def test_session_reused_per_host():
+    a = net_utils.get_session("https://rest.uniprot.org/uniprotkb/P04637")
+    b = net_utils.get_session("https://rest.uniprot.org/uniprotkb/search")
+    c = net_utils.get_session("https://eutils.ncbi.nlm.nih.gov/entrez/eutils/")
+    assert a is b
+    assert a is not c
+
+
+def test_session_registry_thread_safe():
+    seen = []
+    cfg = HttpConfig(pool_maxsize=4)
+
+    def worker():
+        seen.append(net_utils.get_session("https://data.rcsb.org/rest/v1/core/entry/1TUP", cfg))
+
+    threads = [threading.Thread(target=worker) for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len({id(s) for s in seen}) == 1
+    assert seen[0].get_adapter("https://data.rcsb.org")._pool_maxsize == 4
+
+
+def test_get_json_uses_pooled_session():
+    sess = net_utils.get_session("https://string-db.org/api/json/network")
+    with patch.object(sess, "request") as mock_req:
+        mock_req.return_value.ok = True
+        mock_req.return_value.status_code = 200
+        mock_req.return_value.content = b'[{"preferredName": "TP53"}]'
+        js = net_utils.get_json("https://string-db.org/api/json/network", params={"identifiers": "TP53"})
+    assert js[0]["preferredName"] == "TP53"
+    assert mock_req.call_args.kwargs["headers"]["User-Agent"].startswith("curio/")
+
+
+def _response(status=200, content=b"{}", headers=None, url="https://rest.kegg.jp/get/hsa:7157"):
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = content
+    resp.raw = io.BytesIO(content)
+    resp.headers.update(headers or {})
+    resp.url = url
+    resp.request = requests.Request("GET", url).prepare()
+    return resp
+
+
+# Response cache
+def test_cache_serves_fresh_hits_without_network(tmp_path):
+    cfg = HttpConfig(cache_enabled=True, cache_path=str(tmp_path / "c.sqlite"))
+    url = "https://rest.kegg.jp/get/hsa:7157"
+    sess = net_utils.get_session(url, cfg)
+    with patch.object(sess, "request", return_value=_response(content=b"ENTRY hsa:7157")) as mock_req:
+        assert net_utils.get_text(url, cfg=cfg) == "ENTRY hsa:7157"
+        assert net_utils.get_text(url, cfg=cfg) == "ENTRY hsa:7157"
+    assert mock_req.call_count == 1
+    stats = net_utils.cache_stats(cfg)
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_cache_revalidates_stale_entry_with_etag(tmp_path):
+    cfg = HttpConfig(cache_enabled=True, cache_path=str(tmp_path / "c.sqlite"),
+                     cache_ttls={"": 0})
+    url = "https://data.rcsb.org/rest/v1/core/entry/1TUP"
+    sess = net_utils.get_session(url, cfg)
+    first = _response(content=b'{"id": "1TUP"}', headers={"ETag": '"v1"'}, url=url)
+    with patch.object(sess, "request", side_effect=[first, _response(status=304, content=b"", url=url)]) as mock_req:
+        assert net_utils.get_json(url, cfg=cfg) == {"id": "1TUP"}
+        assert net_utils.get_json(url, cfg=cfg) == {"id": "1TUP"}
+    assert mock_req.call_args.kwargs["headers"]["If-None-Match"] == '"v1"'
+    assert net_utils.cache_stats(cfg)["revalidated"] == 1
+
+
+def test_cache_skips_eutils_history_sessions(tmp_path):
+    cfg = HttpConfig(cache_enabled=True, cache_path=str(tmp_path / "c.sqlite"), rate_limits={})
+    base = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
+    calls = [("GET", f"{base}/esearch.fcgi", {"params": {"db": "pubmed", "term": "p53", "usehistory": "y"}}),
+             ("GET", f"{base}/efetch.fcgi", {"params": {"db": "pubmed", "WebEnv": "MCID_1", "query_key": "1"}}),
+             ("POST", f"{base}/epost.fcgi", {"data": {"db": "gene", "id": "7157"}})]
+    sess = net_utils.get_session(base, cfg)
+    with patch.object(sess, "request", side_effect=lambda *a, **k: _response(content=b"<x/>")) as mock_req:
+        for method, url, kwargs in calls * 2:
+            net_utils.request(method, url, cfg=cfg, **kwargs)
+    assert mock_req.call_count == 6
+    assert net_utils.cache_stats(cfg)["entries"] == 0
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(tmp_path / "c.sqlite", max_bytes=10)
+    cache.put("a", "GET", "https://x/a", 200, {}, b"12345", ttl=60)
+    cache.put("b", "GET", "https://x/b", 200, {}, b"12345", ttl=60)
+    cache.get("a")
+    cache.put("c", "GET", "https://x/c", 200, {}, b"12345", ttl=60)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+# Retry / backoff
+@patch("curio.net_utils.time.sleep")
+def test_retry_on_retryable_status_honors_retry_after(mock_sleep):
+    url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi"
+    sess = net_utils.get_session(url)
+    busy = _response(status=429, headers={"Retry-After": "3"}, url=url)
+    with patch.object(sess, "request", side_effect=[busy, _response(content=b'{"ok": 1}', url=url)]) as mock_req:
+        assert net_utils.get_json(url, cfg=HttpConfig(retries=2)) == {"ok": 1}
+    assert mock_req.call_count == 2
+    mock_sleep.assert_called_once_with(3.0)
+
+
+@patch("curio.net_utils.time.sleep")
+def test_retry_on_connection_error_then_gives_up(mock_sleep):
+    url = "https://search.rcsb.org/rcsbsearch/v2/query"
+    sess = net_utils.get_session(url)
+    with patch.object(sess, "request", side_effect=requests.exceptions.ConnectionError("reset")) as mock_req:
+        with pytest.raises(requests.exceptions.ConnectionError):
+            net_utils.post_json(url, json={}, cfg=HttpConfig(retries=3, backoff_jitter=0))
+    assert mock_req.call_count == 4
+    assert [c.args[0] for c in mock_sleep.call_args_list] == [0.5, 1.0, 2.0]
+
+
+@patch("curio.net_utils.time.sleep")
+def test_retry_stops_at_deadline(mock_sleep):
+    url = "https://files.rcsb.org/download/1TUP.pdb"
+    sess = net_utils.get_session(url)
+    cfg = HttpConfig(retries=5, backoff_factor=10, deadline_seconds=5)
+    with patch.object(sess, "request", return_value=_response(status=503, url=url)) as mock_req:
+        with pytest.raises(requests.exceptions.HTTPError):
+            net_utils.get_text(url, cfg=cfg)
+    assert mock_req.call_count == 1
+    assert mock_req.call_args.kwargs["timeout"] <= 5
+    mock_sleep.assert_not_called()
+
+
+def test_settings_drive_retries():
+    cfg = HttpConfig.from_settings({"retries": 4, "timeout_seconds": 9})
+    assert (cfg.retries, cfg.timeout) == (4, 9)
+
+
+# Rate limiting
+def test_token_bucket_paces_concurrent_threads():
+    bucket = TokenBucket(rate=50, burst=1)
+    start = time.monotonic()
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert time.monotonic() - start >= 0.09
+
+
+def test_shared_token_bucket_spans_instances(tmp_path):
+    a = SharedTokenBucket(tmp_path / "rl.sqlite", "eutils.ncbi.nlm.nih.gov", rate=20, burst=1)
+    b = SharedTokenBucket(tmp_path / "rl.sqlite", "eutils.ncbi.nlm.nih.gov", rate=20, burst=1)
+    assert a.acquire() == 0.0
+    assert b.acquire() > 0.0
+
+
+def test_rate_limiter_configured_per_host():
+    cfg = HttpConfig(rate_limits={"eutils.ncbi.nlm.nih.gov": 3.0})
+    assert net_utils.get_rate_limiter("https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi", cfg).rate == 3.0
+    keyed = HttpConfig(rate_limits={"eutils.ncbi.nlm.nih.gov": 3.0}, ncbi_api_key="KEY")
+    assert net_utils.get_rate_limiter("https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi", keyed).rate == 10.0
+    assert net_utils.get_rate_limiter("https://rest.uniprot.org/uniprotkb/search", cfg) is None
+
+
+# Single-flight coalescing
+def _slow_response(*args, **kwargs):
+    time.sleep(0.2)
+    return _response(content=b'{"results": []}', url="https://rest.uniprot.org/uniprotkb/search")
+
+
+def test_concurrent_identical_requests_share_one_call():
+    url = "https://rest.uniprot.org/uniprotkb/search"
+    sess = net_utils.get_session(url)
+    results = []
+    with patch.object(sess, "request", side_effect=_slow_response) as mock_req:
+        threads = [threading.Thread(target=lambda: results.append(
+            net_utils.get_json(url, params={"query": "gene_exact:TP53"}))) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    assert mock_req.call_count == 1
+    assert results == [{"results": []}] * 5
+
+
+def test_requests_with_different_config_do_not_share_a_call():
+    url = "https://rest.uniprot.org/uniprotkb/search"
+    sess = net_utils.get_session(url)
+    cfgs = [HttpConfig(), HttpConfig(timeout_seconds=5), HttpConfig(headers={"User-Agent": "other"}),
+            HttpConfig(ncbi_api_key="KEY")]
+    with patch.object(sess, "request", side_effect=_slow_response) as mock_req:
+        threads = [threading.Thread(target=net_utils.get_json, args=(url,),
+                                    kwargs={"params": {"query": "gene_exact:TP53"}, "cfg": cfg}) for cfg in cfgs]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    assert mock_req.call_count == len(cfgs)
+
+
+def test_single_flight_shares_errors():
+    flight = net_utils.SingleFlight()
+    gate = threading.Event()
+    errors = []
+
+    def failing():
+        gate.wait(1)
+        raise requests.exceptions.HTTPError("502")
+
+    def call():
+        try:
+            flight.do("k", failing)
+        except requests.exceptions.HTTPError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for t in threads:
+        t.start()
+    while flight.coalesced < 2:
+        time.sleep(0.01)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert len(errors) == 3
+    assert flight.in_flight() == 0
+
+
+# Streaming downloads
+def _stream_response(body, status=200, headers=None, url="https://files.rcsb.org/download/1TUP.pdb.gz"):
+    resp = requests.Response()
+    resp.status_code = status
+    resp.raw = io.BytesIO(body)
+    resp.headers.update(headers or {})
+    resp.url = url
+    resp.request = requests.Request("GET", url).prepare()
+    return resp
+
+
+def test_iter_chunks_gunzips_on_the_fly():
+    url = "https://files.rcsb.org/download/1TUP.pdb.gz"
+    text = b"ATOM      1  N   MET A   1\n" * 5000
+    body = gzip.compress(text[:60000]) + gzip.compress(text[60000:])  # multi-member, like bgzip
+    sess = net_utils.get_session(url)
+    with patch.object(sess, "request", return_value=_stream_response(body)) as mock_req:
+        chunks = list(net_utils.iter_chunks(url, gunzip=True, chunk_size=1024))
+    assert b"".join(chunks) == text
+    assert mock_req.call_args.kwargs["stream"] is True
+
+
+def test_download_resumes_partial_file_and_checks_digest(tmp_path):
+    url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
+    payload = b">NP_000537.3 cellular tumor antigen p53\nMEEPQSDPSVEPPLSQETFSDLWKLLPENNVLSPLPSQAMDDLMLSPDDIEQWFTEDPGP\n"
+    dest = tmp_path / "tp53.fasta"
+    (tmp_path / "tp53.fasta.part").write_bytes(payload[:20])
+    sess = net_utils.get_session(url)
+    with patch.object(sess, "request", return_value=_stream_response(payload[20:], status=206, url=url)) as mock_req:
+        result = net_utils.download_to_file(url, dest, expected_checksum=hashlib.sha256(payload).hexdigest())
+    assert mock_req.call_args.kwargs["headers"]["Range"] == "bytes=20-"
+    assert result.resumed and result.bytes_written == len(payload)
+    assert dest.read_bytes() == payload
+
+
+def test_gunzip_download_uses_a_private_part_file(tmp_path):
+    url = "https://files.rcsb.org/download/1TUP.pdb.gz"
+    text = b"ATOM      1  N   MET A   1\n" * 100
+    other = tmp_path / "1TUP.pdb.part"
+    other.write_bytes(b"another download in progress")
+    sess = net_utils.get_session(url)
+    with patch.object(sess, "request", return_value=_stream_response(gzip.compress(text))) as mock_req:
+        result = net_utils.download_to_file(url, tmp_path / "1TUP.pdb", gunzip=True)
+    assert "Range" not in mock_req.call_args.kwargs["headers"]
+    assert result.path.read_bytes() == text and not result.resumed
+    assert other.read_bytes() == b"another download in progress"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["1TUP.pdb", "1TUP.pdb.part"]
+
+
+def test_download_checksum_mismatch_discards_file(tmp_path):
+    url = "https://files.rcsb.org/download/1TUP.pdb"
+    sess = net_utils.get_session(url)
+    with patch.object(sess, "request", return_value=_stream_response(b"ATOM", url=url)):
+        with pytest.raises(net_utils.ChecksumMismatch):
+            net_utils.download_to_file(url, tmp_path / "1TUP.pdb", expected_checksum="0" * 64)
+    assert not list(tmp_path.iterdir())
+
+
+# Telemetry
+def test_endpoint_template_collapses_ids():
+    assert endpoint_template("https://data.rcsb.org/rest/v1/core/entry/1TUP") == \
+        ("data.rcsb.org", "/rest/v1/core/entry/{id}")
+    assert endpoint_template("https://files.rcsb.org/download/1TUP.pdb.gz")[1] == "/download/{id}.pdb.gz"
+    assert endpoint_template("https://rest.kegg.jp/get/hsa:APP")[1] == "/get/{id}"
+    assert endpoint_template("https://rest.uniprot.org/uniprotkb/KRAS_HUMAN.fasta")[1] == "/uniprotkb/{id}.fasta"
+    assert endpoint_template("https://rest.uniprot.org/uniprotkb/search")[1] == "/uniprotkb/search"
+    assert endpoint_template("https://rest.uniprot.org/uniprotkb/P04637/database/PDB")[1] == \
+        "/uniprotkb/{id}/database/PDB"
+
+
+@patch("curio.net_utils.time.sleep")
+def test_telemetry_records_requests_retries_and_exports(mock_sleep, monkeypatch):
+    monkeypatch.setattr(net_utils, "_TELEMETRY", Telemetry())
+    url = "https://rest.kegg.jp/get/hsa:7157"
+    sess = net_utils.get_session(url)
+    with patch.object(sess, "request", side_effect=[_response(status=502, url=url),
+                                                    _response(content=b"ENTRY hsa:7157", url=url)]):
+        net_utils.get_text(url)
+    ep = net_utils.telemetry_snapshot()["endpoints"][0]
+    assert (ep["host"], ep["endpoint"], ep["method"]) == ("rest.kegg.jp", "/get/{id}", "GET")
+    assert ep["count"] == 1 and ep["retries"] == 1 and ep["bytes_in"] == 14
+    assert ep["statuses"] == {"200": 1} and ep["latency_p95"] is not None
+    prom = net_utils.telemetry_prometheus()
+    assert 'curio_http_requests_total{host="rest.kegg.jp",endpoint="/get/{id}",method="GET",status="200"} 1' in prom
+    assert 'curio_http_request_duration_seconds_bucket{host="rest.kegg.jp",endpoint="/get/{id}",method="GET",le="+Inf"} 1' in prom
+
+
+# JSON backend / content negotiation
+def test_json_backend_switch_and_accept_encoding():
+    assert "stdlib" in json_backend.available_backends()
+    previous = json_backend.get_backend()
+    try:
+        json_backend.set_backend("stdlib")
+        assert json_backend.loads(b'{"uid": "7157"}') == {"uid": "7157"}
+        with pytest.raises(ValueError):
+            json_backend.set_backend("simdjson-nope")
+    finally:
+        json_backend.set_backend(previous)
+
+    url = "https://data.rcsb.org/rest/v1/core/entry/1TUP"
+    sess = net_utils.get_session(url)
+    with patch.object(sess, "request", return_value=_response(content=b'{"rcsb_id": "1TUP"}', url=url)) as mock_req:
+        assert net_utils.get_json(url) == {"rcsb_id": "1TUP"}
+    assert "gzip" in mock_req.call_args.kwargs["headers"]["Accept-Encoding"]
+
+
+# Record / replay cassettes
+def test_cassette_records_then_replays_source_calls_offline(tmp_path, monkeypatch):
+    monkeypatch.setattr(net_utils, "_CASSETTES", {})
+    path = str(tmp_path / "tape.jsonl.gz")
+    kegg_url = "https://rest.kegg.jp/get/hsa:7157"
+    search_url = "https://search.rcsb.org/rcsbsearch/v2/query"
+    uniprot_url = "https://rest.uniprot.org/uniprotkb/search"
+
+    rec = HttpConfig(cassette_mode="record", cassette_path=path)
+    with patch.object(net_utils.get_session(kegg_url, rec), "request",
+                      return_value=_response(content=b"ENTRY hsa:7157\nNAME TP53", url=kegg_url)), \
+         patch.object(net_utils.get_session(search_url, rec), "request",
+                      return_value=_response(content=b'{"result_set": [{"identifier": "1TUP"}]}', url=search_url)), \
+         patch.object(net_utils.get_session(uniprot_url, rec), "request",
+                      return_value=_response(content=b'{"results": []}', url=uniprot_url)):
+        assert "TP53" in kegg_api.get_kegg_entry("hsa:7157", cfg=rec)
+        assert structure_api.resolve_query_to_pdb_ids("p53", cfg=rec) == ["1TUP"]
+
+    monkeypatch.setattr(net_utils, "_CASSETTES", {})
+    play = HttpConfig(cassette_mode="replay", cassette_path=path)
+    with patch.object(requests.Session, "request", side_effect=AssertionError("network used")):
+        assert "TP53" in kegg_api.get_kegg_entry("hsa:7157", cfg=play)
+        assert structure_api.resolve_query_to_pdb_ids("p53", cfg=play) == ["1TUP"]
+        with pytest.raises(CassetteMiss):
+            net_utils.get_text("https://rest.kegg.jp/get/hsa:672", cfg=play)
+
+
+def test_replay_serves_streaming_helpers(tmp_path, monkeypatch):
+    monkeypatch.setattr(net_utils, "_CASSETTES", {})
+    path = str(tmp_path / "tape.jsonl.gz")
+    url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
+    body = b">NP_000537.3 p53\nMEEPQSDPSV\n>NP_000475.1 APP\nMLPGLALLLL\n"
+    rec = HttpConfig(cassette_mode="record", cassette_path=path)
+    with patch.object(net_utils.get_session(url, rec), "request", return_value=_stream_response(body, url=url)):
+        assert b"".join(net_utils.iter_chunks(url, cfg=rec)) == body
+
+    monkeypatch.setattr(net_utils, "_CASSETTES", {})
+    play = HttpConfig(cassette_mode="replay", cassette_path=path)
+    with patch.object(requests.Session, "request", side_effect=AssertionError("network used")):
+        assert list(net_utils.iter_lines(url, cfg=play, chunk_size=8))[2] == ">NP_000475.1 APP"
+        result = net_utils.download_to_file(url, tmp_path / "seqs.fa", cfg=play)
+    assert result.path.read_bytes() == body
+
+
+@patch("curio.net_utils.time.sleep")
+def test_replay_injects_latency_and_errors(mock_sleep, tmp_path, monkeypatch):
+    monkeypatch.setattr(net_utils, "_CASSETTES", {})
+    cfg = HttpConfig(cassette_mode="replay", cassette_path=str(tmp_path / "empty.jsonl.gz"),
+                     replay_latency=0.25, replay_error_rate=1.0, replay_seed=7, retries=0)
+    with pytest.raises(requests.exceptions.HTTPError):
+        net_utils.get_json("https://rest.uniprot.org/uniprotkb/P04637", cfg=cfg)
+    mock_sleep.assert_called_once_with(0.25)
+
+
+def test_cassette_mode_from_environment(monkeypatch):
+    monkeypatch.setenv("CURIO_CASSETTE_MODE", "replay")
+    monkeypatch.setenv("CURIO_CASSETTE", "/tmp/ci.jsonl.gz")
+    cfg = HttpConfig()
+    assert (cfg.cassette_mode, cfg.cassette_path) == ("replay", "/tmp/ci.jsonl.gz")
+
+
+# Circuit breaker
+@patch("curio.net_utils.time.sleep")
+def test_breaker_opens_and_fails_fast(mock_sleep):
+    url = "https://rest.kegg.jp/get/hsa:7157"
+    sess = net_utils.get_session(url)
+    cfg = HttpConfig(retries=0, breaker_failure_threshold=2)
+    with patch.object(sess, "request", side_effect=requests.exceptions.ConnectTimeout("down")) as mock_req:
+        for _ in range(2):
+            with pytest.raises(requests.exceptions.ConnectTimeout):
+                net_utils.get_text(url, cfg=cfg)
+        with pytest.raises(CircuitOpenError):
+            net_utils.get_text(url, cfg=cfg)
+    assert mock_req.call_count == 2
+    state = net_utils.breaker_states()[0]
+    assert (state["host"], state["state"], state["rejected"]) == ("rest.kegg.jp", "open", 1)
+
+
+@patch("curio.net_utils.time.sleep")
+def test_breaker_counts_logical_requests_not_attempts(mock_sleep):
+    url = "https://rest.kegg.jp/get/hsa:7157"
+    sess = net_utils.get_session(url)
+    cfg = HttpConfig(retries=3, breaker_failure_threshold=2)
+    down = requests.exceptions.ConnectTimeout("down")
+    with patch.object(sess, "request", side_effect=[down, _response(content=b"ENTRY")]):
+        assert net_utils.get_text(url, cfg=cfg) == "ENTRY"
+    assert net_utils.breaker_states()[0]["consecutive_failures"] == 0
+    with patch.object(sess, "request", side_effect=down) as mock_req:
+        with pytest.raises(requests.exceptions.ConnectTimeout):
+            net_utils.get_text(url, cfg=cfg)
+        assert mock_req.call_count == 4
+        state = net_utils.breaker_states()[0]
+        assert (state["state"], state["consecutive_failures"]) == ("closed", 1)
+        with pytest.raises(requests.exceptions.ConnectTimeout):
+            net_utils.get_text(url, cfg=cfg)
+    assert net_utils.breaker_states()[0]["state"] == "open"
+
+
+def test_breaker_half_open_probe_closes_or_reopens(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("curio.circuit.time.monotonic", lambda: clock[0])
+    breaker = CircuitBreaker("string-db.org", failure_threshold=1, recovery_seconds=30, half_open_probes=1)
+    breaker.record_failure("HTTP 503")
+    assert not breaker.allow()
+    clock[0] += 30
+    assert breaker.state == "half_open"
+    assert breaker.allow() and not breaker.allow()
+    breaker.record_failure("HTTP 503")
+    assert breaker.state == "open"
+    clock[0] += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_open_breaker_serves_stale_cache(tmp_path):
+    cfg = HttpConfig(cache_enabled=True, cache_path=str(tmp_path / "c.sqlite"),
+                     cache_ttls={"": 0}, breaker_failure_threshold=1)
+    url = "https://data.rcsb.org/rest/v1/core/entry/1TUP"
+    sess = net_utils.get_session(url, cfg)
+    with patch.object(sess, "request", return_value=_response(content=b'{"id": "1TUP"}', url=url)):
+        assert net_utils.get_json(url, cfg=cfg) == {"id": "1TUP"}
+    net_utils.get_breaker(url, cfg).record_failure("HTTP 503")
+    with patch.object(sess, "request") as mock_req:
+        assert net_utils.get_json(url, cfg=cfg) == {"id": "1TUP"}
+    mock_req.assert_not_called()
+    assert net_utils.cache_stats(cfg)["stale"] == 1
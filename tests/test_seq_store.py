@@ -0,0 +1,93 @@
+# tests/test_seq_store.py
+import gzip
+from unittest.mock import patch
+
+import pytest
+
+from curio import ncbi_gene_api, seq_store, uniprot_api
+from curio.net_utils import HttpConfig
+
+P53 = "MEEPQSDPSVEPPLSQETFSDLWKLLPENNVLSPLPSQAMDDLMLSPDDIEQWFTEDPGPDEAPRMPEAAPPVAPAPAAPTPAAPAPAPSWPLSSSVPSQKTYQGSYGFRLGFLHSGTAKSVTCTYSPALNKMFCQLAKTCPVQLWVDSTPPPGTRVRAMAIYKQSQHMTEVVRRCPHHERCSDSDGLAPPQHLIRVEGNLRVEYLDDRNTFRHSVVVPYEPPEVGSDCTTIHYNYMCNSSCMGGMNRRPILTIITLEDSSGNLLGRNSFEVRVCACPGRDRRTEEENLRKKGEPHHELPPGSTKRALPNNT"
+FASTA = (">sp|P04637|P53_HUMAN Cellular tumor antigen p53 OS=Homo sapiens\n"
+         + "\n".join(P53[i:i + 60] for i in range(0, len(P53), 60)) + "\n"
+         ">NP_000537.3 cellular tumor antigen p53 [Homo sapiens]\nMEEPQSDPSV\n")
+
+
+@pytest.fixture
+def cfg(tmp_path, monkeypatch):
+    monkeypatch.setattr(seq_store, "_STORES", {})
+    yield HttpConfig(sequence_store_enabled=True, sequence_store_path=str(tmp_path / "seqs.fa"))
+    for store in seq_store._STORES.values():
+        store.close()
+
+
+def test_add_fetch_and_reload(tmp_path):
+    store = seq_store.SequenceStore(tmp_path / "seqs.fa")
+    assert store.add_fasta(FASTA) == ["P04637", "NP_000537.3"]
+    assert store.add_fasta(FASTA) == ["P04637", "NP_000537.3"]  # no duplicates written
+    assert len(store) == 2
+    assert store.fetch("P04637", 55, 65) == P53[55:65]
+    assert store.fetch("P04637") == P53
+    assert store.header("NP_000537.3").startswith(">NP_000537.3 cellular")
+    assert store.resolve("np_000537") == "NP_000537.3"
+    assert store.get_fasta("P04637") == FASTA.split(">NP_")[0]
+    store.close()
+
+    written = store.fai_path.read_text()
+    store.fai_path.unlink()
+    rebuilt = seq_store.SequenceStore(tmp_path / "seqs.fa")
+    assert rebuilt.fai_path.read_text() == written
+    assert rebuilt.fetch("NP_000537.3", 2, 5) == "EPQ"
+    rebuilt.close()
+
+
+def test_import_gzip_and_export(tmp_path):
+    src = tmp_path / "in.fa.gz"
+    with gzip.open(src, "wt") as fh:
+        fh.write(FASTA)
+    store = seq_store.SequenceStore(tmp_path / "seqs.fa")
+    assert store.import_fasta(src) == 2
+    out = store.export(tmp_path / "out.fa.gz")
+    with gzip.open(out, "rt") as fh:
+        assert fh.read().count(">") == 2
+    data = out.read_bytes()
+    assert data[12:16] == b"BC\x02\x00" and data.endswith(seq_store.BGZF_EOF)  # bgzip framing
+    again = seq_store.SequenceStore(tmp_path / "again.fa")
+    assert again.import_fasta(out) == 2
+    store.close()
+    again.close()
+
+
+def test_sees_records_added_by_another_process(tmp_path):
+    reader = seq_store.SequenceStore(tmp_path / "seqs.fa")
+    writer = seq_store.SequenceStore(tmp_path / "seqs.fa")  # stands in for a second worker
+    writer.add_fasta(FASTA)
+    assert reader.resolve("P04637") == "P04637"
+    assert reader.fetch("NP_000537.3", 2, 5) == "EPQ"
+    writer.reindex()
+    assert len(reader) == 2 and reader.fetch("P04637", 0, 4) == "MEEP"
+    reader.close()
+    writer.close()
+
+
+def test_disabled_by_default():
+    assert seq_store.get_store(HttpConfig()) is None
+
+
+@patch("curio.uniprot_api.request")
+def test_uniprot_fasta_served_from_store(mock_request, cfg):
+    mock_request.return_value.status_code = 200
+    mock_request.return_value.text = FASTA.split(">NP_")[0]
+    first = uniprot_api.fetch_uniprot_entry("P04637", output="fasta", cfg=cfg)
+    assert mock_request.call_count == 1
+    assert uniprot_api.fetch_uniprot_entry("P04637", output="fasta", cfg=cfg) == first
+    assert uniprot_api.fetch_uniprot_batch(["P04637"], output="fasta", cfg=cfg) == {"P04637": first}
+    assert mock_request.call_count == 1
+
+
+@patch("curio.ncbi_gene_api.request")
+def test_ncbi_fasta_served_from_store(mock_request, cfg):
+    seq_store.get_store(cfg).add_fasta(FASTA)
+    fasta = ncbi_gene_api.fetch_ncbi_entry("NP_000537", db="protein", output="fasta", cfg=cfg)
+    assert fasta.startswith(">NP_000537.3")
+    mock_request.assert_not_called()